@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Multi-dex fan-out (N JadxWorker JVMs x 1 thread, fanout.py) against one jadx
+# CLI process with N threads, for N = each core count. Speedups are relative to
+# the single process with 1 thread; both sides include JVM startup. Each core
+# count runs pinned to that many CPUs (sched_setaffinity, inherited by the JVMs).
+#
+#   python bench_fanout.py multidex.apk --cores 1,2,4,8 --repeat 2
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import zipfile
+
+from bench_threads import dex_mb, run_once
+import dexfile
+import fanout
+from jvmheap import jvm_opts
+
+
+def run_fanout(cmd, apk_path, parts, work_dir):
+    root = tempfile.mkdtemp(prefix="bench_fanout_", dir=work_dir)
+    out = tempfile.mkdtemp(prefix="bench_", dir=work_dir)
+    try:
+        t0 = time.perf_counter()
+        groups = dexfile.split_classes(apk_path, parts)
+        codes = fanout.run_parts(cmd, apk_path, groups, root, 1, lambda _part, _line: None, 3600)
+        fanout.merge_parts(root, out, len(groups))
+        return time.perf_counter() - t0, next((c for c in codes if c not in (0, None)), 0)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(out, ignore_errors=True)
+
+
+def pin_cpus(cpus, n):
+    # first n of the CPUs we may use; False where affinity cannot be set (not Linux)
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    os.sched_setaffinity(0, cpus[:n])
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-dex fan-out against JADX threads per core count")
+    parser.add_argument("apks", nargs="+", help="Multi-dex reference APKs")
+    parser.add_argument("--cores", default="1,2,4,8", help="Comma separated core counts (default: 1,2,4,8)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per (apk, cores, mode); best is reported")
+    parser.add_argument("--heap-mb", type=int, default=2048, help="Heap of each fan-out JVM (default: 2048)")
+    parser.add_argument("--jadx", default="jadx", help="jadx executable (default: jadx on PATH)")
+    parser.add_argument("--java", default="java", help="java executable for the fan-out workers")
+    parser.add_argument("--classpath", default="/opt/jadx-worker:/opt/jadx/lib/*", help="JadxWorker + jadx jars")
+    parser.add_argument("--work-dir", default=None, help="Where to put temporary output")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    core_counts = [int(c) for c in args.cores.split(",") if c.strip()]
+    cmd = [args.java, *jvm_opts(args.heap_mb).split(), "-Djadx.worker.logLevel=WARN", "-cp", args.classpath, "JadxWorker"]
+    results = []
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if not cpus:
+        print("! CPU affinity is not available here, cores=N only sets threads/parts", file=sys.stderr)
+    too_many = [n for n in core_counts if cpus and n > len(cpus)]
+    if too_many:
+        print(f"! only {len(cpus)} CPUs available, cores={','.join(map(str, too_many))} run on all of them", file=sys.stderr)
+
+    for apk in args.apks:
+        with zipfile.ZipFile(apk) as z:
+            dex_count = len(dexfile.dex_names(z))
+        if dex_count < 2 and not args.json:
+            print(f"! {os.path.basename(apk)} has a single dex file, fan-out would not be used for it", file=sys.stderr)
+        base = None
+        for cores in core_counts:
+            row = {"apk": os.path.basename(apk), "dex_mb": round(dex_mb(apk), 2), "dex_files": dex_count, "cores": cores,
+                   "pinned": pin_cpus(cpus, cores)}
+            for mode in ("threads", "fanout"):
+                times = []
+                for _ in range(args.repeat):
+                    if mode == "threads":
+                        sec, rc = run_once(args.jadx, apk, cores, args.work_dir)
+                    else:
+                        sec, rc = run_fanout(cmd, apk, cores, args.work_dir)
+                    if rc != 0:
+                        print(f"! {row['apk']} cores={cores} {mode} exit code {rc}", file=sys.stderr)
+                    times.append(sec)
+                row[f"{mode}_sec"] = round(min(times), 2)
+            if base is None:
+                base = row["threads_sec"]
+            row["threads_speedup"] = round(base / row["threads_sec"], 2)
+            row["fanout_speedup"] = round(base / row["fanout_sec"], 2)
+            results.append(row)
+            if not args.json:
+                print(f"{row['apk']:<32} dex={row['dex_mb']:>7.2f}MB/{dex_count} cores={cores:<3} "
+                      f"threads={row['threads_sec']:>7.2f}s ({row['threads_speedup']:.2f}x) "
+                      f"fanout={row['fanout_sec']:>7.2f}s ({row['fanout_speedup']:.2f}x)", flush=True)
+    if cpus:
+        pin_cpus(cpus, len(cpus))
+
+    if args.json:
+        print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
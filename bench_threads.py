@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Wall-clock of a full JADX decompile vs --threads-count, for sizing JADX_MAX_THREADS
+# and JADX_DEX_MB_PER_THREAD.
+#
+#   python bench_threads.py small.apk medium.apk large.apk --threads 1,2,4,8 --repeat 2
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import zipfile
+
+
+def dex_mb(apk_path):
+    try:
+        with zipfile.ZipFile(apk_path) as z:
+            return sum(i.file_size for i in z.infolist()
+                       if i.filename.startswith("classes") and i.filename.endswith(".dex")) / 1024 / 1024
+    except zipfile.BadZipFile:
+        return 0.0
+
+
+def run_once(jadx, apk_path, threads, work_dir):
+    out = tempfile.mkdtemp(prefix="bench_", dir=work_dir)
+    try:
+        t0 = time.perf_counter()
+        p = subprocess.run(
+            [jadx, "--threads-count", str(threads), "--show-bad-code", "-d", out, apk_path],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        return time.perf_counter() - t0, p.returncode
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JADX wall-clock time against thread count")
+    parser.add_argument("apks", nargs="+", help="Reference APKs")
+    parser.add_argument("--threads", default="1,2,4,8", help="Comma separated thread counts (default: 1,2,4,8)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per (apk, threads); best is reported")
+    parser.add_argument("--jadx", default="jadx", help="jadx executable (default: jadx on PATH)")
+    parser.add_argument("--work-dir", default=None, help="Where to put temporary output")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    thread_counts = [int(t) for t in args.threads.split(",") if t.strip()]
+    results = []
+
+    for apk in args.apks:
+        base = None
+        for threads in thread_counts:
+            times = []
+            for _ in range(args.repeat):
+                sec, rc = run_once(args.jadx, apk, threads, args.work_dir)
+                if rc != 0:
+                    print(f"! {os.path.basename(apk)} threads={threads} exit code {rc}", file=sys.stderr)
+                times.append(sec)
+            best = min(times)
+            base = base or best
+            results.append({
+                "apk": os.path.basename(apk),
+                "dex_mb": round(dex_mb(apk), 2),
+                "threads": threads,
+                "wall_sec": round(best, 2),
+                "speedup": round(base / best, 2),
+            })
+            if not args.json:
+                r = results[-1]
+                print(f"{r['apk']:<32} dex={r['dex_mb']:>7.2f}MB threads={threads:>3} "
+                      f"wall={r['wall_sec']:>8.2f}s speedup={r['speedup']:.2f}x", flush=True)
+
+    if args.json:
+        print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
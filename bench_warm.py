@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Cold (jadx CLI, new JVM per run) vs warm (JadxWorker from the JADX_WARM_POOL)
+# wall-clock per APK, to see how much of a small APK's time is JVM startup.
+#
+#   python bench_warm.py small1.apk small2.apk --repeat 5 --threads 2
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from bench_threads import dex_mb, run_once
+from jadxpool import JadxPool
+from jvmheap import jvm_opts
+
+
+def run_warm(pool, apk_path, threads, work_dir):
+    out = tempfile.mkdtemp(prefix="bench_", dir=work_dir)
+    worker = pool.acquire(timeout=300)
+    if worker is None:
+        raise RuntimeError(f"no warm worker available: {pool.stats()['last_error']}")
+    try:
+        t0 = time.perf_counter()
+        rc = worker.run(out, apk_path, threads, lambda _line: None, 3600)
+        return time.perf_counter() - t0, rc
+    finally:
+        pool.release(worker)
+        shutil.rmtree(out, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold jadx CLI runs against a warm JADX worker")
+    parser.add_argument("apks", nargs="+", help="Reference APKs (small ones show the difference best)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per APK and mode")
+    parser.add_argument("--threads", type=int, default=1, help="JADX --threads-count (default: 1)")
+    parser.add_argument("--heap-mb", type=int, default=2048, help="Heap of the warm worker (default: 2048)")
+    parser.add_argument("--jadx", default="jadx", help="jadx executable (default: jadx on PATH)")
+    parser.add_argument("--java", default="java", help="java executable for the warm worker")
+    parser.add_argument("--classpath", default="/opt/jadx-worker:/opt/jadx/lib/*", help="JadxWorker + jadx jars")
+    parser.add_argument("--work-dir", default=None, help="Where to put temporary output")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    cmd = [args.java, *jvm_opts(args.heap_mb).split(), "-Djadx.worker.logLevel=WARN", "-cp", args.classpath, "JadxWorker"]
+    t0 = time.perf_counter()
+    pool = JadxPool(1, cmd, max_jobs=0).start()
+    worker = pool.acquire(timeout=300)
+    if worker is None:
+        sys.exit(f"warm worker did not start: {pool.stats()['last_error']}")
+    pool.release(worker)
+    startup = time.perf_counter() - t0
+    if not args.json:
+        print(f"warm worker ready in {startup:.2f}s", flush=True)
+
+    results = []
+    try:
+        for apk in args.apks:
+            row = {"apk": os.path.basename(apk), "dex_mb": round(dex_mb(apk), 2)}
+            for mode in ("cold", "warm"):
+                times = []
+                for _ in range(args.repeat):
+                    if mode == "cold":
+                        sec, rc = run_once(args.jadx, apk, args.threads, args.work_dir)
+                    else:
+                        sec, rc = run_warm(pool, apk, args.threads, args.work_dir)
+                    if rc != 0:
+                        print(f"! {row['apk']} {mode} exit code {rc}", file=sys.stderr)
+                    times.append(sec)
+                row[f"{mode}_first_sec"] = round(times[0], 2)
+                row[f"{mode}_median_sec"] = round(statistics.median(times), 2)
+            row["speedup"] = round(row["cold_median_sec"] / max(row["warm_median_sec"], 1e-6), 2)
+            results.append(row)
+            if not args.json:
+                print(f"{row['apk']:<32} dex={row['dex_mb']:>7.2f}MB "
+                      f"cold={row['cold_median_sec']:>7.2f}s (first {row['cold_first_sec']:.2f}s) "
+                      f"warm={row['warm_median_sec']:>7.2f}s (first {row['warm_first_sec']:.2f}s) "
+                      f"speedup={row['speedup']:.2f}x", flush=True)
+    finally:
+        pool.close()
+
+    if args.json:
+        print(json.dumps({"threads": args.threads, "warm_startup_sec": round(startup, 2), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
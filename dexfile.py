@@ -0,0 +1,535 @@
+import sys
+import heapq
+import struct
+import hashlib
+import zipfile
+from array import array
+
+# -------------------------
+# MINIMAL DEX READER (pure Python, no JVM)
+# -------------------------
+# Reads the parts of the dex format this service needs: the class list (lazy
+# scans), per-class bytecode hashes (incremental scans) and code sizes (fan-out
+# groups). String data is
+# decoded only for the strings that are asked for.
+# Format reference: https://source.android.com/docs/core/runtime/dex-format
+
+NO_INDEX = 0xFFFFFFFF
+HEADER = struct.Struct("<8s I 20s 20I")
+CLASS_DEF = struct.Struct("<8I")
+
+ACC_INTERFACE = 0x200
+ACC_ANNOTATION = 0x2000
+ACC_ENUM = 0x4000
+
+
+class DexError(ValueError):
+    pass
+
+
+def read_uleb128(data, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _mutf8(raw: bytes) -> str:
+    # modified UTF-8: NUL is C0 80, supplementary chars are surrogate pairs
+    s = raw.replace(b"\xc0\x80", b"\x00").decode("utf-8", errors="surrogatepass")
+    try:
+        return s.encode("utf-16", "surrogatepass").decode("utf-16")
+    except UnicodeDecodeError:
+        return s.encode("utf-8", "replace").decode("utf-8")
+
+
+class DexFile:
+    def __init__(self, data: bytes, name: str = "classes.dex"):
+        if len(data) < HEADER.size or not data.startswith(b"dex\n"):
+            raise DexError(f"{name}: not a dex file")
+        h = HEADER.unpack_from(data, 0)
+        self.name = name
+        self.data = data
+        self.version = h[0][4:7].decode("ascii", "replace")
+        (self.file_size, self.header_size, self.endian_tag, _link_size, _link_off, self.map_off,
+         self.string_ids_size, self.string_ids_off, self.type_ids_size, self.type_ids_off,
+         self.proto_ids_size, self.proto_ids_off, self.field_ids_size, self.field_ids_off,
+         self.method_ids_size, self.method_ids_off, self.class_defs_size, self.class_defs_off,
+         self.data_size, self.data_off) = h[3:]
+        if self.endian_tag != 0x12345678:
+            raise DexError(f"{name}: unsupported endianness")
+        if self.class_defs_off + self.class_defs_size * CLASS_DEF.size > len(data):
+            raise DexError(f"{name}: truncated")
+        self._strings: dict[int, str] = {}
+
+    def string(self, idx: int) -> str:
+        s = self._strings.get(idx)
+        if s is None:
+            off = struct.unpack_from("<I", self.data, self.string_ids_off + idx * 4)[0]
+            _utf16_len, pos = read_uleb128(self.data, off)
+            end = self.data.index(b"\x00", pos)
+            s = self._strings[idx] = _mutf8(self.data[pos:end])
+        return s
+
+    def type_name(self, idx: int) -> str | None:
+        if idx == NO_INDEX:
+            return None
+        desc_idx = struct.unpack_from("<I", self.data, self.type_ids_off + idx * 4)[0]
+        return self.string(desc_idx)
+
+    def class_defs(self):
+        # (descriptor, access_flags, superclass descriptor, source file, class_data_off)
+        for i in range(self.class_defs_size):
+            (class_idx, flags, super_idx, _ifaces, source_idx, _annotations,
+             class_data_off, _static_values) = CLASS_DEF.unpack_from(self.data, self.class_defs_off + i * CLASS_DEF.size)
+            yield (
+                self.type_name(class_idx),
+                flags,
+                self.type_name(super_idx),
+                None if source_idx == NO_INDEX else self.string(source_idx),
+                class_data_off,
+            )
+
+
+# -------------------------
+# DESCRIPTORS -> JAVA NAMES / JADX OUTPUT PATHS
+# -------------------------
+def descriptor_to_name(desc: str) -> str:
+    # "Lcom/foo/Bar$Inner;" -> "com.foo.Bar$Inner"
+    return desc[1:-1].replace("/", ".") if desc.startswith("L") and desc.endswith(";") else desc
+
+
+def outer_name(name: str) -> str | None:
+    # "com.foo.Bar$Inner$1" -> "com.foo.Bar"; None for top-level names
+    pkg, _, simple = name.rpartition(".")
+    if "$" not in simple.strip("$"):
+        return None
+    outer = simple[:simple.index("$", 1)]
+    return f"{pkg}.{outer}" if pkg else outer
+
+
+def source_path(name: str) -> str:
+    # where JADX writes a top-level class below sources/ (default package -> defpackage/)
+    pkg, _, simple = name.rpartition(".")
+    return f"{pkg.replace('.', '/') if pkg else 'defpackage'}/{simple}.java"
+
+
+def dex_names(z: zipfile.ZipFile) -> list[str]:
+    # classes.dex, classes2.dex, ... in the order the runtime loads them
+    names = [n for n in z.namelist() if n.startswith("classes") and n.endswith(".dex") and "/" not in n]
+    return sorted(names, key=lambda n: (len(n), n))
+
+
+def group_top_level(names) -> dict[str, list[str]]:
+    # {top-level class: [it and its nested classes]}; a nested class whose outer
+    # class is missing is treated as top-level, as JADX does
+    names = set(names)
+    groups: dict[str, list[str]] = {}
+    for name in sorted(names):
+        outer = outer_name(name)
+        groups.setdefault(outer if outer in names else name, []).append(name)
+    return groups
+
+
+def apk_classes(apk_path: str) -> list[dict]:
+    # top-level classes of every dex in the APK; nested classes live in their outer class's file
+    found: dict[str, dict] = {}
+    with zipfile.ZipFile(apk_path) as z:
+        for dex_name in dex_names(z):
+            dex = DexFile(z.read(dex_name), dex_name)
+            for desc, flags, superclass, _source, _data_off in dex.class_defs():
+                name = descriptor_to_name(desc)
+                found.setdefault(name, {"name": name, "dex": dex_name, "flags": flags,
+                                        "superclass": superclass and descriptor_to_name(superclass)})
+    return [c for name, c in sorted(found.items()) if outer_name(name) not in found]
+
+
+# -------------------------
+# BYTECODE HASHES (for incremental scans)
+# -------------------------
+# A class's hash covers everything JADX turns into source: flags, supertypes,
+# fields, static values, annotations, and per method the code, try/catch
+# handlers and debug info (local names). Indices into the dex tables differ
+# between builds, so every index is replaced by what it refers to
+# ("Lcom/foo/Bar;->run(I)V", the string itself, ...) before hashing. A
+# top-level class's hash also covers its nested classes, since they end up in
+# the same .java file.
+
+# per opcode: (length in 16-bit units, kind of index operand or None)
+#   s/S string (16/32 bit), t type, f field, m method, p proto, c call site,
+#   h method handle, mp method + proto (invoke-polymorphic)
+_OP_UNITS = [1] * 256
+_OP_INDEX: list[str | None] = [None] * 256
+
+
+def _ops(first: int, last: int, units: int, kind: str | None = None):
+    for op in range(first, last + 1):
+        _OP_UNITS[op] = units
+        _OP_INDEX[op] = kind
+
+
+for _first, _last, _units, _kind in (
+    (0x02, 0x02, 2, None), (0x03, 0x03, 3, None), (0x05, 0x05, 2, None), (0x06, 0x06, 3, None),
+    (0x08, 0x08, 2, None), (0x09, 0x09, 3, None), (0x13, 0x13, 2, None), (0x14, 0x14, 3, None),
+    (0x15, 0x16, 2, None), (0x17, 0x17, 3, None), (0x18, 0x18, 5, None), (0x19, 0x19, 2, None),
+    (0x1A, 0x1A, 2, "s"), (0x1B, 0x1B, 3, "S"), (0x1C, 0x1C, 2, "t"), (0x1F, 0x20, 2, "t"),
+    (0x22, 0x23, 2, "t"), (0x24, 0x25, 3, "t"), (0x26, 0x26, 3, None), (0x29, 0x29, 2, None),
+    (0x2A, 0x2C, 3, None), (0x2D, 0x3D, 2, None), (0x44, 0x51, 2, None), (0x52, 0x6D, 2, "f"),
+    (0x6E, 0x72, 3, "m"), (0x74, 0x78, 3, "m"), (0x90, 0xAF, 2, None), (0xD0, 0xE2, 2, None),
+    (0xFA, 0xFB, 4, "mp"), (0xFC, 0xFD, 3, "c"), (0xFE, 0xFE, 2, "h"), (0xFF, 0xFF, 2, "p"),
+):
+    _ops(_first, _last, _units, _kind)
+
+# map_list item types
+_TYPE_CALL_SITE_ID = 0x0007
+_TYPE_METHOD_HANDLE = 0x0008
+
+
+def read_sleb128(data, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        shift += 7
+        if b < 0x80:
+            if b & 0x40:
+                result -= 1 << shift
+            return result, pos
+
+
+class DexHasher:
+    def __init__(self, dex: DexFile):
+        self.dex = dex
+        self.data = dex.data
+        self.sections = self._map_list()
+
+    def _u16(self, off: int) -> int:
+        return struct.unpack_from("<H", self.data, off)[0]
+
+    def _u32(self, off: int) -> int:
+        return struct.unpack_from("<I", self.data, off)[0]
+
+    def _map_list(self) -> dict[int, tuple[int, int]]:
+        out = {}
+        if not self.dex.map_off:
+            return out
+        n = self._u32(self.dex.map_off)
+        for i in range(n):
+            item_type, _unused, size, off = struct.unpack_from("<HHII", self.data, self.dex.map_off + 4 + i * 12)
+            out[item_type] = (size, off)
+        return out
+
+    # --- index -> name ---
+    def type_list(self, off: int) -> list[str]:
+        if not off:
+            return []
+        n = self._u32(off)
+        return [self.dex.type_name(self._u16(off + 4 + i * 2)) for i in range(n)]
+
+    def proto(self, idx: int) -> str:
+        _shorty, ret_idx, params_off = struct.unpack_from("<III", self.data, self.dex.proto_ids_off + idx * 12)
+        return f"({''.join(self.type_list(params_off))}){self.dex.type_name(ret_idx)}"
+
+    def field(self, idx: int) -> str:
+        cls, typ, name = struct.unpack_from("<HHI", self.data, self.dex.field_ids_off + idx * 8)
+        return f"{self.dex.type_name(cls)}->{self.dex.string(name)}:{self.dex.type_name(typ)}"
+
+    def method(self, idx: int) -> str:
+        cls, proto, name = struct.unpack_from("<HHI", self.data, self.dex.method_ids_off + idx * 8)
+        return f"{self.dex.type_name(cls)}->{self.dex.string(name)}{self.proto(proto)}"
+
+    def method_handle(self, idx: int) -> str:
+        _size, off = self.sections.get(_TYPE_METHOD_HANDLE, (0, 0))
+        kind, _unused, target = struct.unpack_from("<HHH", self.data, off + idx * 8)
+        # kinds 0-3 are field accessors, the rest invoke methods
+        return f"mh{kind}:{self.field(target) if kind <= 3 else self.method(target)}"
+
+    def call_site(self, idx: int) -> str:
+        _size, off = self.sections.get(_TYPE_CALL_SITE_ID, (0, 0))
+        out: list[str] = []
+        self._encoded_array(self._u32(off + idx * 4), out)
+        return "cs:" + "|".join(out)
+
+    def resolve(self, kind: str, idx: int) -> str:
+        if kind in ("s", "S"):
+            return self.dex.string(idx)
+        if kind == "t":
+            return self.dex.type_name(idx) or ""
+        if kind == "f":
+            return self.field(idx)
+        if kind == "m":
+            return self.method(idx)
+        if kind == "p":
+            return self.proto(idx)
+        if kind == "h":
+            return self.method_handle(idx)
+        return self.call_site(idx)
+
+    # --- encoded values (static values, annotations, call sites) ---
+    _VALUE_INDEX = {0x15: "p", 0x16: "h", 0x17: "s", 0x18: "t", 0x19: "f", 0x1A: "m", 0x1B: "f"}
+
+    def _encoded_value(self, pos: int, out: list) -> int:
+        b = self.data[pos]
+        pos += 1
+        vt, arg = b & 0x1F, b >> 5
+        if vt == 0x1C:
+            return self._encoded_array(pos, out)
+        if vt == 0x1D:
+            return self._encoded_annotation(pos, out)
+        if vt in (0x1E, 0x1F):  # null, boolean: value is in arg
+            out.append(f"{vt}:{arg}")
+            return pos
+        raw = self.data[pos:pos + arg + 1]
+        kind = self._VALUE_INDEX.get(vt)
+        out.append(f"{vt}:{self.resolve(kind, int.from_bytes(raw, 'little')) if kind else raw.hex()}")
+        return pos + arg + 1
+
+    def _encoded_array(self, pos: int, out: list) -> int:
+        n, pos = read_uleb128(self.data, pos)
+        out.append(f"[{n}")
+        for _ in range(n):
+            pos = self._encoded_value(pos, out)
+        return pos
+
+    def _encoded_annotation(self, pos: int, out: list) -> int:
+        type_idx, pos = read_uleb128(self.data, pos)
+        n, pos = read_uleb128(self.data, pos)
+        out.append(f"@{self.dex.type_name(type_idx)}/{n}")
+        for _ in range(n):
+            name_idx, pos = read_uleb128(self.data, pos)
+            out.append(self.dex.string(name_idx))
+            pos = self._encoded_value(pos, out)
+        return pos
+
+    def _annotation_set(self, off: int, out: list):
+        if not off:
+            return
+        n = self._u32(off)
+        for i in range(n):
+            item = self._u32(off + 4 + i * 4)
+            out.append(f"v{self.data[item]}")
+            self._encoded_annotation(item + 1, out)
+
+    def _annotations(self, off: int, out: list):
+        if not off:
+            return
+        class_off, n_fields, n_methods, n_params = struct.unpack_from("<IIII", self.data, off)
+        self._annotation_set(class_off, out)
+        pos = off + 16
+        for _ in range(n_fields):
+            idx, set_off = struct.unpack_from("<II", self.data, pos)
+            out.append(self.field(idx))
+            self._annotation_set(set_off, out)
+            pos += 8
+        for _ in range(n_methods):
+            idx, set_off = struct.unpack_from("<II", self.data, pos)
+            out.append(self.method(idx))
+            self._annotation_set(set_off, out)
+            pos += 8
+        for _ in range(n_params):
+            idx, ref_list = struct.unpack_from("<II", self.data, pos)
+            out.append("params:" + self.method(idx))
+            for i in range(self._u32(ref_list)):
+                self._annotation_set(self._u32(ref_list + 4 + i * 4), out)
+            pos += 8
+
+    # --- code ---
+    def _debug_info(self, off: int, out: list):
+        data = self.data
+        line_start, pos = read_uleb128(data, off)
+        n_params, pos = read_uleb128(data, pos)
+        names = []
+        for _ in range(n_params):
+            p1, pos = read_uleb128(data, pos)
+            names.append(self.dex.string(p1 - 1) if p1 else "")
+        out.append(f"dbg{line_start}:{','.join(names)}")
+        while True:
+            op = data[pos]
+            pos += 1
+            if op == 0x00:
+                return
+            if op in (0x01, 0x05, 0x06):
+                v, pos = read_uleb128(data, pos)
+                out.append(f"{op}:{v}")
+            elif op == 0x02:
+                v, pos = read_sleb128(data, pos)
+                out.append(f"{op}:{v}")
+            elif op in (0x03, 0x04):
+                reg, pos = read_uleb128(data, pos)
+                refs = []
+                for kind in ("s", "t", "s")[:2 if op == 0x03 else 3]:
+                    p1, pos = read_uleb128(data, pos)
+                    refs.append(self.resolve(kind, p1 - 1) if p1 else "")
+                out.append(f"{op}:{reg}:{':'.join(refs)}")
+            elif op == 0x09:
+                p1, pos = read_uleb128(data, pos)
+                out.append(f"file:{self.dex.string(p1 - 1) if p1 else ''}")
+            else:
+                out.append(str(op))  # prologue/epilogue/special opcodes: no operands
+
+    def _code(self, off: int, h):
+        data = self.data
+        regs, ins, outs, tries, debug_off, n = struct.unpack_from("<HHHHII", data, off)
+        start = off + 16
+        units = array("H", data[start:start + n * 2])
+        if sys.byteorder != "little":
+            units.byteswap()
+        refs = []
+        i = 0
+        while i < n:
+            u = units[i]
+            op = u & 0xFF
+            if op == 0 and u >> 8:
+                # switch / array payloads (no indices inside)
+                if u == 0x0100:
+                    i += units[i + 1] * 2 + 4
+                elif u == 0x0200:
+                    i += units[i + 1] * 4 + 2
+                elif u == 0x0300:
+                    width = units[i + 1]
+                    size = units[i + 2] | (units[i + 3] << 16)
+                    i += (size * width + 1) // 2 + 4
+                else:
+                    i += 1
+                continue
+            kind = _OP_INDEX[op]
+            if kind is not None:
+                if kind == "S":
+                    refs.append(self.resolve("s", units[i + 1] | (units[i + 2] << 16)))
+                    units[i + 1] = units[i + 2] = 0
+                elif kind == "mp":
+                    refs.append(self.method(units[i + 1]) + self.proto(units[i + 3]))
+                    units[i + 1] = units[i + 3] = 0
+                else:
+                    refs.append(self.resolve(kind, units[i + 1]))
+                    units[i + 1] = 0
+            i += _OP_UNITS[op]
+
+        h.update(struct.pack("<HHHHI", regs, ins, outs, tries, n))
+        h.update(units.tobytes())
+        out = refs  # handlers and debug info are appended as text too
+        if tries:
+            pos = start + n * 2 + (2 if n % 2 else 0)
+            h.update(data[pos:pos + tries * 8])
+            pos += tries * 8
+            n_handlers, pos = read_uleb128(data, pos)
+            for _ in range(n_handlers):
+                size, pos = read_sleb128(data, pos)
+                out.append(f"catch{size}")
+                for _ in range(abs(size)):
+                    type_idx, pos = read_uleb128(data, pos)
+                    addr, pos = read_uleb128(data, pos)
+                    out.append(f"{self.dex.type_name(type_idx)}@{addr}")
+                if size <= 0:
+                    addr, pos = read_uleb128(data, pos)
+                    out.append(f"all@{addr}")
+        if debug_off:
+            self._debug_info(debug_off, out)
+        h.update("\0".join(out).encode("utf-8", "surrogatepass"))
+
+    def class_hash(self, index: int) -> tuple[str, str]:
+        # (class name, sha256 hex) of the index-th class_def
+        (class_idx, flags, super_idx, ifaces_off, source_idx, annotations_off,
+         class_data_off, static_values_off) = CLASS_DEF.unpack_from(self.data, self.dex.class_defs_off + index * CLASS_DEF.size)
+        desc = self.dex.type_name(class_idx)
+        h = hashlib.sha256()
+        head = [desc, str(flags), self.dex.type_name(super_idx) or "", ",".join(self.type_list(ifaces_off)),
+                "" if source_idx == NO_INDEX else self.dex.string(source_idx)]
+        self._annotations(annotations_off, head)
+        if static_values_off:
+            self._encoded_array(static_values_off, head)
+        h.update("\0".join(head).encode("utf-8", "surrogatepass"))
+
+        if class_data_off:
+            data = self.data
+            pos = class_data_off
+            counts = []
+            for _ in range(4):
+                v, pos = read_uleb128(data, pos)
+                counts.append(v)
+            for group in range(4):
+                idx = 0
+                for _ in range(counts[group]):
+                    diff, pos = read_uleb128(data, pos)
+                    acc, pos = read_uleb128(data, pos)
+                    idx += diff
+                    if group < 2:
+                        h.update(f"\1{self.field(idx)}:{acc}".encode("utf-8", "surrogatepass"))
+                        continue
+                    code_off, pos = read_uleb128(data, pos)
+                    h.update(f"\2{self.method(idx)}:{acc}".encode("utf-8", "surrogatepass"))
+                    if code_off:
+                        self._code(code_off, h)
+        return descriptor_to_name(desc), h.hexdigest()
+
+
+def apk_class_hashes(apk_path: str) -> dict[str, dict]:
+    # {top-level class name: {"path": sources-relative .java path, "hash": hex}}
+    per_class: dict[str, str] = {}
+    with zipfile.ZipFile(apk_path) as z:
+        for dex_name in dex_names(z):
+            dex = DexFile(z.read(dex_name), dex_name)
+            hasher = DexHasher(dex)
+            for i in range(dex.class_defs_size):
+                name, digest = hasher.class_hash(i)
+                per_class.setdefault(name, digest)  # first definition wins, as at runtime
+
+    out = {}
+    for top, members in group_top_level(per_class).items():
+        h = hashlib.sha256()
+        for name in members:
+            h.update(f"{name}\0{per_class[name]}\0".encode("utf-8", "surrogatepass"))
+        out[top] = {"path": source_path(top), "hash": h.hexdigest()}
+    return out
+
+
+# -------------------------
+# BALANCED CLASS GROUPS (multi-dex fan-out)
+# -------------------------
+def code_units(dex: DexFile, class_data_off: int) -> int:
+    # total instruction size (16-bit units) of a class's methods
+    if not class_data_off:
+        return 0
+    data = dex.data
+    pos = class_data_off
+    counts = []
+    for _ in range(4):
+        v, pos = read_uleb128(data, pos)
+        counts.append(v)
+    units = 0
+    for group in range(4):
+        for _ in range(counts[group]):
+            _, pos = read_uleb128(data, pos)  # index diff
+            _, pos = read_uleb128(data, pos)  # access flags
+            if group >= 2:
+                code_off, pos = read_uleb128(data, pos)
+                if code_off:
+                    units += struct.unpack_from("<I", data, code_off + 12)[0]  # insns_size
+    return units
+
+
+def split_classes(apk_path: str, parts: int) -> list[list[str]]:
+    # top-level class names in up to `parts` groups of about equal code size:
+    # largest class first, always into the lightest group
+    weights: dict[str, int] = {}
+    with zipfile.ZipFile(apk_path) as z:
+        for dex_name in dex_names(z):
+            dex = DexFile(z.read(dex_name), dex_name)
+            for desc, _flags, _super, _source, data_off in dex.class_defs():
+                name = descriptor_to_name(desc)
+                if name not in weights:
+                    weights[name] = 1 + code_units(dex, data_off)  # empty classes still cost a file
+
+    tops = {top: sum(weights[n] for n in members) for top, members in group_top_level(weights).items()}
+    groups: list[list[str]] = [[] for _ in range(max(1, parts))]
+    loads = [(0, i) for i in range(len(groups))]
+    for top, weight in sorted(tops.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, i = heapq.heappop(loads)
+        groups[i].append(top)
+        heapq.heappush(loads, (load + weight, i))
+    return [sorted(g) for g in groups if g]
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# -------------------------
+# PARALLEL / RESUMABLE APK DOWNLOADER
+# -------------------------
+# <dest>.part       data being downloaded (preallocated to the full size when ranged)
+# <dest>.part.json  segment progress, so a later call (or a restarted process)
+#                   continues where the previous one stopped
+#
+# Servers without Range support get a single streamed GET (not resumable).
+# Neither are files without an ETag or Last-Modified: with nothing to send as
+# If-Range, a leftover .part starts over instead of being mixed with a newer file.
+
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    s = requests.Session()
+    retry = Retry(total=3, connect=3, read=0, backoff_factor=0.5, allowed_methods=["GET", "HEAD"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+class ApkDownloader:
+    def __init__(self, session: requests.Session, segments: int = 4, min_segment_bytes: int = 8 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024, retries: int = 5, timeout=(20, 300)):
+        self.session = session
+        self.segments = max(1, segments)
+        self.min_segment_bytes = min_segment_bytes
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+
+    # ---- state file ----
+    def _load_state(self, dest: str) -> dict | None:
+        try:
+            with open(dest + ".part.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, dest: str, state: dict):
+        tmp = dest + ".part.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, dest + ".part.json")
+
+    def _clear_state(self, dest: str):
+        for p in (dest + ".part.json", dest + ".part.json.tmp"):
+            if os.path.exists(p):
+                os.remove(p)
+
+    # ---- probe ----
+    def _probe(self, url: str) -> tuple[requests.Response, int | None]:
+        r = self.session.get(url, headers={"Range": "bytes=0-0"}, stream=True,
+                             timeout=self.timeout, allow_redirects=True)
+        if r.status_code == 206:
+            content_range = r.headers.get("Content-Range", "")
+            total = content_range.rpartition("/")[2]
+            r.close()
+            if total.isdigit():
+                return r, int(total)
+            raise DownloadError(f"Download failed. bad Content-Range={content_range!r}")
+        if r.status_code != 200:
+            r.close()
+            raise DownloadError(f"Download failed. status={r.status_code}")
+        return r, None
+
+    def download(self, url: str, dest: str, progress=None) -> dict:
+        t0 = time.time()
+        r, total = self._probe(url)
+
+        if total is None:
+            done = self._stream_single(r, dest, progress)
+            return self._result(done, t0, segments=1, ranged=False, resumed=0)
+
+        validator = r.headers.get("ETag") or r.headers.get("Last-Modified")
+        state = self._load_state(dest)
+        if (
+            state is None
+            or validator is None
+            or state.get("url") != url
+            or state.get("total") != total
+            or state.get("validator") != validator
+            or not os.path.exists(dest + ".part")
+        ):
+            n = max(1, min(self.segments, -(-total // self.min_segment_bytes)))
+            step = -(-total // n)
+            state = {
+                "url": url,
+                "final_url": r.url,
+                "total": total,
+                "validator": validator,
+                "segments": [[s, min(s + step, total) - 1, 0] for s in range(0, total, step)],
+            }
+            with open(dest + ".part", "wb") as f:
+                f.truncate(total)
+            self._save_state(dest, state)
+
+        resumed = sum(seg[2] for seg in state["segments"])
+        self._fetch_segments(state, dest, validator, progress)
+
+        if os.path.getsize(dest + ".part") != total:
+            raise DownloadError("Download failed. size mismatch")
+        os.replace(dest + ".part", dest)
+        self._clear_state(dest)
+        return self._result(total - resumed, t0, segments=len(state["segments"]), ranged=True,
+                            resumed=resumed, total=total)
+
+    def _result(self, fetched: int, t0: float, segments: int, ranged: bool, resumed: int, total: int | None = None) -> dict:
+        sec = max(time.time() - t0, 1e-6)
+        return {
+            "bytes": total if total is not None else fetched,
+            "fetched_bytes": fetched,
+            "resumed_bytes": resumed,
+            "seconds": round(sec, 3),
+            "mb_per_sec": round(fetched / 1024 / 1024 / sec, 2),
+            "segments": segments,
+            "ranged": ranged,
+        }
+
+    def _stream_single(self, r: requests.Response, dest: str, progress) -> int:
+        done = 0
+        self._clear_state(dest)
+        with r, open(dest + ".part", "wb") as f:
+            for chunk in r.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, None)
+        os.replace(dest + ".part", dest)
+        return done
+
+    def _fetch_segments(self, state: dict, dest: str, validator: str | None, progress):
+        lock = threading.Lock()
+        total = state["total"]
+        fd = os.open(dest + ".part", os.O_WRONLY)
+        last_save = [time.time()]
+
+        def report(force: bool = False):
+            with lock:
+                done = sum(seg[2] for seg in state["segments"])
+                if force or time.time() - last_save[0] > 1.0:
+                    self._save_state(dest, state)
+                    last_save[0] = time.time()
+            if progress:
+                progress(done, total)
+
+        def fetch(seg: list):
+            attempt = 0
+            while seg[0] + seg[2] <= seg[1]:
+                headers = {"Range": f"bytes={seg[0] + seg[2]}-{seg[1]}"}
+                if validator:
+                    headers["If-Range"] = validator
+                got = seg[2]
+                try:
+                    with self.session.get(state["final_url"], headers=headers, stream=True,
+                                          timeout=self.timeout, allow_redirects=True) as r:
+                        if r.status_code != 206:
+                            # 200 here means the file changed under If-Range
+                            raise DownloadError(f"Download failed. range status={r.status_code}")
+                        for chunk in r.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            chunk = chunk[: seg[1] + 1 - (seg[0] + seg[2])]
+                            os.pwrite(fd, chunk, seg[0] + seg[2])
+                            with lock:
+                                seg[2] += len(chunk)
+                            report()
+                    if seg[2] == got:
+                        # an empty 206 would otherwise be asked for again forever
+                        raise requests.RequestException("empty range response")
+                except (requests.RequestException, OSError) as e:
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise DownloadError(f"Download failed after {self.retries} retries: {e}")
+                    time.sleep(min(30, 2 ** attempt * 0.5))
+
+        try:
+            todo = [seg for seg in state["segments"] if seg[0] + seg[2] <= seg[1]]
+            if todo:
+                with ThreadPoolExecutor(max_workers=len(todo), thread_name_prefix="dl") as ex:
+                    for fut in [ex.submit(fetch, seg) for seg in todo]:
+                        fut.result()
+        finally:
+            report(force=True)
+            os.close(fd)
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from collections import deque
+
+# -------------------------
+# IN-PROCESS EVENT FAN-OUT (worker threads -> asyncio subscribers)
+# -------------------------
+# publish() is called from worker/reader threads and never blocks on a
+# subscriber: each subscriber has a bounded buffer, and when a slow consumer
+# lets it fill up the oldest events are dropped and counted so the stream can
+# tell the client to re-sync from /logs.
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_events: int):
+        self.loop = loop
+        self.max_events = max_events
+        self.buf: deque = deque()
+        self.dropped = 0
+        self.event = asyncio.Event()
+        self._lock = threading.Lock()
+        self._notified = False
+
+    def offer(self, ev: tuple[str, object]):
+        with self._lock:
+            if len(self.buf) >= self.max_events:
+                self.buf.popleft()
+                self.dropped += 1
+            self.buf.append(ev)
+            if self._notified:
+                return
+            self._notified = True
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # loop already closed, subscriber is going away
+
+    def take(self) -> tuple[list, int]:
+        with self._lock:
+            items = list(self.buf)
+            self.buf.clear()
+            dropped, self.dropped = self.dropped, 0
+            self._notified = False
+            self.event.clear()
+        return items, dropped
+
+
+class EventHub:
+    def __init__(self, max_events_per_subscriber: int = 5000):
+        self.max_events = max_events_per_subscriber
+        self._subs: dict[str, set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, key: str, loop: asyncio.AbstractEventLoop) -> Subscriber:
+        sub = Subscriber(loop, self.max_events)
+        with self._lock:
+            self._subs.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, key: str, sub: Subscriber):
+        with self._lock:
+            subs = self._subs.get(key)
+            if subs is not None:
+                subs.discard(sub)
+                self.dropped += sub.dropped
+                if not subs:
+                    del self._subs[key]
+
+    def has_subscribers(self, key: str) -> bool:
+        return key in self._subs
+
+    def publish(self, key: str, kind: str, data):
+        subs = self._subs.get(key)
+        if not subs:
+            return
+        with self._lock:
+            subs = list(subs)
+        self.published += 1
+        for sub in subs:
+            sub.offer((kind, data))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "scans": len(self._subs),
+                "subscribers": sum(len(s) for s in self._subs.values()),
+                "published": self.published,
+                "dropped_closed_subscribers": self.dropped,
+            }
@@ -0,0 +1,163 @@
+import os
+import gzip
+import time
+import queue
+import shutil
+import fnmatch
+import tarfile
+import zipfile
+import threading
+from functools import partial
+
+from packstore import STORED_EXTENSIONS, member_mtime
+
+# -------------------------
+# STREAMING EXPORT (zip / tar.gz built while it is being sent)
+# -------------------------
+# A producer thread writes the archive into QueueSink, a write-only file
+# object that hands fixed size chunks to a bounded queue; the HTTP response
+# drains that queue. Nothing is staged on disk and at most
+# QUEUE_CHUNKS * CHUNK_BYTES of archive data is held at once. Source files are
+# copied CHUNK_BYTES at a time. (zip also keeps one small central directory
+# record per member until the end, tar.gz keeps nothing.)
+#
+# Entries are (arcname, size, mtime, opener) tuples.
+
+CHUNK_BYTES = 64 * 1024
+QUEUE_CHUNKS = 8
+ZIP_EPOCH = 315532800  # 1980-01-01, the earliest date a zip entry can carry
+
+_DONE = object()
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class QueueSink:
+    def __init__(self, q: queue.Queue, cancelled: threading.Event, chunk_bytes: int = CHUNK_BYTES):
+        self.q = q
+        self.cancelled = cancelled
+        self.chunk_bytes = chunk_bytes
+        self.buf = bytearray()
+
+    def write(self, data) -> int:
+        self.buf += data
+        if len(self.buf) >= self.chunk_bytes:
+            self.put(bytes(self.buf))
+            self.buf.clear()
+        return len(data)
+
+    def flush(self):
+        pass  # chunks go out when full; the tail is pushed by finish()
+
+    def put(self, item):
+        # blocks while the client is slower than the producer
+        while True:
+            if self.cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                self.q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self):
+        if self.buf:
+            self.put(bytes(self.buf))
+            self.buf.clear()
+        self.put(_DONE)
+
+
+# -------------------------
+# ENTRY SOURCES
+# -------------------------
+def fs_entries(base: str, rel: str = "", skip: tuple[str, ...] = ()):
+    top = os.path.join(base, rel) if rel else base
+    for root, dirs, files in os.walk(top):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            arc = os.path.relpath(full, base).replace(os.sep, "/")
+            if arc in skip or name.endswith((".tmp", ".part")):
+                continue
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            yield arc, st.st_size, st.st_mtime, partial(open, full, "rb")
+
+
+def pack_entries(pack, prefixes: tuple[str, ...]):
+    for info in pack.zf.infolist():
+        if info.is_dir() or info.filename.split("/", 1)[0] not in prefixes:
+            continue
+        yield info.filename, info.file_size, member_mtime(info), partial(pack.open, info.filename)
+
+
+def filter_entries(entries, include: list[str] | None = None, exclude: list[str] | None = None):
+    # shell globs against the archive path ("sources/com/foo/*"); * also matches "/"
+    for e in entries:
+        if include and not any(fnmatch.fnmatchcase(e[0], p) for p in include):
+            continue
+        if exclude and any(fnmatch.fnmatchcase(e[0], p) for p in exclude):
+            continue
+        yield e
+
+
+# -------------------------
+# ARCHIVE WRITERS
+# -------------------------
+def write_zip(entries, sink):
+    # sink has no tell()/seek(): zipfile switches to data descriptors by itself
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for arc, size, mtime, opener in entries:
+            zi = zipfile.ZipInfo(arc, time.localtime(max(mtime, ZIP_EPOCH))[:6])
+            zi.compress_type = zipfile.ZIP_STORED if arc.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            zi.file_size = size  # lets zipfile decide on zip64 up front
+            with opener() as src, zf.open(zi, "w") as dst:
+                shutil.copyfileobj(src, dst, CHUNK_BYTES)
+
+
+def write_tar_gz(entries, sink, level: int = 6):
+    with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=level, mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode="w|", format=tarfile.PAX_FORMAT) as tf:
+            for arc, size, mtime, opener in entries:
+                ti = tarfile.TarInfo(arc)
+                ti.size = size
+                ti.mtime = int(mtime)
+                ti.mode = 0o644
+                with opener() as src:
+                    tf.addfile(ti, src)
+
+
+def stream_archive(write, entries):
+    # generator of archive chunks; closing it (client went away) stops the producer
+    q: queue.Queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    sink = QueueSink(q, cancelled)
+
+    def produce():
+        try:
+            write(entries, sink)
+            sink.finish()
+        except ExportCancelled:
+            pass
+        except Exception as e:
+            try:
+                sink.put(e)
+            except ExportCancelled:
+                pass
+
+    t = threading.Thread(target=produce, daemon=True)
+    t.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
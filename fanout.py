@@ -0,0 +1,106 @@
+import os
+import shutil
+import threading
+
+from jadxpool import WarmWorker
+
+# -------------------------
+# MULTI-DEX FAN-OUT (one JADX process per balanced class group)
+# -------------------------
+# JADX's own threads share one heap and one GC and stop scaling after a few
+# cores. Fan-out splits the APK's top-level classes into groups of about equal
+# code size (dexfile.split_classes) and decompiles each group in its own
+# JadxWorker JVM. The worker's class filter keeps the whole APK loaded in every
+# part, so types from other dex files still resolve. Each part writes to
+# <root>/part-N/, and merge_parts() moves the results into the scan dir.
+# Only part 0 decodes resources (none does when they have their own pass).
+
+
+def part_dir(root: str, part: int) -> str:
+    return os.path.join(root, f"part-{part}")
+
+
+def run_parts(cmd: list[str], apk_path: str, groups: list[list[str]], root: str, threads: int,
+              on_line, timeout_sec: float, start_timeout: float = 120.0, on_started=None,
+              resources: bool = True) -> list[int]:
+    # exit code per part. on_line(part, line) gets every log line; on_started(pids)
+    # is called once all JVMs are up. resources=False: no part decodes resources.
+    # Raises RuntimeError if a JVM does not start or a part times out. The first
+    # part that fails kills the others, their code is then None.
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+    workers: list[WarmWorker] = []
+    try:
+        # the JVMs boot in parallel
+        for part in range(len(groups)):
+            try:
+                workers.append(WarmWorker(part, cmd))
+            except OSError as e:
+                raise RuntimeError(f"JADX worker for part {part} could not be started: {e}")
+        for w in workers:
+            if not w.wait_ready(start_timeout):
+                raise RuntimeError(f"JADX worker for part {w.id} did not start")
+        if on_started is not None:
+            on_started([w.pid for w in workers])
+
+        codes: list[int | None] = [None] * len(groups)
+        errors: list[str] = []
+        failed = threading.Lock()
+
+        def fail(part: int) -> bool:
+            # True for the first failing part, which stops all the others
+            if not failed.acquire(blocking=False):
+                return False
+            for w in workers:
+                if w.id != part:
+                    w.kill()
+            return True
+
+        def run(part: int):
+            class_list = os.path.join(root, f"part-{part}.classes")
+            with open(class_list, "w", encoding="utf-8") as f:
+                f.write("".join(n + "\n" for n in groups[part]))
+            try:
+                code = workers[part].run(part_dir(root, part), apk_path, threads,
+                                         lambda line: on_line(part, line), timeout_sec,
+                                         class_list=class_list, skip_resources=part > 0 or not resources)
+            except RuntimeError as e:
+                if fail(part):
+                    errors.append(f"part {part}: {e}")
+                return
+            if code == 0 or fail(part):
+                codes[part] = code
+
+        runners = [threading.Thread(target=run, args=(part,), daemon=True) for part in range(len(groups))]
+        for t in runners:
+            t.start()
+        for t in runners:
+            t.join()
+        if errors:
+            raise RuntimeError(errors[0])
+        return codes
+    finally:
+        for w in workers:
+            w.stop()
+
+
+def merge_parts(root: str, dest_dir: str, parts: int) -> dict:
+    # move part-N/{sources,resources}/... into dest_dir; on a path clash the
+    # lower part wins (two classes JADX would have renamed apart in one run)
+    files = 0
+    conflicts: list[str] = []
+    for part in range(parts):
+        src_root = part_dir(root, part)
+        for cur, _dirs, names in os.walk(src_root):
+            rel_dir = os.path.relpath(cur, src_root)
+            target_dir = dest_dir if rel_dir == "." else os.path.join(dest_dir, rel_dir)
+            os.makedirs(target_dir, exist_ok=True)
+            for name in names:
+                target = os.path.join(target_dir, name)
+                if os.path.exists(target):
+                    conflicts.append(os.path.relpath(target, dest_dir))
+                    continue
+                os.replace(os.path.join(cur, name), target)
+                files += 1
+    shutil.rmtree(root, ignore_errors=True)
+    return {"files": files, "conflicts": conflicts}
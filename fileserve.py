@@ -0,0 +1,122 @@
+import os
+import mimetypes
+from email.utils import formatdate
+
+import anyio
+from starlette.responses import Response
+
+# -------------------------
+# RAW FILE SERVING: Range / ETag / If-None-Match
+# -------------------------
+# The body is streamed in CHUNK_SIZE reads from a worker thread, never loaded
+# whole. There is no sendfile path: ASGI apps never see the socket, and
+# uvicorn does not implement the "http.response.zerocopy" extension. Put a
+# proxy with X-Accel-Redirect / sendfile in front if that is needed.
+
+CHUNK_SIZE = 256 * 1024
+TEXT_EXTENSIONS = {".java", ".kt", ".smali", ".xml", ".json", ".txt", ".properties", ".log", ".html", ".css", ".js", ".md"}
+
+
+def guess_media_type(name: str) -> str:
+    ext = os.path.splitext(name)[1].lower()
+    if ext in TEXT_EXTENSIONS:
+        return "text/plain; charset=utf-8"
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def make_etag(size: int, mtime_ns: int, salt: str = "") -> str:
+    return f'"{size:x}-{mtime_ns:x}{salt}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None | bool:
+    # (start, end) inclusive, None = serve everything, False = unsatisfiable
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None  # multipart/byteranges not supported: full response is allowed
+    start_s, _, end_s = spec.partition("-")
+    # plain ASCII digits only: int() would also take signs, spaces and "1_0"
+    if not all(s == "" or (s.isascii() and s.isdigit()) for s in (start_s, end_s)):
+        return None
+    if start_s == "":
+        if end_s == "":
+            return None
+        suffix = int(end_s)
+        if suffix <= 0:
+            return False
+        return max(0, size - suffix), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    def __init__(self, opener, offset: int, count: int, status_code: int, headers: dict, media_type: str):
+        self.opener = opener
+        self.offset = offset
+        self.count = count
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        f = await anyio.to_thread.run_sync(self.opener)
+        try:
+            if self.offset:
+                await anyio.to_thread.run_sync(f.seek, self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await anyio.to_thread.run_sync(f.close)
+
+
+def serve_file(request_headers, name: str, size: int, etag: str, mtime: float, opener) -> Response:
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+    }
+    media_type = guess_media_type(name)
+
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    rng = parse_range(request_headers.get("range"), size)
+    if_range = request_headers.get("if-range")
+    if rng and if_range and if_range.strip() != etag:
+        rng = None  # representation changed since the client's partial copy
+
+    if rng is False:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if rng is None:
+        headers["Content-Length"] = str(size)
+        return RangeFileResponse(opener, 0, size, 200, headers, media_type)
+
+    start, end = rng
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(opener, start, end - start + 1, 206, headers, media_type)
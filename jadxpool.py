@@ -0,0 +1,261 @@
+import time
+import queue
+import threading
+import subprocess
+from collections import deque
+
+from procprofile import tree_rss_bytes
+
+# -------------------------
+# WARM JADX WORKER POOL
+# -------------------------
+# Long-running JVMs (jvm/JadxWorker.java) that decompile one APK at a time,
+# so a job skips JVM startup, class loading and JIT warm-up. Jobs go over the
+# worker's stdin/stdout (see the protocol in JadxWorker.java). Every other line
+# the worker prints is JADX's log output for the job it is running.
+#
+# Health: an idle worker is pinged before it gets a job. A worker that died,
+# failed the ping, ran max_jobs jobs or grew past max_rss_mb is retired, and a
+# fresh one is started in the background.
+
+PREFIX = "@@jadx-worker "
+_EOF = None
+
+
+class JadxWorkerUnavailable(RuntimeError):
+    pass
+
+
+class WarmWorker:
+    def __init__(self, worker_id: int, cmd: list[str], env: dict | None = None):
+        self.id = worker_id
+        self.cmd = cmd
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env,
+        )
+        self.pid = self.proc.pid
+        self.lines: queue.Queue = queue.Queue()
+        self.started_at = time.time()
+        self.jobs = 0
+        self.version = None
+        self.eof = False
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        try:
+            assert self.proc.stdout is not None
+            for line in self.proc.stdout:
+                self.lines.put(line)
+        except Exception:
+            pass
+        self.lines.put(_EOF)
+
+    def alive(self) -> bool:
+        return not self.eof and self.proc.poll() is None
+
+    def _send(self, line: str) -> bool:
+        try:
+            assert self.proc.stdin is not None
+            self.proc.stdin.write(line + "\n")
+            self.proc.stdin.flush()
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _expect(self, reply: str, timeout: float, on_line=None) -> str | None:
+        # next protocol line starting with `reply`; other lines go to on_line
+        deadline = time.monotonic() + timeout
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            try:
+                line = self.lines.get(timeout=left)
+            except queue.Empty:
+                return None
+            if line is _EOF:
+                self.eof = True
+                return None
+            if line.startswith(PREFIX + reply):
+                return line[len(PREFIX):].strip()
+            if on_line is not None and not line.startswith(PREFIX):
+                on_line(line)
+
+    def wait_ready(self, timeout: float) -> bool:
+        msg = self._expect("ready", timeout)
+        if msg is None:
+            return False
+        self.version = msg.partition(" ")[2] or None
+        return True
+
+    def ping(self, timeout: float = 5.0) -> bool:
+        return self.alive() and self._send("ping") and self._expect("pong", timeout) is not None
+
+    def rss_mb(self) -> float:
+        return tree_rss_bytes(self.pid) / 1024 / 1024
+
+    def run(self, output_dir: str, apk_path: str, threads: int, on_line, timeout_sec: float,
+            class_list: str | None = None, skip_resources: bool = False) -> int:
+        # exit code of the job; a worker that dies mid-job reports its own exit code.
+        # class_list: file of top-level class names, only those are decompiled
+        self.jobs += 1
+        cmd = f"run\t{output_dir}\t{apk_path}\t{threads}"
+        if class_list or skip_resources:
+            cmd += f"\t{class_list or ''}\t{'1' if skip_resources else '0'}"
+        if not self._send(cmd):
+            return self.proc.wait()
+        msg = self._expect("done", timeout_sec, on_line)
+        if msg is not None:
+            return int(msg.split()[1])
+        if not self.eof:
+            self.kill()
+            raise RuntimeError("JADX timed out")
+        # the JVM exited mid-job (OutOfMemoryError etc.); its last words went to on_line
+        return self.proc.wait()
+
+    def stop(self, timeout: float = 10.0):
+        if self.alive():
+            self._send("quit")
+            try:
+                self.proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.kill()
+
+    def kill(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=10)
+        except Exception:
+            pass
+
+
+class JadxPool:
+    def __init__(self, size: int, cmd: list[str], env: dict | None = None, max_jobs: int = 50,
+                 max_rss_mb: int = 0, start_timeout: float = 120.0):
+        self.size = max(1, size)
+        self.cmd = cmd
+        self.env = env
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.start_timeout = start_timeout
+        self.cond = threading.Condition()
+        self.idle: deque[WarmWorker] = deque()
+        self.busy: dict[int, WarmWorker] = {}
+        self.starting = 0
+        self.next_id = 0
+        self.closed = False
+        self.counters = {"started": 0, "start_failures": 0, "recycled": 0, "jobs": 0, "ping_failures": 0}
+        self.last_error: str | None = None
+
+    def start(self):
+        for _ in range(self.size):
+            self._spawn()
+        return self
+
+    def _spawn(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.starting += 1
+            self.next_id += 1
+            worker_id = self.next_id
+        threading.Thread(target=self._start_worker, args=(worker_id,), daemon=True).start()
+
+    def _start_worker(self, worker_id: int):
+        worker = None
+        try:
+            worker = WarmWorker(worker_id, self.cmd, self.env)
+            ok = worker.wait_ready(self.start_timeout)
+            if not ok:
+                self.last_error = f"worker did not report ready within {self.start_timeout}s"
+        except OSError as e:
+            ok = False
+            self.last_error = str(e)
+        with self.cond:
+            self.starting -= 1
+            if ok and not self.closed:
+                self.counters["started"] += 1
+                self.idle.append(worker)
+                self.cond.notify()
+                return
+            if not ok:
+                self.counters["start_failures"] += 1
+        if worker is not None:
+            worker.kill()
+
+    def acquire(self, timeout: float = 0.0) -> WarmWorker | None:
+        # a healthy idle worker, or None (caller falls back to a cold JADX run)
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.cond:
+                while not self.idle:
+                    left = deadline - time.monotonic()
+                    if self.closed or left <= 0 or (not self.starting and not self.busy):
+                        return None
+                    self.cond.wait(left)
+                worker = self.idle.popleft()
+                self.busy[worker.id] = worker
+            if worker.ping():
+                return worker
+            with self.cond:
+                self.counters["ping_failures"] += 1
+            self._retire(worker)
+
+    def release(self, worker: WarmWorker):
+        with self.cond:
+            self.counters["jobs"] += 1
+        if (not worker.alive()
+                or (self.max_jobs and worker.jobs >= self.max_jobs)
+                or (self.max_rss_mb and worker.rss_mb() > self.max_rss_mb)):
+            self._retire(worker)
+            return
+        with self.cond:
+            self.busy.pop(worker.id, None)
+            if self.closed:
+                worker.stop()
+                return
+            self.idle.append(worker)
+            self.cond.notify()
+
+    def _retire(self, worker: WarmWorker):
+        with self.cond:
+            self.busy.pop(worker.id, None)
+            self.counters["recycled"] += 1
+        threading.Thread(target=worker.stop, daemon=True).start()
+        self._spawn()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            workers = list(self.idle)
+            self.idle.clear()
+            self.cond.notify_all()
+        for w in workers:
+            w.stop()
+
+    def stats(self) -> dict:
+        with self.cond:
+            idle = list(self.idle)
+            busy = list(self.busy.values())
+            out = {
+                "size": self.size,
+                "idle": len(idle),
+                "busy": len(busy),
+                "starting": self.starting,
+                "max_jobs": self.max_jobs,
+                "max_rss_mb": self.max_rss_mb,
+                **self.counters,
+                "last_error": self.last_error,
+            }
+        out["workers"] = [
+            {"id": w.id, "pid": w.pid, "jobs": w.jobs, "busy": w in busy, "version": w.version,
+             "uptime_sec": round(time.time() - w.started_at, 1)}
+            for w in idle + busy
+        ]
+        return out
@@ -0,0 +1,151 @@
+import sys
+import json
+import threading
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+
+# -------------------------
+# BOUNDED IN-MEMORY JOB TABLE
+# -------------------------
+# Drop-in for the old JOBS dict. Entries are kept in LRU order; when the table
+# is over max_entries or max_bytes, finished jobs (least recently used first)
+# are dropped. Jobs that are queued, running, or pinned by their worker are
+# never evicted. Evicted jobs are still on disk (meta.json + jadx.log), so
+# callers fall back to that.
+#
+# Sizes are measured when an entry is set or unpinned and summed into a running
+# total, so enforce() does not walk the table. A running job grows in place
+# (its log deque) and is re-measured when its worker unpins it; until then it
+# cannot be evicted anyway.
+
+FINISHED_STATUSES = ("done", "error")
+
+
+def estimate_job_bytes(job: dict) -> int:
+    # rough resident size: the log deque dominates, the rest is measured by its JSON size
+    n = sys.getsizeof(job)
+    for k, v in job.items():
+        n += sys.getsizeof(k)
+        if isinstance(v, deque):
+            n += sys.getsizeof(v) + sum(sys.getsizeof(x) for x in v)
+        else:
+            try:
+                n += len(json.dumps(v, default=str))
+            except (TypeError, ValueError):
+                n += sys.getsizeof(v)
+    return n
+
+
+class JobTable(MutableMapping):
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.jobs: OrderedDict[str, dict] = OrderedDict()
+        self.pinned: dict[str, int] = {}
+        self.sizes: dict[str, int] = {}
+        self.bytes = 0
+        self.evictions = 0
+
+    def __getitem__(self, scan_id: str) -> dict:
+        with self.lock:
+            job = self.jobs[scan_id]
+            self.jobs.move_to_end(scan_id)
+            return job
+
+    def __setitem__(self, scan_id: str, job: dict):
+        with self.lock:
+            self.jobs[scan_id] = job
+            self.jobs.move_to_end(scan_id)
+            self._measure(scan_id)
+            self.enforce()
+
+    def __delitem__(self, scan_id: str):
+        with self.lock:
+            del self.jobs[scan_id]
+            self.bytes -= self.sizes.pop(scan_id, 0)
+
+    def __contains__(self, scan_id) -> bool:
+        with self.lock:
+            return scan_id in self.jobs
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.jobs))
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def peek(self, scan_id: str) -> dict | None:
+        # no lock and no LRU refresh, for hot paths like push_log
+        return self.jobs.get(scan_id)
+
+    def values(self):
+        # snapshot, does not refresh LRU order
+        with self.lock:
+            return list(self.jobs.values())
+
+    def items(self):
+        with self.lock:
+            return list(self.jobs.items())
+
+    # a worker pins its job while it still writes into the entry
+    def pin(self, scan_id: str):
+        with self.lock:
+            self.pinned[scan_id] = self.pinned.get(scan_id, 0) + 1
+
+    def unpin(self, scan_id: str):
+        with self.lock:
+            left = self.pinned.get(scan_id, 0) - 1
+            if left > 0:
+                self.pinned[scan_id] = left
+            else:
+                self.pinned.pop(scan_id, None)
+            if scan_id in self.jobs:
+                self._measure(scan_id)
+            self.enforce()
+
+    def _evictable(self, scan_id: str, job: dict) -> bool:
+        return scan_id not in self.pinned and job.get("status") in FINISHED_STATUSES
+
+    def _measure(self, scan_id: str):
+        size = estimate_job_bytes(self.jobs[scan_id])
+        self.bytes += size - self.sizes.get(scan_id, 0)
+        self.sizes[scan_id] = size
+
+    def total_bytes(self) -> int:
+        return self.bytes
+
+    def enforce(self) -> int:
+        removed = 0
+        with self.lock:
+            over_count = len(self.jobs) - self.max_entries if self.max_entries > 0 else 0
+            over_bytes = self.total_bytes() - self.max_bytes if self.max_bytes > 0 else 0
+            if over_count <= 0 and over_bytes <= 0:
+                return 0
+            for scan_id, job in list(self.jobs.items()):  # oldest first
+                if over_count <= 0 and over_bytes <= 0:
+                    break
+                if not self._evictable(scan_id, job):
+                    continue
+                size = self.sizes.pop(scan_id, 0)
+                over_bytes -= size
+                over_count -= 1
+                del self.jobs[scan_id]
+                self.bytes -= size
+                removed += 1
+            self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self.lock:
+            finished = sum(1 for k, v in self.jobs.items() if self._evictable(k, v))
+            return {
+                "entries": len(self.jobs),
+                "finished_entries": finished,
+                "active_entries": len(self.jobs) - finished,
+                "est_bytes": self.total_bytes(),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
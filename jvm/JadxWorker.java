@@ -0,0 +1,101 @@
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.InputStreamReader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.util.Collections;
+import java.util.HashSet;
+import java.util.Set;
+
+import org.slf4j.LoggerFactory;
+
+import ch.qos.logback.classic.Level;
+import ch.qos.logback.classic.Logger;
+
+import jadx.api.JadxArgs;
+import jadx.api.JadxDecompiler;
+
+/**
+ * Long-running JADX worker for the warm pool (jadxpool.py).
+ *
+ * Reads one command per line on stdin, writes JADX's log and protocol lines
+ * on stdout. Protocol lines start with "@@jadx-worker ":
+ *
+ *   ping                        -> @@jadx-worker pong
+ *   run TAB outdir TAB apk TAB threads [TAB classes_file [TAB skip_res]]
+ *                               -> (log lines) @@jadx-worker done EXIT_CODE ERROR_COUNT
+ *   quit                        -> exits
+ *
+ * classes_file (optional, "" for none) lists the top-level classes to
+ * decompile, one full name per line; skip_res "1" skips resource decoding.
+ * Incremental scans use both to redo only what changed since their baseline.
+ *
+ * Build: javac -cp "/opt/jadx/lib/*" -d /opt/jadx-worker jvm/JadxWorker.java
+ */
+public final class JadxWorker {
+    private static final String PREFIX = "@@jadx-worker ";
+
+    private JadxWorker() {
+    }
+
+    public static void main(String[] argv) throws Exception {
+        Logger root = (Logger) LoggerFactory.getLogger(org.slf4j.Logger.ROOT_LOGGER_NAME);
+        root.setLevel(Level.toLevel(System.getProperty("jadx.worker.logLevel", "INFO"), Level.INFO));
+
+        // load the decompiler classes before the first job arrives
+        new JadxArgs();
+        reply("ready " + JadxDecompiler.getVersion());
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            String[] cmd = line.split("\t");
+            switch (cmd[0]) {
+                case "ping":
+                    reply("pong");
+                    break;
+                case "run":
+                    run(cmd);
+                    break;
+                case "quit":
+                    return;
+                default:
+                    reply("error unknown command " + cmd[0]);
+            }
+        }
+    }
+
+    private static void run(String[] cmd) {
+        int code = 0;
+        int errors = 0;
+        try {
+            JadxArgs args = new JadxArgs();
+            args.setOutDir(new File(cmd[1]));
+            args.setInputFiles(Collections.singletonList(new File(cmd[2])));
+            args.setThreadsCount(Integer.parseInt(cmd[3]));
+            args.setShowInconsistentCode(true); // --show-bad-code
+            if (cmd.length > 4 && !cmd[4].isEmpty()) {
+                // inner classes are saved with their top-level class
+                Set<String> names = new HashSet<>(Files.readAllLines(new File(cmd[4]).toPath(), StandardCharsets.UTF_8));
+                args.setClassFilter(names::contains);
+            }
+            if (cmd.length > 5 && "1".equals(cmd[5])) {
+                args.setSkipResources(true);
+            }
+            try (JadxDecompiler jadx = new JadxDecompiler(args)) {
+                jadx.load();
+                jadx.save();
+                errors = jadx.getErrorsCount();
+            }
+        } catch (Exception e) {
+            e.printStackTrace(System.out);
+            code = 1;
+        }
+        reply("done " + code + " " + errors);
+    }
+
+    private static void reply(String msg) {
+        System.out.println(PREFIX + msg);
+        System.out.flush();
+    }
+}
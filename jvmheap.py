@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+
+# -------------------------
+# JVM HEAP GOVERNOR (per-job -Xmx for JADX, OOM retry, learned settings)
+# -------------------------
+# The job's memory estimate (base + per dex MB) is split into heap (-Xmx) and
+# a fixed non-heap allowance (metaspace, thread stacks, code cache). A run that
+# dies with OutOfMemoryError is retried once with a bigger heap, or with half
+# the threads when the heap is already at its cap. Settings that finally
+# worked are remembered per APK sha256 and per dex size bucket, so the next
+# run of that APK (or one of similar size) starts with them.
+#
+# Plans are plain dicts: {"heap_mb", "max_threads", "source"}.
+
+OOM_MARKERS = ("OutOfMemoryError", "GC overhead limit exceeded")
+MAX_APK_ENTRIES = 5000
+
+
+class JadxOutOfMemory(RuntimeError):
+    pass
+
+
+def is_oom_line(line: str) -> bool:
+    return any(m in line for m in OOM_MARKERS)
+
+
+def dex_bucket(dex_bytes: int) -> str:
+    # power-of-two MB buckets: "<1", "1-2", "2-4", "4-8", ...
+    mb = int(dex_bytes / 1024 / 1024)
+    if mb < 1:
+        return "<1"
+    lo = 1 << (mb.bit_length() - 1)
+    return f"{lo}-{lo * 2}"
+
+
+def jvm_opts(heap_mb: int) -> str:
+    # exit at the first OOM instead of limping on with half-decompiled classes
+    return f"-Xmx{heap_mb}m -XX:+ExitOnOutOfMemoryError"
+
+
+class HeapGovernor:
+    def __init__(self, path: str, overhead_mb: int, min_heap_mb: int, max_heap_mb: int, grow_factor: float = 2.0):
+        self.path = path
+        self.overhead_mb = overhead_mb
+        self.min_heap_mb = min_heap_mb
+        self.max_heap_mb = max(min_heap_mb, max_heap_mb)
+        self.grow_factor = grow_factor
+        self.lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault("apks", {})
+        data.setdefault("buckets", {})
+        return data
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def _clamp(self, heap_mb: int) -> int:
+        return max(self.min_heap_mb, min(self.max_heap_mb, int(heap_mb)))
+
+    def est_mem_mb(self, plan: dict) -> int:
+        # what the scheduler should reserve for a run with this plan
+        return plan["heap_mb"] + self.overhead_mb
+
+    def plan(self, apk_sha256: str | None, dex_bytes: int, est_mb: int) -> dict:
+        heap_mb = self._clamp(est_mb - self.overhead_mb)
+        with self.lock:
+            known = self.data["apks"].get(apk_sha256 or "")
+            similar = self.data["buckets"].get(dex_bucket(dex_bytes))
+        if known:
+            # this exact APK has run before: reuse what worked
+            return {"heap_mb": self._clamp(known["heap_mb"]), "max_threads": known.get("max_threads"), "source": "apk"}
+        if similar and similar["heap_mb"] > heap_mb:
+            # a similar sized APK needed more than the estimate
+            return {"heap_mb": self._clamp(similar["heap_mb"]), "max_threads": similar.get("max_threads"), "source": "similar"}
+        return {"heap_mb": heap_mb, "max_threads": None, "source": "estimate"}
+
+    def escalate(self, plan: dict, threads: int) -> dict | None:
+        # next attempt after an OOM, or None when there is nothing left to give
+        if plan["heap_mb"] < self.max_heap_mb:
+            heap_mb = self._clamp(plan["heap_mb"] * self.grow_factor)
+            return {"heap_mb": heap_mb, "max_threads": plan["max_threads"], "source": "oom-retry"}
+        if threads > 1:
+            return {"heap_mb": plan["heap_mb"], "max_threads": max(1, threads // 2), "source": "oom-retry"}
+        return None
+
+    def record(self, apk_sha256: str | None, dex_bytes: int, plan: dict, threads: int, attempts: int):
+        # max_threads is only set when an OOM forced fewer threads
+        entry = {"heap_mb": plan["heap_mb"], "max_threads": plan["max_threads"], "threads": threads,
+                 "dex_bytes": dex_bytes, "attempts": attempts, "updated_at": int(time.time())}
+        with self.lock:
+            if apk_sha256:
+                apks = self.data["apks"]
+                apks[apk_sha256] = entry
+                if len(apks) > MAX_APK_ENTRIES:
+                    for sha in sorted(apks, key=lambda k: apks[k]["updated_at"])[:len(apks) - MAX_APK_ENTRIES]:
+                        del apks[sha]
+            if attempts > 1:
+                # only an OOM teaches anything about the bucket: keep the largest heap
+                # and the smallest thread cap that were ever needed
+                b = dex_bucket(dex_bytes)
+                prev = self.data["buckets"].get(b)
+                if prev:
+                    caps = [c for c in (prev.get("max_threads"), entry["max_threads"]) if c]
+                    entry = dict(entry, heap_mb=max(prev["heap_mb"], entry["heap_mb"]),
+                                 max_threads=min(caps) if caps else None)
+                self.data["buckets"][b] = entry
+            self._save()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "path": self.path,
+                "overhead_mb": self.overhead_mb,
+                "min_heap_mb": self.min_heap_mb,
+                "max_heap_mb": self.max_heap_mb,
+                "apks": len(self.data["apks"]),
+                "buckets": dict(self.data["buckets"]),
+            }
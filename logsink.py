@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+# -------------------------
+# BATCHED PER-JOB LOG WRITER
+# -------------------------
+# One open file handle per job; producers only enqueue, a background thread
+# drains the queue in batches and does a single write()/flush() per batch.
+# The queue is bounded, so a producer that outruns the disk blocks instead of
+# growing memory without limit. After close() (or if the file cannot be opened)
+# nothing is queued any more: late lines are appended synchronously, or
+# dropped when the file is not writable, so a producer never waits on a
+# writer thread that is gone.
+
+_CLOSE = object()
+
+
+def append_line(path: str, line: str, echo_prefix: str | None = None) -> bool:
+    # unbatched append (one open per line), for the odd line outside a writer's life
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8", errors="replace") as f:
+            f.write(line + "\n")
+    except OSError:
+        return False
+    if echo_prefix is not None:
+        sys.stdout.write(f"{echo_prefix}{line}\n")
+        sys.stdout.flush()
+    return True
+
+
+class JobLogWriter:
+    def __init__(self, path: str, echo_prefix: str | None = None, max_queue: int = 50000,
+                 batch_lines: int = 4096, flush_interval: float = 0.2):
+        self.path = path
+        self.echo_prefix = echo_prefix
+        self.batch_lines = batch_lines
+        self.flush_interval = flush_interval
+        self.q: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.started_at = time.time()
+        self.lines = 0
+        self.bytes = 0
+        self.batches = 0
+        self.blocked_puts = 0
+        self.late_lines = 0
+        self.dropped = 0
+        self.error: str | None = None
+        self.closed = False
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{os.path.basename(os.path.dirname(path))}", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str):
+        if self.error is not None:
+            self.dropped += 1
+            return
+        if self.closed:
+            self.late_lines += 1
+            if not append_line(self.path, line, self.echo_prefix):
+                self.dropped += 1
+            return
+        try:
+            self.q.put_nowait(line)
+        except queue.Full:
+            self.blocked_puts += 1
+            self.q.put(line)
+
+    def close(self, timeout: float = 10.0):
+        if self.closed:
+            return
+        self.closed = True
+        self.q.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def _drain(self, first) -> tuple[list[str], bool]:
+        batch = [] if first is _CLOSE else [first]
+        done = first is _CLOSE
+        while not done and len(batch) < self.batch_lines:
+            try:
+                item = self.q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _CLOSE:
+                done = True
+            else:
+                batch.append(item)
+        return batch, done
+
+    def _run(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            f = open(self.path, "a", encoding="utf-8", errors="replace", buffering=1024 * 1024)
+        except OSError as e:
+            self.error = str(e)
+            self._discard()
+            return
+        with f:
+            done = False
+            while not done:
+                try:
+                    first = self.q.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                batch, done = self._drain(first)
+                if not batch:
+                    continue
+                data = "\n".join(batch) + "\n"
+                f.write(data)
+                f.flush()
+                if self.echo_prefix is not None:
+                    sys.stdout.write("".join(f"{self.echo_prefix}{line}\n" for line in batch))
+                    sys.stdout.flush()
+                self.lines += len(batch)
+                self.bytes += len(data)
+                self.batches += 1
+
+    def _discard(self):
+        # no file: keep emptying the queue so blocked producers get through
+        while True:
+            item = self.q.get()
+            if item is _CLOSE:
+                return
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return {
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "batches": self.batches,
+            "queued": self.q.qsize(),
+            "blocked_puts": self.blocked_puts,
+            "late_lines": self.late_lines,
+            "dropped": self.dropped,
+            "error": self.error,
+            "lines_per_sec": round(self.lines / elapsed, 1),
+            "avg_batch": round(self.lines / self.batches, 1) if self.batches else 0,
+        }
+
+
+def _bench(n: int = 200000):
+    # python logsink.py [lines] -> lines/sec of naive open-per-line vs JobLogWriter
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        naive = os.path.join(tmp, "naive", "jadx.log")
+        t0 = time.perf_counter()
+        for i in range(n):
+            os.makedirs(os.path.dirname(naive), exist_ok=True)
+            with open(naive, "a", encoding="utf-8") as f:
+                f.write(f"DEBUG - line {i}\n")
+        naive_sec = time.perf_counter() - t0
+
+        w = JobLogWriter(os.path.join(tmp, "batched", "jadx.log"))
+        t0 = time.perf_counter()
+        for i in range(n):
+            w.write(f"DEBUG - line {i}")
+        w.close(timeout=60)
+        batched_sec = time.perf_counter() - t0
+
+    print(f"naive   : {n / naive_sec:>12,.0f} lines/sec")
+    print(f"batched : {n / batched_sec:>12,.0f} lines/sec  {w.stats()}")
+
+
+if __name__ == "__main__":
+    _bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -656,28 +656,149 @@
 import os
 import json
 import time
+import asyncio
+import hashlib
 import subprocess
 import threading
+import zipfile
+import shutil
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any
+from typing import Dict
 
-import requests
 from bson import ObjectId
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-
-app = FastAPI(title="APK Decompiler (JADX)")
+from pydantic import BaseModel, Field
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from resultcache import ResultCache, link_part, sha256_file
+from scheduler import JobScheduler, SlotUnavailable, default_mem_budget_mb, default_slots
+from logsink import JobLogWriter, append_line
+from eventhub import EventHub
+from downloader import ApkDownloader, make_session
+import textindex
+import symindex
+import manifest
+import packstore
+import exporter
+from fileserve import serve_file, make_etag, etag_matches
+from registry import ScanRegistry
+from jobtable import JobTable
+import metrics
+from procprofile import ProcSampler
+import jvmheap
+from jvmheap import HeapGovernor, JadxOutOfMemory
+from jadxpool import JadxPool, JadxWorkerUnavailable, WarmWorker
+import dexfile
+import fanout
+
+# jobs cut short by a restart are picked up again from their last checkpoint
+@asynccontextmanager
+async def lifespan(_app):
+    if JADX_POOL is not None:
+        JADX_POOL.start()
+    if RESUME_INTERRUPTED:
+        resume_interrupted_jobs()
+    yield
+    if JADX_POOL is not None:
+        JADX_POOL.close()
+    if SYMBOL_POOL is not None:
+        SYMBOL_POOL.shutdown(cancel_futures=True)
+
+app = FastAPI(title="APK Decompiler (JADX)", lifespan=lifespan)
 
 # -------------------------
 # CONFIG
 # -------------------------
 MAX_LOG_LINES = 2000
-JOBS: Dict[str, Dict[str, Any]] = {}
-EXEC = ThreadPoolExecutor(max_workers=1)  # keep 1 to avoid RAM blowups
+LOG_QUEUE_MAX_LINES = int(os.getenv("LOG_QUEUE_MAX_LINES", "50000"))
+LOG_FLUSH_INTERVAL_SEC = float(os.getenv("LOG_FLUSH_INTERVAL_SEC", "0.2"))
+LOG_READ_MAX_BYTES = int(os.getenv("LOG_READ_MAX_BYTES", str(1024 * 1024)))  # per /logs?since_offset call
+
+# in-memory job state (status + last MAX_LOG_LINES log lines); finished jobs
+# beyond these caps are dropped and served from meta.json / jadx.log instead
+JOBS_MAX_ENTRIES = int(os.getenv("JOBS_MAX_ENTRIES", "500"))
+JOBS_MAX_MB = int(os.getenv("JOBS_MAX_MB", "64"))
+JOBS = JobTable(JOBS_MAX_ENTRIES, JOBS_MAX_MB * 1024 * 1024)
+
+# stage checkpoints in meta.json: downloaded -> decompiled -> indexed
+RESUME_INTERRUPTED = os.getenv("RESUME_INTERRUPTED", "1") == "1"
+
+# live /events/{scan_id} streams; slow subscribers lose their oldest events
+EVENTS_MAX_BUFFERED = int(os.getenv("EVENTS_MAX_BUFFERED", "5000"))
+EVENTS_KEEPALIVE_SEC = float(os.getenv("EVENTS_KEEPALIVE_SEC", "15"))
+HUB = EventHub(EVENTS_MAX_BUFFERED)
+
+# Several JADX runs at once, each admitted only if its estimated RAM fits.
+# JOB_MEM_BUDGET_MB defaults to 80% of MemTotal.
+JOB_SLOTS = int(os.getenv("JOB_SLOTS", str(default_slots())))
+JOB_MEM_BUDGET_MB = int(os.getenv("JOB_MEM_BUDGET_MB", "0")) or default_mem_budget_mb()
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(JOB_SLOTS * 4)))  # download/prep threads
+JADX_BASE_MEM_MB = int(os.getenv("JADX_BASE_MEM_MB", "768"))
+JADX_MEM_PER_DEX_MB = int(os.getenv("JADX_MEM_PER_DEX_MB", "60"))
+
+# JADX --threads-count per job: share of idle cores, capped by how much dex there is
+JADX_MAX_THREADS = int(os.getenv("JADX_MAX_THREADS", str(os.cpu_count() or 1)))
+JADX_DEX_MB_PER_THREAD = float(os.getenv("JADX_DEX_MB_PER_THREAD", "2"))
+
+# JADX -Xmx per job: the memory estimate minus a non-heap allowance, retried once
+# with a bigger heap (or fewer threads) on OutOfMemoryError
+JADX_JVM_OVERHEAD_MB = int(os.getenv("JADX_JVM_OVERHEAD_MB", "256"))
+JADX_MIN_HEAP_MB = int(os.getenv("JADX_MIN_HEAP_MB", "512"))
+JADX_MAX_HEAP_MB = int(os.getenv("JADX_MAX_HEAP_MB", "0")) or max(JADX_MIN_HEAP_MB, JOB_MEM_BUDGET_MB - JADX_JVM_OVERHEAD_MB)
+JADX_OOM_RETRY = os.getenv("JADX_OOM_RETRY", "1") == "1"
+
+# Optional pool of long-running JADX JVMs (jvm/JadxWorker.java) that skip JVM
+# startup per job. Jobs whose heap plan fits JADX_WARM_HEAP_MB use a warm worker
+# when one is free within JADX_WARM_WAIT_SEC, everything else runs the jadx CLI.
+# Idle workers' memory is outside JOB_MEM_BUDGET_MB; workers are recycled after
+# JADX_WARM_MAX_JOBS jobs or past JADX_WARM_MAX_RSS_MB.
+JADX_WARM_POOL = os.getenv("JADX_WARM_POOL", "0") == "1"
+JADX_WARM_POOL_SIZE = int(os.getenv("JADX_WARM_POOL_SIZE", str(JOB_SLOTS)))
+JADX_WARM_HEAP_MB = int(os.getenv("JADX_WARM_HEAP_MB", "2048"))
+JADX_WARM_MAX_JOBS = int(os.getenv("JADX_WARM_MAX_JOBS", "50"))
+JADX_WARM_MAX_RSS_MB = int(os.getenv("JADX_WARM_MAX_RSS_MB", str(JADX_WARM_HEAP_MB + 2 * JADX_JVM_OVERHEAD_MB)))
+JADX_WARM_WAIT_SEC = float(os.getenv("JADX_WARM_WAIT_SEC", "5"))
+JADX_WARM_JAVA = os.getenv("JADX_WARM_JAVA", "java")
+JADX_WARM_CLASSPATH = os.getenv("JADX_WARM_CLASSPATH", "/opt/jadx-worker:/opt/jadx/lib/*")
+JADX_WARM_LOG_LEVEL = os.getenv("JADX_WARM_LOG_LEVEL", "DEBUG")
+
+# Multi-dex fan-out (fanout.py): APKs with two or more dex files are decompiled
+# by JADX_FANOUT_PARTS JadxWorker JVMs in parallel (0/1 = off; `parts` per
+# request). Each part reserves the job's whole memory estimate, so the parts
+# are capped to what fits in JOB_MEM_BUDGET_MB, and the job's thread count is
+# shared between them.
+JADX_FANOUT_PARTS = int(os.getenv("JADX_FANOUT_PARTS", "0"))
+
+# Decode resources in their own `jadx --no-src` process next to the sources
+# pass, so resources/ is complete (and marked available in /status) while the
+# code is still being decompiled. The extra JVM gets JADX_RES_HEAP_MB, or half
+# of the job's heap when that is more.
+JADX_SPLIT_PASSES = os.getenv("JADX_SPLIT_PASSES", "1") == "1"
+JADX_RES_HEAP_MB = int(os.getenv("JADX_RES_HEAP_MB", "1024"))
+
+SCHED = JobScheduler(JOB_SLOTS, JOB_MEM_BUDGET_MB, JOB_WORKERS)
+
+def jadx_worker_cmd(heap_mb: int) -> list[str]:
+    return [JADX_WARM_JAVA, *jvmheap.jvm_opts(heap_mb).split(), f"-Djadx.worker.logLevel={JADX_WARM_LOG_LEVEL}",
+            "-cp", JADX_WARM_CLASSPATH, "JadxWorker"]
+
+JADX_POOL = JadxPool(
+    JADX_WARM_POOL_SIZE,
+    jadx_worker_cmd(JADX_WARM_HEAP_MB),
+    max_jobs=JADX_WARM_MAX_JOBS,
+    max_rss_mb=JADX_WARM_MAX_RSS_MB,
+) if JADX_WARM_POOL else None
 
 # ✅ Render Persistent Disk mount path must EXACTLY match what you set in Render UI.
 # In Render → Disks → Mount path = /data  (recommended)
@@ -685,6 +806,119 @@ EXEC = ThreadPoolExecutor(max_workers=1)  # keep 1 to avoid RAM blowups
 PERSISTENT_ROOT = os.getenv("PERSISTENT_ROOT", "/data/scans")
 os.makedirs(PERSISTENT_ROOT, exist_ok=True)
 
+# SQLite copy of every scan's meta.json (status, sha, sizes, timestamps) behind /scans
+SCAN_REGISTRY_DB = os.getenv("SCAN_REGISTRY_DB", os.path.join(PERSISTENT_ROOT, "_registry.db"))
+REGISTRY = ScanRegistry(SCAN_REGISTRY_DB)
+
+# Identical APKs (by SHA-256) reuse an earlier scan's output instead of re-running JADX.
+# Entries live on the same disk so they can be hardlinked into new scan dirs.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(PERSISTENT_ROOT, "_cache"))
+RESULT_CACHE_MAX_GB = float(os.getenv("RESULT_CACHE_MAX_GB", "20"))
+RESULT_CACHE_MAX_AGE_DAYS = float(os.getenv("RESULT_CACHE_MAX_AGE_DAYS", "30"))
+
+# JVM settings that worked, per APK sha256 and dex size bucket
+JVM_HEAP_STATE = os.getenv("JVM_HEAP_STATE", os.path.join(PERSISTENT_ROOT, "_jvm_heap.json"))
+HEAP = HeapGovernor(JVM_HEAP_STATE, JADX_JVM_OVERHEAD_MB, JADX_MIN_HEAP_MB, JADX_MAX_HEAP_MB)
+
+RESULT_CACHE = ResultCache(
+    RESULT_CACHE_DIR,
+    max_bytes=int(RESULT_CACHE_MAX_GB * 1024 ** 3),
+    max_age_sec=int(RESULT_CACHE_MAX_AGE_DAYS * 86400),
+) if RESULT_CACHE_ENABLED else None
+
+# APK downloads: one pooled keep-alive session, parallel HTTP Range segments,
+# resumable from <scan_dir>/app.apk.part(.json)
+DOWNLOAD_SEGMENTS = int(os.getenv("DOWNLOAD_SEGMENTS", "4"))
+DOWNLOAD_MIN_SEGMENT_MB = int(os.getenv("DOWNLOAD_MIN_SEGMENT_MB", "8"))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "5"))
+DOWNLOADER = ApkDownloader(
+    make_session(pool_size=max(16, DOWNLOAD_SEGMENTS * 4)),
+    segments=DOWNLOAD_SEGMENTS,
+    min_segment_bytes=DOWNLOAD_MIN_SEGMENT_MB * 1024 * 1024,
+    retries=DOWNLOAD_RETRIES,
+)
+
+# symbol index parsing processes (0 = one per core), one pool shared by all scans
+SYMBOL_INDEX_PROCS = int(os.getenv("SYMBOL_INDEX_PROCS", "0")) or os.cpu_count() or 1
+
+# Pack finished scans into <scan_dir>/output.zip (one inode instead of tens of
+# thousands). Existing scans: python manage.py pack --all
+PACK_OUTPUT = os.getenv("PACK_OUTPUT", "0") == "1"
+PACK_LEVEL = int(os.getenv("PACK_LEVEL", "6"))
+
+# mode=lazy scans only list the dex classes up front; a class is decompiled
+# (jadx --single-class) the first time /file or /browse asks for it
+LAZY_MAX_CONCURRENT = int(os.getenv("LAZY_MAX_CONCURRENT", str(JOB_SLOTS)))
+LAZY_CLASS_TIMEOUT_SEC = int(os.getenv("LAZY_CLASS_TIMEOUT_SEC", "300"))
+# heap of a --single-class run: every dex is still loaded to resolve types, but
+# only one class is decompiled, on one thread
+LAZY_MEM_PER_DEX_MB = int(os.getenv("LAZY_MEM_PER_DEX_MB", "15"))
+# lazy runs have their own small budget instead of queueing behind full scans;
+# a request that gets no slot within LAZY_SLOT_WAIT_SEC is answered with 503
+LAZY_MEM_BUDGET_MB = int(os.getenv("LAZY_MEM_BUDGET_MB", "2048"))
+LAZY_SLOT_WAIT_SEC = float(os.getenv("LAZY_SLOT_WAIT_SEC", "5"))
+
+# /proc sampling of each JADX run (CPU, RSS, I/O) -> <scan_dir>/profile.json
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "1") == "1"
+PROFILE_INTERVAL_SEC = float(os.getenv("PROFILE_INTERVAL_SEC", "1"))
+PROFILE_MAX_SAMPLES = int(os.getenv("PROFILE_MAX_SAMPLES", "3600"))
+
+# direct APK uploads (POST /decompile/upload)
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "1024"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+# -------------------------
+# METRICS (GET /metrics, Prometheus text format)
+# -------------------------
+METRICS = metrics.MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram(
+    "jadx_stage_seconds", "Wall time of each worker() stage", ("stage",))
+JOBS_FINISHED = METRICS.counter(
+    "jadx_jobs_finished_total", "Jobs that reached a terminal status", ("status",))
+DOWNLOAD_BYTES = METRICS.counter(
+    "jadx_download_bytes_total", "APK bytes fetched over HTTP (resumed bytes excluded)")
+UPLOAD_BYTES = METRICS.counter(
+    "jadx_upload_bytes_total", "APK bytes received via /decompile/upload")
+LOG_LINES = METRICS.counter(
+    "jadx_log_lines_total", "Lines written to per-scan jadx.log files")
+APK_BYTES = METRICS.histogram(
+    "jadx_apk_bytes", "Size of each processed APK", buckets=metrics.SIZE_BUCKETS)
+OUTPUT_BYTES = METRICS.histogram(
+    "jadx_output_bytes", "Size of the decompiled sources + resources per scan", buckets=metrics.SIZE_BUCKETS)
+JADX_RUNS = METRICS.counter(
+    "jadx_runs_total", "JADX runs by mode (warm pool worker, one-shot worker, fan-out or cold CLI)", ("mode",))
+LAZY_CLASSES = METRICS.counter("lazy_classes_decompiled_total", "Classes decompiled on demand in lazy scans", ("result",))
+INCREMENTAL_CLASSES = METRICS.counter(
+    "incremental_classes_total", "Classes of incremental scans reused from the baseline or decompiled", ("result",))
+JADX_OOMS = METRICS.counter("jadx_oom_total", "JADX runs that died with OutOfMemoryError")
+PEAK_RSS_BYTES = METRICS.histogram(
+    "jadx_peak_rss_bytes", "Peak RSS of the JADX process tree per run", buckets=metrics.SIZE_BUCKETS)
+HTTP_SECONDS = METRICS.histogram(
+    "http_request_duration_seconds", "API latency by route", ("method", "route", "status"),
+    buckets=metrics.HTTP_BUCKETS)
+
+METRICS.gauge("jadx_queue_depth", "Jobs submitted but not yet running JADX",
+              lambda: SCHED.stats()["queue_depth"])
+METRICS.gauge("jadx_active_jobs", "Jobs currently holding a JADX slot", lambda: SCHED.running_count())
+METRICS.gauge("jadx_slots", "Configured JADX slots", lambda: JOB_SLOTS)
+METRICS.gauge("jadx_mem_reserved_mb", "Estimated RAM reserved by running jobs",
+              lambda: SCHED.stats()["mem_reserved_mb"])
+
+def jobs_by_status() -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for job in JOBS.values():
+        st = job.get("status", "unknown")
+        out[st] = out.get(st, 0) + 1
+    return out
+
+METRICS.gauge("jadx_jobs_in_memory", "In-memory job entries by status", jobs_by_status, ("status",))
+METRICS.gauge("jadx_jobs_table_bytes", "Estimated size of the in-memory job table", lambda: JOBS.total_bytes())
+METRICS.gauge("jadx_event_subscribers", "Open /events streams", lambda: HUB.stats()["subscribers"])
+
+# /events streams live for the whole job, they would only skew the latency histogram
+app.add_middleware(metrics.RequestMetricsMiddleware, histogram=HTTP_SECONDS, skip_prefixes=("/events/", "/static/"))
+
 # -------------------------
 # STATIC UI
 # -------------------------
@@ -700,6 +934,10 @@ def home():
 class DecompileFromUrlReq(BaseModel):
     apk_url: str
     scan_id: str | None = None
+    threads: int | None = Field(default=None, ge=1, le=256)  # override JADX --threads-count
+    mode: str = Field(default="full", pattern="^(full|lazy)$")  # lazy: decompile classes on first request
+    baseline: str | None = None  # scan_id of an earlier version: only changed classes are decompiled
+    parts: int | None = Field(default=None, ge=1, le=64)  # fan-out: JADX processes for a multi-dex APK
 
 # -------------------------
 # PATH HELPERS
@@ -710,16 +948,54 @@ def scan_dir(scan_id: str) -> str:
 def meta_path(scan_id: str) -> str:
     return os.path.join(scan_dir(scan_id), "meta.json")
 
+def profile_path(scan_id: str) -> str:
+    return os.path.join(scan_dir(scan_id), "profile.json")
+
 def log_path(scan_id: str) -> str:
     return os.path.join(scan_dir(scan_id), "jadx.log")
 
+def index_dir(scan_id: str) -> str:
+    return os.path.join(scan_dir(scan_id), "index")
+
+def search_db_path(scan_id: str) -> str:
+    return os.path.join(index_dir(scan_id), "search.db")
+
+def symbols_db_path(scan_id: str) -> str:
+    return os.path.join(index_dir(scan_id), "symbols.db")
+
+# sources/ + resources/ are listed from the manifest once a job has finished;
+# the handful of top level files (meta.json, jadx.log, ...) are always live
+MANIFEST_ROOTS = ("sources", "resources")
+
+def fanout_root(scan_id: str) -> str:
+    return os.path.join(scan_dir(scan_id), ".fanout")
+
+def manifest_db_path(scan_id: str) -> str:
+    return os.path.join(index_dir(scan_id), "manifest.db")
+
+def class_hashes_path(scan_id: str) -> str:
+    return os.path.join(index_dir(scan_id), "class_hashes.json")
+
+def pack_path(scan_id: str) -> str:
+    return os.path.join(scan_dir(scan_id), packstore.PACK_NAME)
+
+def scan_pack(scan_id: str) -> packstore.PackReader | None:
+    return packstore.open_pack(pack_path(scan_id))
+
 def write_meta(scan_id: str, data: dict):
     os.makedirs(scan_dir(scan_id), exist_ok=True)
     payload = dict(data)
     payload["scan_id"] = scan_id
     payload["updated_at"] = int(time.time())
+    # carried across the per-stage rewrites of meta.json
+    job = JOBS.get(scan_id) or {}
+    for key in ("created_at", "checkpoints", "mode", "baseline", "incremental", "parts", "available"):
+        if key not in payload and job.get(key):
+            payload[key] = job[key]
     with open(meta_path(scan_id), "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    REGISTRY.upsert(scan_id, payload)
+    HUB.publish(scan_id, "status", payload)
 
 def read_meta(scan_id: str) -> dict | None:
     p = meta_path(scan_id)
@@ -728,10 +1004,61 @@ def read_meta(scan_id: str) -> dict | None:
     with open(p, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def iter_scan_metas():
+    for name in sorted(os.listdir(PERSISTENT_ROOT)):
+        if not name.startswith("scan_id_"):
+            continue
+        scan_id = name[len("scan_id_"):]
+        try:
+            meta = read_meta(scan_id)
+        except ValueError:
+            meta = None
+        # dirs without a readable meta.json still show up, as "unknown"
+        yield scan_id, meta or {"updated_at": int(os.path.getmtime(scan_dir(scan_id)))}
+
+def rebuild_registry() -> dict:
+    return REGISTRY.rebuild(iter_scan_metas())
+
+# first start with a registry: import whatever is already on disk
+if REGISTRY.count() == 0:
+    rebuild_registry()
+
+# one batched writer (single open handle + flusher thread) per active job
+LOG_WRITERS: Dict[str, JobLogWriter] = {}
+LOG_WRITERS_LOCK = threading.Lock()
+
+def log_writer(scan_id: str) -> JobLogWriter:
+    with LOG_WRITERS_LOCK:
+        w = LOG_WRITERS.get(scan_id)
+        if w is None:
+            w = JobLogWriter(
+                log_path(scan_id),
+                echo_prefix=f"[{scan_id}] ",  # Render log output
+                max_queue=LOG_QUEUE_MAX_LINES,
+                flush_interval=LOG_FLUSH_INTERVAL_SEC,
+            )
+            LOG_WRITERS[scan_id] = w
+        return w
+
+def close_log_writer(scan_id: str):
+    with LOG_WRITERS_LOCK:
+        w = LOG_WRITERS.pop(scan_id, None)
+    if w is not None:
+        w.close()
+        if scan_id in JOBS:
+            JOBS[scan_id]["log_writer"] = w.stats()
+
 def append_disk_log(scan_id: str, line: str):
-    os.makedirs(scan_dir(scan_id), exist_ok=True)
-    with open(log_path(scan_id), "a", encoding="utf-8") as f:
-        f.write((line or "").rstrip("\n") + "\n")
+    # only the worker opens a writer; a line outside its run (a lazy decompile, a
+    # reader thread finishing after close) is appended directly instead of
+    # starting a writer thread nobody would close
+    line = (line or "").rstrip("\n")
+    w = LOG_WRITERS.get(scan_id)
+    if w is not None:
+        w.write(line)
+    else:
+        append_line(log_path(scan_id), line, echo_prefix=f"[{scan_id}] ")
+    LOG_LINES.inc()
 
 # -------------------------
 # LOGGING HELPERS (RAM + DISK)
@@ -742,18 +1069,92 @@ def init_job_logs(scan_id: str):
 def push_log(scan_id: str, line: str):
     line = (line or "").rstrip("\n")
 
-    # RAM (optional)
-    if scan_id not in JOBS:
-        JOBS[scan_id] = {"status": "unknown"}
-    if "logs" not in JOBS.get(scan_id, {}):
-        init_job_logs(scan_id)
-    JOBS[scan_id]["logs"].append(line)
+    # RAM (optional): only for jobs still in the table. A line for an evicted
+    # job must not bring back a bare entry that would hide its meta.json.
+    job = JOBS.peek(scan_id)
+    if job is not None:
+        logs = job.get("logs")
+        if logs is None:
+            logs = job["logs"] = deque(maxlen=MAX_LOG_LINES)
+        logs.append(line)
 
-    # DISK (persistent)
+    # DISK (persistent) + Render log output, batched by the job's log writer
     append_disk_log(scan_id, line)
 
-    # Render log output
-    print(f"[{scan_id}] {line}", flush=True)
+    # live subscribers (no-op when nobody is listening)
+    HUB.publish(scan_id, "log", line)
+
+# -------------------------
+# APK SIZING
+# -------------------------
+def apk_dex_bytes(apk_path: str) -> int:
+    # uncompressed size of classes*.dex, the main driver of JADX memory/CPU
+    try:
+        with zipfile.ZipFile(apk_path) as z:
+            return sum(
+                i.file_size for i in z.infolist()
+                if i.filename.startswith("classes") and i.filename.endswith(".dex")
+            )
+    except (OSError, zipfile.BadZipFile):
+        return os.path.getsize(apk_path)
+
+def estimate_job_mem_mb(dex_bytes: int) -> int:
+    return JADX_BASE_MEM_MB + int(dex_bytes / 1024 / 1024 * JADX_MEM_PER_DEX_MB)
+
+def choose_jadx_threads(dex_bytes: int) -> int:
+    # called once admitted, so running_count() includes this job
+    cores = os.cpu_count() or 1
+    try:
+        idle = cores - os.getloadavg()[0]
+    except OSError:
+        idle = cores
+    fair_share = cores // max(1, SCHED.running_count())
+    by_dex = 1 + int(dex_bytes / 1024 / 1024 / JADX_DEX_MB_PER_THREAD)
+    return max(1, min(fair_share, int(idle) + 1, by_dex, JADX_MAX_THREADS))
+
+# -------------------------
+# LOG READERS (seek based, cost independent of log size)
+# -------------------------
+# Offsets always point just past a "\n", so a line still being written is
+# never returned half-way and cursors stay stable across calls.
+def read_log_tail(path: str, tail: int, block_size: int = 64 * 1024) -> tuple[list[str], int]:
+    # same slice as the old lines[-tail:], so tail=0 still means the whole log
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        pos = size
+        buf = b""
+        while pos > 0 and (tail <= 0 or buf.count(b"\n") <= tail):
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+
+    end = buf.rfind(b"\n") + 1
+    next_offset = pos + end
+    lines = buf[:end].split(b"\n")[:-1]
+    if pos > 0:
+        lines = lines[1:]  # first line may start before the bytes we read
+    lines = lines[-tail:]
+    return [l.decode("utf-8", errors="replace") for l in lines], next_offset
+
+def read_log_since(path: str, offset: int, max_bytes: int) -> tuple[list[str], int, bool]:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        offset = min(max(offset, 0), size)
+        f.seek(offset)
+        buf = f.read(max_bytes)
+
+    end = buf.rfind(b"\n") + 1
+    if end == 0 and len(buf) == max_bytes:
+        end = len(buf)  # single line longer than max_bytes: hand it out in pieces
+    lines = buf[:end].split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    next_offset = offset + end
+    more = len(buf) == max_bytes and next_offset < size
+    return [l.decode("utf-8", errors="replace") for l in lines], next_offset, more
 
 # -------------------------
 # SECURITY: prevent ../ traversal
@@ -766,21 +1167,60 @@ def safe_join(base: str, *paths: str) -> str:
     return str(target)
 
 # -------------------------
-# RUN JADX WITH LIVE LOG STREAM
+# JADX RESOURCE PROFILES
 # -------------------------
-def run_jadx_stream(scan_id: str, output_dir: str, apk_path: str, timeout_sec: int = 3600):
-    cmd = [
-        "jadx",
-        "--threads-count", "1",
-        "--verbose",
-        "--log-level", "DEBUG",
-        "--show-bad-code",
-        "-d", output_dir,
-        apk_path
-    ]
+# live samplers of running JADX processes, for /profile while a job runs
+PROFILERS: Dict[str, ProcSampler] = {}
+
+def finish_profile(scan_id: str, sampler: ProcSampler, exit_code: int | None, threads: int):
+    sampler.stop()
+    PROFILERS.pop(scan_id, None)
+    job = JOBS.get(scan_id) or {}
+    profile = {
+        "scan_id": scan_id,
+        "exit_code": exit_code,
+        "jadx_threads": threads,
+        "dex_bytes": job.get("dex_bytes"),
+        "est_mem_mb": job.get("est_mem_mb"),
+        **sampler.result(),
+    }
+    tmp = profile_path(scan_id) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, separators=(",", ":"))
+    os.replace(tmp, profile_path(scan_id))
 
-    push_log(scan_id, "Starting JADX with verbose logs...")
-    push_log(scan_id, "CMD: " + " ".join(cmd))
+    summary = profile["summary"]
+    if scan_id in JOBS:
+        JOBS[scan_id]["profile"] = summary
+    PEAK_RSS_BYTES.observe(summary["peak_rss_mb"] * 1024 * 1024)
+    push_log(scan_id, f"JADX profile: peak RSS {summary['peak_rss_mb']} MB (est. {job.get('est_mem_mb')} MB), "
+                      f"CPU {summary['cpu_sec']}s, peak {summary['peak_cpu_pct']}%, "
+                      f"read {summary['read_mb']} MB, write {summary['write_mb']} MB")
+
+# -------------------------
+# RUN JADX WITH LIVE LOG STREAM
+# -------------------------
+def check_jadx_result(oom: threading.Event, exit_code: int | None, heap_mb: int | None, threads: int):
+    # the OOM marker only counts for a run that failed: with --verbose a decompiled
+    # string or a debug line can mention OutOfMemoryError too
+    if exit_code == 0:
+        return
+    if oom.is_set():
+        raise JadxOutOfMemory(f"JADX ran out of memory (heap {heap_mb or 'default'} MB, {threads} thread(s))")
+    raise RuntimeError(f"JADX failed with exit code {exit_code}")
+
+def run_jadx_cli(scan_id: str, cmd: list[str], heap_mb: int | None, timeout_sec: int, threads: int,
+                 prefix: str = "", profile: bool = True):
+    # one jadx CLI process, its output streamed into the job log (each line after `prefix`)
+
+    # the jadx launcher appends $JADX_OPTS last, so our -Xmx wins over its defaults
+    env = os.environ.copy()
+    if heap_mb:
+        env["JADX_OPTS"] = (env.get("JADX_OPTS", "") + " " + jvmheap.jvm_opts(heap_mb)).strip()
+
+    push_log(scan_id, prefix + "CMD: " + " ".join(cmd))
+    if heap_mb:
+        push_log(scan_id, prefix + "JADX_OPTS: " + env["JADX_OPTS"])
 
     proc = subprocess.Popen(
         cmd,
@@ -789,17 +1229,28 @@ def run_jadx_stream(scan_id: str, output_dir: str, apk_path: str, timeout_sec: i
         text=True,
         bufsize=1,
         universal_newlines=True,
+        env=env,
     )
 
+    oom = threading.Event()
+
     def reader():
         try:
             assert proc.stdout is not None
             for line in proc.stdout:
-                push_log(scan_id, line)
+                if not oom.is_set() and jvmheap.is_oom_line(line):
+                    oom.set()
+                push_log(scan_id, prefix + line)
         except Exception as e:
-            push_log(scan_id, f"[log-reader-error] {e}")
+            push_log(scan_id, f"{prefix}[log-reader-error] {e}")
+
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    reader_thread.start()
 
-    threading.Thread(target=reader, daemon=True).start()
+    sampler = None
+    if profile and PROFILE_ENABLED:
+        sampler = ProcSampler(proc.pid, PROFILE_INTERVAL_SEC, PROFILE_MAX_SAMPLES).start()
+        PROFILERS[scan_id] = sampler
 
     try:
         proc.wait(timeout=timeout_sec)
@@ -809,93 +1260,884 @@ def run_jadx_stream(scan_id: str, output_dir: str, apk_path: str, timeout_sec: i
         except Exception:
             pass
         raise RuntimeError("JADX timed out")
+    finally:
+        # drain remaining output before the job's log writer is closed
+        reader_thread.join(timeout=10)
+        if sampler is not None:
+            try:
+                finish_profile(scan_id, sampler, proc.returncode, threads)
+            except Exception as e:
+                push_log(scan_id, f"[profile] failed: {e}")
+
+    check_jadx_result(oom, proc.returncode, heap_mb, threads)
+
+def run_jadx_warm(scan_id: str, worker, output_dir: str, apk_path: str, timeout_sec: int, threads: int,
+                  class_list: str | None = None, skip_resources: bool = False, release=None, heap_mb: int | None = None):
+    # release: what to do with the worker afterwards (default: back to JADX_POOL)
+    release = release or JADX_POOL.release
+    heap_mb = heap_mb or JADX_WARM_HEAP_MB
+    push_log(scan_id, f"Running JADX in warm worker #{worker.id} (pid {worker.pid}, job {worker.jobs + 1})...")
+    oom = threading.Event()
+
+    def on_line(line: str):
+        if not oom.is_set() and jvmheap.is_oom_line(line):
+            oom.set()
+        push_log(scan_id, line)
+
+    sampler = None
+    if PROFILE_ENABLED:
+        sampler = ProcSampler(worker.pid, PROFILE_INTERVAL_SEC, PROFILE_MAX_SAMPLES).start()
+        PROFILERS[scan_id] = sampler
+
+    exit_code = None
+    try:
+        exit_code = worker.run(output_dir, apk_path, threads, on_line, timeout_sec,
+                               class_list=class_list, skip_resources=skip_resources)
+    finally:
+        release(worker)
+        if sampler is not None:
+            try:
+                finish_profile(scan_id, sampler, exit_code, threads)
+            except Exception as e:
+                push_log(scan_id, f"[profile] failed: {e}")
+
+    check_jadx_result(oom, exit_code, heap_mb, threads)
+    push_log(scan_id, "JADX finished successfully.")
+
+def start_oneshot_worker(scan_id: str, heap_mb: int | None):
+    # a JadxWorker for a single job, for what the jadx CLI cannot do (class filters)
+    push_log(scan_id, "Starting a one-shot JADX worker...")
+    try:
+        worker = WarmWorker(0, jadx_worker_cmd(heap_mb or JADX_WARM_HEAP_MB))
+    except OSError as e:
+        raise JadxWorkerUnavailable(f"JADX worker could not be started: {e}")
+    if not worker.wait_ready(120):
+        worker.kill()
+        raise JadxWorkerUnavailable(f"JADX worker did not start (is JadxWorker on {JADX_WARM_CLASSPATH}?)")
+    return worker
+
+def fanout_parts(apk_path: str, requested: int | None) -> int:
+    parts = requested or JADX_FANOUT_PARTS
+    if parts < 2:
+        return 1
+    with zipfile.ZipFile(apk_path) as z:
+        return parts if len(dexfile.dex_names(z)) >= 2 else 1
+
+def run_jadx_fanout(scan_id: str, output_dir: str, apk_path: str, parts: int, timeout_sec: int, threads: int,
+                    heap_mb: int | None, skip_resources: bool = False) -> bool:
+    # False when the part JVMs could not be started; the caller then runs JADX once
+    groups = dexfile.split_classes(apk_path, parts)
+    push_log(scan_id, f"Fan-out: {len(groups)} JADX processes x {threads} thread(s), classes per part: "
+                      + ", ".join(str(len(g)) for g in groups))
+    oom = threading.Event()
+
+    def on_line(part: int, line: str):
+        if not oom.is_set() and jvmheap.is_oom_line(line):
+            oom.set()
+        push_log(scan_id, f"[part {part}] {line}")
+
+    started = []
+    def on_started(pids: list[int]):
+        started.append(pids)
+        if PROFILE_ENABLED:
+            PROFILERS[scan_id] = ProcSampler(pids, PROFILE_INTERVAL_SEC, PROFILE_MAX_SAMPLES).start()
+
+    t0 = time.perf_counter()
+    exit_code = None
+    try:
+        codes = fanout.run_parts(jadx_worker_cmd(heap_mb or JADX_WARM_HEAP_MB), apk_path, groups,
+                                 fanout_root(scan_id), threads, on_line, timeout_sec, on_started=on_started,
+                                 resources=not skip_resources)
+        exit_code = next((c for c in codes if c not in (0, None)), 0)
+    except RuntimeError as e:
+        if started:
+            raise
+        push_log(scan_id, f"[fanout] {e}, running a single JADX process instead")
+        shutil.rmtree(fanout_root(scan_id), ignore_errors=True)
+        return False
+    finally:
+        sampler = PROFILERS.get(scan_id)
+        if started and sampler is not None:
+            try:
+                finish_profile(scan_id, sampler, exit_code, threads)
+            except Exception as e:
+                push_log(scan_id, f"[profile] failed: {e}")
+    jadx_sec = time.perf_counter() - t0
+
+    check_jadx_result(oom, exit_code, heap_mb, threads)
+    t0 = time.perf_counter()
+    info = fanout.merge_parts(fanout_root(scan_id), output_dir, len(groups))
+    merge_sec = time.perf_counter() - t0
+    if info["conflicts"]:
+        push_log(scan_id, f"[fanout] {len(info['conflicts'])} path clash(es) between parts, kept the first: "
+                          + ", ".join(info["conflicts"][:10]))
+    if scan_id in JOBS:
+        JOBS[scan_id]["fanout"] = {
+            "parts": len(groups),
+            "threads_per_part": threads,
+            "classes": [len(g) for g in groups],
+            "jadx_sec": round(jadx_sec, 2),
+            "merge_sec": round(merge_sec, 2),
+            "files": info["files"],
+            "conflicts": len(info["conflicts"]),
+        }
+    push_log(scan_id, f"JADX finished successfully, merged {info['files']} files from {len(groups)} parts "
+                      f"in {merge_sec:.2f}s.")
+    return True
+
+def mark_available(scan_id: str, *parts: str, reset: bool = False):
+    # parts of the output ("sources", "resources") that are complete on disk;
+    # reset=True starts over from nothing available (output was cleared)
+    job = JOBS.get(scan_id)
+    if job is None:
+        return
+    available = {"sources": False, "resources": False}
+    if not reset:
+        available.update(job.get("available") or {})
+    for part in parts:
+        available[part] = True
+    job["available"] = available
+    HUB.publish(scan_id, "available", available)
+
+def resources_heap_mb(heap_mb: int | None) -> int:
+    return max(JADX_RES_HEAP_MB, (heap_mb or 0) // 2)
+
+def run_resources_pass(scan_id: str, output_dir: str, apk_path: str, timeout_sec: int, heap_mb: int):
+    cmd = ["jadx", "--no-src", "--threads-count", "1", "--log-level", "INFO", "-d", output_dir, apk_path]
+    # not profiled: /profile follows the sources pass
+    run_jadx_cli(scan_id, cmd, heap_mb, timeout_sec, 1, prefix="[resources] ", profile=False)
+
+def run_jadx_split(scan_id: str, output_dir: str, apk_path: str, timeout_sec: int, threads: int,
+                   heap_mb: int | None, class_list: str | None, parts: int):
+    # resources pass in the background, sources pass (whatever mode) here
+    errors = []
+
+    def resources():
+        t0 = time.perf_counter()
+        try:
+            run_resources_pass(scan_id, output_dir, apk_path, timeout_sec, resources_heap_mb(heap_mb))
+        except Exception as e:
+            errors.append(e)
+            return
+        mark_available(scan_id, "resources")
+        push_log(scan_id, f"Resources ready after {time.perf_counter() - t0:.1f}s, sources still decompiling.")
 
-    if proc.returncode != 0:
-        raise RuntimeError(f"JADX failed with exit code {proc.returncode}")
+    res_thread = threading.Thread(target=resources, daemon=True)
+    res_thread.start()
+    try:
+        if class_list is not None and os.path.getsize(class_list) == 0:
+            push_log(scan_id, "No classes to decompile, only resources.")
+        else:
+            run_jadx_stream(scan_id, output_dir, apk_path, timeout_sec, threads, heap_mb, class_list,
+                            skip_resources=True, parts=parts)
+    finally:
+        # clear_output() on an OOM retry must not race the other pass
+        res_thread.join()
+    if errors:
+        raise errors[0]
+
+def run_jadx_stream(scan_id: str, output_dir: str, apk_path: str, timeout_sec: int = 3600, threads: int = 1,
+                    heap_mb: int | None = None, class_list: str | None = None, skip_resources: bool = False,
+                    parts: int = 1):
+    # class_list: file of top-level class names, JADX decompiles only those.
+    # parts > 1: fan-out over that many JVMs with `threads` each
+    if JADX_SPLIT_PASSES and not skip_resources:
+        return run_jadx_split(scan_id, output_dir, apk_path, timeout_sec, threads, heap_mb, class_list, parts)
+    if parts > 1 and class_list is None:
+        if scan_id in JOBS:
+            JOBS[scan_id]["jadx_mode"] = "fanout"
+        JADX_RUNS.inc(1, "fanout")
+        if run_jadx_fanout(scan_id, output_dir, apk_path, parts, timeout_sec, threads, heap_mb, skip_resources):
+            return
+        threads *= parts
+
+    worker = None
+    if JADX_POOL is not None and (heap_mb or 0) <= JADX_WARM_HEAP_MB:
+        worker = JADX_POOL.acquire(timeout=JADX_WARM_WAIT_SEC)
+    mode = "warm" if worker is not None else "oneshot" if class_list else "cold"
+    if scan_id in JOBS:
+        JOBS[scan_id]["jadx_mode"] = mode
+    JADX_RUNS.inc(1, mode)
+    if worker is not None:
+        return run_jadx_warm(scan_id, worker, output_dir, apk_path, timeout_sec, threads,
+                             class_list=class_list, skip_resources=skip_resources)
+    if class_list:
+        worker = start_oneshot_worker(scan_id, heap_mb)
+        return run_jadx_warm(scan_id, worker, output_dir, apk_path, timeout_sec, threads,
+                             class_list=class_list, skip_resources=skip_resources,
+                             release=WarmWorker.stop, heap_mb=heap_mb)
+
+    push_log(scan_id, "Starting JADX with verbose logs...")
+    cmd = [
+        "jadx",
+        "--threads-count", str(threads),
+        "--verbose",
+        "--log-level", "DEBUG",
+        "--show-bad-code",
+        *(["--no-res"] if skip_resources else []),
+        "-d", output_dir,
+        apk_path
+    ]
+
+    run_jadx_cli(scan_id, cmd, heap_mb, timeout_sec, threads)
 
     push_log(scan_id, "JADX finished successfully.")
 
+# -------------------------
+# POST-JADX INDEXES (stored under <scan_dir>/index, cached with the output)
+# -------------------------
+def build_indexes(scan_id: str, output_dir: str):
+    if os.path.isfile(manifest_db_path(scan_id)):
+        push_log(scan_id, "Output manifest already present.")
+    else:
+        info = manifest.build_manifest(output_dir, MANIFEST_ROOTS, manifest_db_path(scan_id))
+        push_log(scan_id, f"Output manifest: {info['files']} files, {info['dirs']} dirs in {info['build_sec']}s")
+
+    if os.path.isfile(search_db_path(scan_id)):
+        push_log(scan_id, "Search index already present.")
+    elif os.path.isdir(os.path.join(output_dir, "sources")):
+        push_log(scan_id, "Building search index...")
+        info = textindex.build_index(output_dir, "sources", search_db_path(scan_id))
+        push_log(scan_id, f"Search index: {info['files']} files, {info['bytes']/1024/1024:.2f} MB in {info['build_sec']}s")
+
+    if os.path.isfile(symbols_db_path(scan_id)):
+        push_log(scan_id, "Symbol index already present.")
+    elif os.path.isdir(os.path.join(output_dir, "sources")):
+        push_log(scan_id, "Building symbol index...")
+        info = build_symbol_index(output_dir, symbols_db_path(scan_id))
+        push_log(scan_id, f"Symbol index: {info['symbols']} symbols from {info['files']} files "
+                          f"({info['procs']} procs) in {info['build_sec']}s")
+
+# Concurrent builds (one per indexing job) share SYMBOL_INDEX_PROCS parser
+# processes instead of each spawning a pool of its own; started on first use.
+SYMBOL_POOL: ProcessPoolExecutor | None = None
+SYMBOL_POOL_LOCK = threading.Lock()
+
+def build_symbol_index(output_dir: str, db_path: str) -> dict:
+    global SYMBOL_POOL
+    with SYMBOL_POOL_LOCK:
+        if SYMBOL_POOL is None and SYMBOL_INDEX_PROCS > 1:
+            SYMBOL_POOL = symindex.make_pool(SYMBOL_INDEX_PROCS)
+        pool = SYMBOL_POOL
+    try:
+        return symindex.build_symbol_index(output_dir, "sources", db_path, procs=SYMBOL_INDEX_PROCS, pool=pool)
+    except BrokenProcessPool:
+        # a parser process died; the next build starts a fresh pool
+        with SYMBOL_POOL_LOCK:
+            if SYMBOL_POOL is pool:
+                SYMBOL_POOL = None
+        raise
+
+# -------------------------
+# LAZY SCANS (classes decompiled on first request)
+# -------------------------
+# The worker only lists the APK's top-level classes (dexfile.py, no JVM) into a
+# manifest of would-be sources/ paths. /file and /browse call lazy_decompile(),
+# which runs `jadx --single-class` for that one class and keeps the result in
+# sources/ like a normal scan. One run per class at a time; runs are admitted by
+# LAZY_SCHED (LAZY_MAX_CONCURRENT slots, LAZY_MEM_BUDGET_MB), not behind the
+# full scans in SCHED. They still show up in MemAvailable, which SCHED checks.
+LAZY_SCHED = JobScheduler(LAZY_MAX_CONCURRENT, LAZY_MEM_BUDGET_MB, LAZY_MAX_CONCURRENT, poll_sec=0.5)
+LAZY_LOCKS: Dict[str, threading.Lock] = {}
+LAZY_LOCKS_GUARD = threading.Lock()
+
+def build_lazy_manifest(scan_id: str, apk_path: str) -> dict:
+    classes = dexfile.apk_classes(apk_path)
+    return manifest.build_class_manifest(
+        [(dexfile.source_path(c["name"]), c["name"]) for c in classes], manifest_db_path(scan_id))
+
+def is_lazy_scan(scan_id: str) -> bool:
+    job = JOBS.get(scan_id)
+    mode = job.get("mode") if job is not None else (read_meta(scan_id) or {}).get("mode")
+    return mode == "lazy"
+
+def lazy_decompile(scan_id: str, rel: str) -> bool:
+    # False when rel is not a class file of this lazy scan
+    mdb = manifest_db_path(scan_id)
+    if not rel.startswith("sources/") or not os.path.isfile(mdb) or not is_lazy_scan(scan_id):
+        return False
+    name = manifest.class_for_path(mdb, rel)
+    if name is None:
+        return False
+
+    target = os.path.join(scan_dir(scan_id), rel)
+    key = f"{scan_id}/{rel}"
+    with LAZY_LOCKS_GUARD:
+        lock = LAZY_LOCKS.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            if os.path.isfile(target):
+                return True
+            with STAGE_SECONDS.time("lazy_class"):
+                try:
+                    run_jadx_single_class(scan_id, name, target)
+                except SlotUnavailable:
+                    LAZY_CLASSES.inc(1, "busy")
+                    raise HTTPException(503, f"all lazy decompile slots are busy, retry {name} shortly",
+                                        headers={"Retry-After": str(max(1, int(LAZY_SLOT_WAIT_SEC)))})
+                except RuntimeError as e:
+                    LAZY_CLASSES.inc(1, "error")
+                    raise HTTPException(502, f"decompiling {name} failed: {e}")
+            LAZY_CLASSES.inc(1, "ok")
+        return True
+    finally:
+        with LAZY_LOCKS_GUARD:
+            LAZY_LOCKS.pop(key, None)
+
+def lazy_heap_mb(dex_bytes: int) -> int:
+    heap_mb = JADX_BASE_MEM_MB - JADX_JVM_OVERHEAD_MB + int(dex_bytes / 1024 / 1024 * LAZY_MEM_PER_DEX_MB)
+    return max(JADX_MIN_HEAP_MB, min(JADX_MAX_HEAP_MB, heap_mb))
+
+def run_jadx_single_class(scan_id: str, name: str, target: str):
+    sdir = scan_dir(scan_id)
+    apk_path = os.path.join(sdir, "app.apk")
+    tmp_dir = os.path.join(sdir, f".lazy-{threading.get_ident()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    heap_mb = lazy_heap_mb(apk_dex_bytes(apk_path))
+    env = os.environ.copy()
+    env["JADX_OPTS"] = (env.get("JADX_OPTS", "") + " " + jvmheap.jvm_opts(heap_mb)).strip()
+    cmd = [
+        "jadx",
+        "--single-class", name,
+        "--single-class-output", tmp_dir,
+        "--no-res",
+        "--show-bad-code",
+        "--threads-count", "1",
+        apk_path,
+    ]
+    try:
+        with LAZY_SCHED.slot(f"{scan_id}/lazy:{name}", heap_mb + JADX_JVM_OVERHEAD_MB, wait=LAZY_SLOT_WAIT_SEC):
+            p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               timeout=LAZY_CLASS_TIMEOUT_SEC, env=env)
+        produced = [os.path.join(root, f) for root, _dirs, files in os.walk(tmp_dir) for f in files if f.endswith(".java")]
+        if p.returncode != 0 or not produced:
+            tail = [line for line in p.stdout.splitlines() if line.strip()][-1:] or [f"exit code {p.returncode}"]
+            raise RuntimeError(tail[0])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(produced[0], target)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError("JADX timed out")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# -------------------------
+# INCREMENTAL SCANS (baseline = earlier scan of another version of the app)
+# -------------------------
+# Top-level classes (nested classes included) are hashed from their bytecode
+# with index operands resolved to names (dexfile.DexHasher), so a class that
+# only moved around in the dex tables still matches. Classes whose hash equals
+# the baseline's get the baseline's .java linked in, JADX decompiles the rest
+# (JadxWorker class filter). resources/ is linked too when every non-dex APK
+# entry is unchanged; META-INF/ (signatures, changes with every build) is
+# copied from the new APK instead.
+#
+# This is an approximation: JADX output of a class can depend on other classes
+# (inlined constants, renames, resolved overrides), which its hash does not see.
+# Incremental results are therefore not put in the result cache.
+def check_baseline(baseline: str, scan_id: str | None, mode: str):
+    if mode == "lazy":
+        raise HTTPException(400, "baseline does not apply to lazy scans")
+    if baseline == scan_id:
+        raise HTTPException(400, "a scan cannot be its own baseline")
+    meta = read_meta(baseline)
+    if meta is None:
+        raise HTTPException(404, "baseline scan_id not found")
+    if meta.get("status") != "done" or meta.get("mode") == "lazy":
+        raise HTTPException(409, f"baseline must be a finished full scan (status={meta.get('status')}, "
+                                 f"mode={meta.get('mode') or 'full'})")
+
+def save_class_hashes(scan_id: str, hashes: dict):
+    os.makedirs(index_dir(scan_id), exist_ok=True)
+    tmp = f"{class_hashes_path(scan_id)}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, separators=(",", ":"))
+    os.replace(tmp, class_hashes_path(scan_id))
+
+def scan_class_hashes(scan_id: str) -> dict:
+    # cached in the scan's index/; computed from its app.apk the first time
+    try:
+        with open(class_hashes_path(scan_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    hashes = dexfile.apk_class_hashes(os.path.join(scan_dir(scan_id), "app.apk"))
+    save_class_hashes(scan_id, hashes)
+    return hashes
+
+def apk_resource_crcs(apk_path: str) -> dict[str, int]:
+    # what JADX turns into resources/: every entry but the dex files and signatures
+    with zipfile.ZipFile(apk_path) as z:
+        dex = set(dexfile.dex_names(z))
+        return {i.filename: i.CRC for i in z.infolist()
+                if not i.is_dir() and i.filename not in dex and not i.filename.startswith("META-INF/")}
+
+def baseline_output(base_id: str) -> tuple[str, packstore.PackReader | None]:
+    # (scan dir, pack): a packed baseline has its sources/ and resources/ in output.zip
+    bdir = scan_dir(base_id)
+    pack = None if os.path.isdir(os.path.join(bdir, "sources")) else scan_pack(base_id)
+    return bdir, pack
+
+def plan_incremental(scan_id: str, base_id: str, apk_path: str) -> dict:
+    t0 = time.perf_counter()
+    new = dexfile.apk_class_hashes(apk_path)
+    old = scan_class_hashes(base_id)
+    hash_sec = time.perf_counter() - t0
+
+    bdir, pack = baseline_output(base_id)
+    reuse, decompile = [], []
+    for name, c in sorted(new.items()):
+        rel = f"sources/{c['path']}"
+        prev = old.get(name)
+        if prev and prev["hash"] == c["hash"] and (
+                os.path.isfile(os.path.join(bdir, rel)) if pack is None else pack.getinfo(rel) is not None):
+            reuse.append(rel)
+        else:
+            # changed, new, or JADX put the baseline's output somewhere else
+            decompile.append(name)
+
+    base_apk = os.path.join(bdir, "app.apk")
+    resources_reused = os.path.isfile(base_apk) and apk_resource_crcs(base_apk) == apk_resource_crcs(apk_path)
+    return {
+        "baseline": base_id,
+        "hashes": new,
+        "reuse": reuse,
+        "decompile": decompile,
+        "base_classes": len(old),
+        "removed": len(old.keys() - new.keys()),
+        "resources_reused": resources_reused,
+        "hash_sec": round(hash_sec, 2),
+    }
+
+def link_baseline_output(scan_id: str, inc: dict, apk_path: str) -> float:
+    # links (or copies out of a packed baseline) what the plan reuses; seconds taken
+    t0 = time.perf_counter()
+    sdir = scan_dir(scan_id)
+    bdir, pack = baseline_output(inc["baseline"])
+    rels = list(inc["reuse"])
+    if inc["resources_reused"]:
+        if pack is None:
+            rels += [os.path.relpath(os.path.join(root, f), bdir).replace(os.sep, "/")
+                     for root, _dirs, files in os.walk(os.path.join(bdir, "resources")) for f in files]
+        else:
+            rels += [n for n in pack.zf.namelist() if n.startswith("resources/") and not n.endswith("/")]
+        rels = [r for r in rels if not r.startswith("resources/META-INF/")]
+
+    for rel in rels:
+        dst = os.path.join(sdir, rel)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if pack is None:
+            link_part(os.path.join(bdir, rel), dst)
+        else:
+            with pack.open(rel) as src, open(dst, "wb") as out:
+                shutil.copyfileobj(src, out)
+
+    if inc["resources_reused"]:
+        with zipfile.ZipFile(apk_path) as z:
+            for info in z.infolist():
+                if info.filename.startswith("META-INF/") and not info.is_dir():
+                    z.extract(info, os.path.join(sdir, "resources"))
+    return time.perf_counter() - t0
+
+def class_list_path(scan_id: str) -> str:
+    return os.path.join(scan_dir(scan_id), ".incremental-classes")
+
+def write_class_list(scan_id: str, names: list[str]) -> str:
+    path = class_list_path(scan_id)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(n + "\n" for n in names))
+    return path
+
+def incremental_report(inc: dict, link_sec: float, jadx_sec: float) -> dict:
+    # est_saved_sec: the baseline's full JADX time, scaled to this APK's class
+    # count, minus what this run spent; None when the baseline was not profiled
+    base = read_meta(inc["baseline"]) or {}
+    if base.get("incremental"):
+        base_full = base["incremental"].get("est_full_jadx_sec")
+    else:
+        base_full = (base.get("profile") or {}).get("duration_sec")
+    classes = len(inc["reuse"]) + len(inc["decompile"])
+    est_full = round(base_full * classes / max(inc["base_classes"], 1), 2) if base_full else None
+    spent = inc["hash_sec"] + link_sec + jadx_sec
+    return {
+        "baseline": inc["baseline"],
+        "classes": classes,
+        "reused": len(inc["reuse"]),
+        "decompiled": len(inc["decompile"]),
+        "removed": inc["removed"],
+        "resources_reused": inc["resources_reused"],
+        "hash_sec": inc["hash_sec"],
+        "link_sec": round(link_sec, 2),
+        "jadx_sec": round(jadx_sec, 2),
+        "est_full_jadx_sec": est_full,
+        "est_saved_sec": round(est_full - spent, 2) if est_full is not None else None,
+    }
+
+# -------------------------
+# PACKED OUTPUT (sources/ + resources/ -> output.zip)
+# -------------------------
+# /browse keeps working from the manifest and /file, /search read members
+# straight out of the archive, so the per-file trees can be deleted.
+def pack_output(scan_id: str) -> dict:
+    sdir = scan_dir(scan_id)
+    if not os.path.isfile(manifest_db_path(scan_id)):
+        manifest.build_manifest(sdir, MANIFEST_ROOTS, manifest_db_path(scan_id))
+    return packstore.pack_tree(sdir, MANIFEST_ROOTS, pack_path(scan_id), level=PACK_LEVEL)
+
+def unpack_output(scan_id: str) -> int:
+    return packstore.unpack_tree(pack_path(scan_id), scan_dir(scan_id))
+
+# -------------------------
+# STAGE CHECKPOINTS
+# -------------------------
+# Recorded in JOBS[scan_id]["checkpoints"] and persisted with the next
+# write_meta(). A stage is skipped on resume only if its checkpoint exists
+# and its output is still on disk; redoing a stage drops the later ones.
+STAGES = ("downloaded", "decompiled", "indexed")
+
+def checkpoint(scan_id: str, stage: str, **info):
+    JOBS[scan_id].setdefault("checkpoints", {})[stage] = {"at": int(time.time()), **info}
+
+def drop_checkpoints(scan_id: str, from_stage: str):
+    cps = JOBS[scan_id].setdefault("checkpoints", {})
+    for stage in STAGES[STAGES.index(from_stage):]:
+        cps.pop(stage, None)
+
+def clear_output(scan_id: str):
+    # leftovers of an interrupted JADX run / older output under the same scan_id
+    sdir = scan_dir(scan_id)
+    for part in ("sources", "resources", "index"):
+        shutil.rmtree(os.path.join(sdir, part), ignore_errors=True)
+    shutil.rmtree(fanout_root(scan_id), ignore_errors=True)
+    if os.path.isfile(pack_path(scan_id)):
+        os.remove(pack_path(scan_id))
+
+def output_present(scan_id: str) -> bool:
+    if JOBS[scan_id].get("mode") == "lazy" and os.path.isfile(manifest_db_path(scan_id)):
+        return True
+    return os.path.isdir(os.path.join(scan_dir(scan_id), "sources")) or os.path.isfile(pack_path(scan_id))
+
 # -------------------------
 # WORKER: download + decompile
 # -------------------------
-def worker(scan_id: str, apk_url: str):
+# apk_url=None means the APK was uploaded and is already at <scan_dir>/app.apk
+def worker(scan_id: str, apk_url: str | None, threads: int | None = None, apk_sha256: str | None = None):
+    JOBS.pin(scan_id)
+    log_writer(scan_id)
+    started_at = time.perf_counter()
     try:
         if scan_id not in JOBS:
             JOBS[scan_id] = {}
+        if JOBS[scan_id].get("enqueued_at"):
+            STAGE_SECONDS.observe(time.time() - JOBS[scan_id]["enqueued_at"], "queue_wait")
         init_job_logs(scan_id)
 
         # ✅ Persistent scan directory: /data/scans/scan_id_<id>
         output_dir = scan_dir(scan_id)
         os.makedirs(output_dir, exist_ok=True)
-
-        # Save meta early (so /status works even after restart)
-        JOBS[scan_id]["status"] = "downloading"
+        apk_path = os.path.join(output_dir, "app.apk")
         JOBS[scan_id]["apk_url"] = apk_url
         JOBS[scan_id]["output_dir"] = output_dir
-        write_meta(scan_id, {
-            "status": "downloading",
-            "apk_url": apk_url,
-            "output_dir": output_dir
-        })
-
-        push_log(scan_id, f"Downloading APK: {apk_url}")
-        apk_path = os.path.join(output_dir, "app.apk")
-
-        r = requests.get(apk_url, stream=True, timeout=(20, 300), allow_redirects=True)
-        if r.status_code != 200:
-            raise RuntimeError(f"Download failed. status={r.status_code}")
-
-        total = 0
-        with open(apk_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
-                    total += len(chunk)
-
-        push_log(scan_id, f"Download complete: {total/1024/1024:.2f} MB")
-
-        JOBS[scan_id]["status"] = "decompiling"
-        write_meta(scan_id, {
-            "status": "decompiling",
-            "apk_url": apk_url,
-            "output_dir": output_dir
-        })
-        push_log(scan_id, "Running JADX...")
-
-        run_jadx_stream(scan_id, output_dir, apk_path, timeout_sec=3600)
+        cps = JOBS[scan_id].setdefault("checkpoints", {})
+
+        downloaded = cps.get("downloaded")
+        if downloaded and os.path.isfile(apk_path) and sha256_file(apk_path) == downloaded["apk_sha256"]:
+            apk_sha256 = downloaded["apk_sha256"]
+            push_log(scan_id, "Resuming: APK already downloaded, sha256 verified.")
+        elif apk_url:
+            drop_checkpoints(scan_id, "downloaded")
+            # Save meta early (so /status works even after restart)
+            JOBS[scan_id]["status"] = "downloading"
+            write_meta(scan_id, {
+                "status": "downloading",
+                "apk_url": apk_url,
+                "output_dir": output_dir
+            })
+
+            push_log(scan_id, f"Downloading APK: {apk_url}")
+            started = time.time()
+
+            def progress(done: int, total: int | None):
+                sec = max(time.time() - started, 1e-6)
+                JOBS[scan_id]["download"] = {
+                    "bytes_done": done,
+                    "bytes_total": total,
+                    "mb_per_sec": round(done / 1024 / 1024 / sec, 2),
+                }
+
+            dl = DOWNLOADER.download(apk_url, apk_path, progress=progress)
+            JOBS[scan_id]["download"] = dl
+            STAGE_SECONDS.observe(dl["seconds"], "download")
+            DOWNLOAD_BYTES.inc(dl["fetched_bytes"])
+            if dl["resumed_bytes"]:
+                push_log(scan_id, f"Resumed download at {dl['resumed_bytes']/1024/1024:.2f} MB")
+            push_log(scan_id, f"Download complete: {dl['bytes']/1024/1024:.2f} MB in {dl['seconds']:.1f}s "
+                              f"({dl['mb_per_sec']:.2f} MB/s, {dl['segments']} segment(s))")
+            with STAGE_SECONDS.time("hash"):
+                apk_sha256 = sha256_file(apk_path)
+            checkpoint(scan_id, "downloaded", apk_sha256=apk_sha256, bytes=os.path.getsize(apk_path))
+        else:
+            drop_checkpoints(scan_id, "downloaded")
+            if not os.path.isfile(apk_path):
+                raise RuntimeError("Uploaded APK is missing, upload it again")
+            push_log(scan_id, f"Using uploaded APK: {os.path.getsize(apk_path)/1024/1024:.2f} MB")
+            apk_sha256 = apk_sha256 or sha256_file(apk_path)
+            checkpoint(scan_id, "downloaded", apk_sha256=apk_sha256, bytes=os.path.getsize(apk_path))
+
+        JOBS[scan_id]["apk_sha256"] = apk_sha256
+        push_log(scan_id, f"APK sha256: {apk_sha256}")
+
+        lazy = JOBS[scan_id].get("mode") == "lazy"
+        cache_hit = False
+        decompiled = cps.get("decompiled")
+        if decompiled and output_present(scan_id):
+            cache_hit = decompiled.get("cache_hit", False)
+            push_log(scan_id, "Resuming: decompiled output already complete.")
+        else:
+            drop_checkpoints(scan_id, "decompiled")
+            clear_output(scan_id)
+            mark_available(scan_id, reset=True)
+
+            # ✅ Same APK already decompiled? link its output instead of running JADX again
+            if RESULT_CACHE is not None and RESULT_CACHE.lookup(apk_sha256):
+                cache_hit = RESULT_CACHE.restore(apk_sha256, output_dir)
+                if cache_hit:
+                    push_log(scan_id, "Result cache hit, reusing existing output.")
+                    checkpoint(scan_id, "decompiled", cache_hit=True)
+
+        # lazy mode still takes a full result from the cache when there is one
+        if lazy and cache_hit:
+            JOBS[scan_id]["mode"] = "full"
+            lazy = False
+        if lazy and "decompiled" not in cps:
+            JOBS[scan_id]["status"] = "listing"
+            write_meta(scan_id, {
+                "status": "listing",
+                "apk_url": apk_url,
+                "apk_sha256": apk_sha256,
+                "output_dir": output_dir
+            })
+            with STAGE_SECONDS.time("class_list"):
+                info = build_lazy_manifest(scan_id, apk_path)
+            push_log(scan_id, f"Lazy mode: listed {info['files']} classes in {info['build_sec']}s, "
+                              f"they are decompiled on first request.")
+            checkpoint(scan_id, "decompiled", cache_hit=False, lazy=True)
+        elif not cache_hit and "decompiled" not in cps:
+            JOBS[scan_id]["status"] = "decompiling"
+            write_meta(scan_id, {
+                "status": "decompiling",
+                "apk_url": apk_url,
+                "apk_sha256": apk_sha256,
+                "output_dir": output_dir
+            })
+
+            inc = None
+            baseline = JOBS[scan_id].get("baseline")
+            if baseline:
+                try:
+                    with STAGE_SECONDS.time("class_diff"):
+                        inc = plan_incremental(scan_id, baseline, apk_path)
+                    push_log(scan_id, f"Incremental against {baseline}: {len(inc['reuse'])} classes unchanged, "
+                                      f"{len(inc['decompile'])} to decompile, {inc['removed']} removed, resources "
+                                      f"{'unchanged' if inc['resources_reused'] else 'changed'} ({inc['hash_sec']}s)")
+                except Exception as e:
+                    push_log(scan_id, f"[incremental] diff against {baseline} failed, decompiling everything: {e}")
+            class_list = write_class_list(scan_id, inc["decompile"]) if inc is not None else None
+            link_sec = jadx_sec = 0.0
+
+            if inc is not None and not inc["decompile"] and inc["resources_reused"]:
+                link_sec = link_baseline_output(scan_id, inc, apk_path)
+                push_log(scan_id, "Nothing changed since the baseline, JADX skipped.")
+                checkpoint(scan_id, "decompiled", cache_hit=False, incremental=True)
+            else:
+                dex_bytes = apk_dex_bytes(apk_path)
+                JOBS[scan_id]["dex_bytes"] = dex_bytes
+                plan = HEAP.plan(apk_sha256, dex_bytes, estimate_job_mem_mb(dex_bytes))
+                want_parts = fanout_parts(apk_path, JOBS[scan_id].get("parts")) if class_list is None else 1
+                res_pass = JADX_SPLIT_PASSES and not (inc is not None and inc["resources_reused"])
+                attempt = 1
+                while True:
+                    parts = min(want_parts, max(1, JOB_MEM_BUDGET_MB // HEAP.est_mem_mb(plan)))
+                    est_mb = HEAP.est_mem_mb(plan) * parts
+                    if res_pass:
+                        est_mb += resources_heap_mb(plan["heap_mb"]) + JADX_JVM_OVERHEAD_MB
+                    JOBS[scan_id]["est_mem_mb"] = est_mb
+                    push_log(scan_id, f"Waiting for a JADX slot (dex {dex_bytes/1024/1024:.2f} MB, est. {est_mb} MB RAM"
+                                      + (f", {parts} parts" if parts > 1 else "") + ")...")
+
+                    slot_t0 = time.perf_counter()
+                    with SCHED.slot(scan_id, est_mb):
+                        STAGE_SECONDS.observe(time.perf_counter() - slot_t0, "slot_wait")
+                        jadx_threads = threads or choose_jadx_threads(dex_bytes)
+                        if parts > 1:
+                            jadx_threads = max(1, jadx_threads // parts)  # per part
+                        if plan["max_threads"]:
+                            jadx_threads = min(jadx_threads, plan["max_threads"])
+                        JOBS[scan_id]["jadx_threads"] = jadx_threads
+                        JOBS[scan_id]["jvm"] = {**plan, "attempt": attempt}
+                        if inc is not None:
+                            # again on every attempt, an OOM retry starts from clear_output()
+                            link_sec = link_baseline_output(scan_id, inc, apk_path)
+                            if inc["resources_reused"]:
+                                mark_available(scan_id, "resources")
+                        push_log(scan_id, f"Running JADX with {jadx_threads} thread(s), "
+                                          f"heap {plan['heap_mb']} MB ({plan['source']})...")
+                        jadx_t0 = time.perf_counter()
+                        try:
+                            with STAGE_SECONDS.time("jadx"):
+                                run_jadx_stream(scan_id, output_dir, apk_path, timeout_sec=3600,
+                                                threads=jadx_threads, heap_mb=plan["heap_mb"], class_list=class_list,
+                                                skip_resources=inc is not None and inc["resources_reused"],
+                                                parts=parts)
+                            break
+                        except JadxOutOfMemory:
+                            JADX_OOMS.inc()
+                            if JOBS[scan_id].get("jadx_mode") == "warm":
+                                # the warm worker's heap was the one that ran out
+                                plan = {**plan, "heap_mb": max(plan["heap_mb"], JADX_WARM_HEAP_MB)}
+                            retry_plan = HEAP.escalate(plan, jadx_threads) if JADX_OOM_RETRY and attempt == 1 else None
+                            if retry_plan is None:
+                                raise
+                            push_log(scan_id, f"JADX ran out of memory, retrying with heap {retry_plan['heap_mb']} MB"
+                                              + (f", max {retry_plan['max_threads']} thread(s)" if retry_plan["max_threads"] else ""))
+                            plan = retry_plan
+                            attempt += 1
+                        except JadxWorkerUnavailable as e:
+                            # only JadxWorker can apply a class filter; without it decompile
+                            # everything, over whatever the baseline already linked in
+                            push_log(scan_id, f"[incremental] {e}, decompiling everything instead")
+                            inc = class_list = None
+                            want_parts = fanout_parts(apk_path, JOBS[scan_id].get("parts"))
+                            res_pass = JADX_SPLIT_PASSES
+                        finally:
+                            jadx_sec += time.perf_counter() - jadx_t0
+                    # the slot is re-acquired with the new estimate
+                    clear_output(scan_id)
+                    mark_available(scan_id, reset=True)
+                HEAP.record(apk_sha256, dex_bytes, plan, jadx_threads, attempt)
+                checkpoint(scan_id, "decompiled", cache_hit=False, jadx_threads=jadx_threads, jvm_heap_mb=plan["heap_mb"],
+                           incremental=inc is not None)
+
+            if inc is not None:
+                save_class_hashes(scan_id, inc["hashes"])
+                report = incremental_report(inc, link_sec, jadx_sec)
+                JOBS[scan_id]["incremental"] = report
+                INCREMENTAL_CLASSES.inc(report["reused"], "reused")
+                INCREMENTAL_CLASSES.inc(report["decompiled"], "decompiled")
+                push_log(scan_id, f"Incremental: reused {report['reused']}, decompiled {report['decompiled']} of "
+                                  f"{report['classes']} classes, est. {report['est_saved_sec']}s saved")
+
+        # lazy scans have nothing to index, pack or cache yet
+        if not lazy:
+            mark_available(scan_id, "sources", "resources")
+            JOBS[scan_id]["status"] = "indexing"
+            write_meta(scan_id, {
+                "status": "indexing",
+                "apk_url": apk_url,
+                "apk_sha256": apk_sha256,
+                "output_dir": output_dir
+            })
+            if "indexed" in cps:
+                push_log(scan_id, "Resuming: indexes already built.")
+            else:
+                try:
+                    with STAGE_SECONDS.time("indexing"):
+                        build_indexes(scan_id, output_dir)
+                    checkpoint(scan_id, "indexed")
+                except Exception as e:
+                    # indexes are an extra, the decompiled output is still usable
+                    push_log(scan_id, f"[index] build failed: {e}")
+
+        if PACK_OUTPUT and not lazy and not os.path.isfile(pack_path(scan_id)):
+            try:
+                with STAGE_SECONDS.time("pack"):
+                    info = pack_output(scan_id)
+                JOBS[scan_id]["pack"] = info
+                push_log(scan_id, f"Packed {info['files']} files into {packstore.PACK_NAME}: "
+                                  f"{info['disk_bytes_before']/1024/1024:.2f} MB / {info['inodes_before']} inodes -> "
+                                  f"{info['disk_bytes_after']/1024/1024:.2f} MB / {info['inodes_after']} inodes "
+                                  f"in {info['pack_sec']}s")
+            except Exception as e:
+                push_log(scan_id, f"[pack] failed, keeping plain output: {e}")
+
+        # incremental output is partly the baseline's (see INCREMENTAL SCANS), keep it out of the cache
+        incremental = bool((cps.get("decompiled") or {}).get("incremental"))
+        if not cache_hit and not lazy and not incremental and RESULT_CACHE is not None:
+            try:
+                with STAGE_SECONDS.time("cache_store"):
+                    RESULT_CACHE.store(apk_sha256, output_dir, scan_id)
+            except Exception as e:
+                push_log(scan_id, f"[result-cache] store failed: {e}")
 
         JOBS[scan_id]["status"] = "done"
+        JOBS[scan_id]["cache_hit"] = cache_hit
         JOBS[scan_id]["sources_dir"] = os.path.join(output_dir, "sources")
         JOBS[scan_id]["resources_dir"] = os.path.join(output_dir, "resources")
 
+        output_info = {}
+        if os.path.isfile(manifest_db_path(scan_id)):
+            output_info = manifest.manifest_info(manifest_db_path(scan_id))
+
+        push_log(scan_id, f"DONE. Output stored at: {output_dir}")
+
         write_meta(scan_id, {
             "status": "done",
             "apk_url": apk_url,
+            "apk_sha256": apk_sha256,
+            "cache_hit": cache_hit,
+            "apk_bytes": os.path.getsize(apk_path),
+            "output_bytes": int(output_info["bytes"]) if "bytes" in output_info else None,
+            "output_files": int(output_info["files"]) if "files" in output_info else None,
+            "download": JOBS[scan_id].get("download"),
+            "jadx_threads": JOBS[scan_id].get("jadx_threads"),
+            "jvm": JOBS[scan_id].get("jvm"),
+            "jadx_mode": JOBS[scan_id].get("jadx_mode"),
+            "incremental": JOBS[scan_id].get("incremental"),
+            "fanout": JOBS[scan_id].get("fanout"),
+            "available": JOBS[scan_id].get("available"),
+            "pack": JOBS[scan_id].get("pack"),
+            "profile": JOBS[scan_id].get("profile"),
             "output_dir": output_dir,
             "sources_dir": os.path.join(output_dir, "sources"),
             "resources_dir": os.path.join(output_dir, "resources"),
         })
-
-        push_log(scan_id, f"DONE. Output stored at: {output_dir}")
+        STAGE_SECONDS.observe(time.perf_counter() - started_at, "total")
+        JOBS_FINISHED.inc(1, "done")
+        APK_BYTES.observe(os.path.getsize(apk_path))
+        if "bytes" in output_info:
+            OUTPUT_BYTES.observe(int(output_info["bytes"]))
 
     except Exception as e:
         if scan_id not in JOBS:
             JOBS[scan_id] = {}
         JOBS[scan_id]["status"] = "error"
         JOBS[scan_id]["error"] = str(e)
-        write_meta(scan_id, {"status": "error", "error": str(e)})
+        JOBS_FINISHED.inc(1, "error")
         push_log(scan_id, f"ERROR: {e}")
+        write_meta(scan_id, {
+            "status": "error",
+            "error": str(e),
+            "apk_url": JOBS[scan_id].get("apk_url"),
+            "apk_sha256": JOBS[scan_id].get("apk_sha256"),
+        })
+
+    finally:
+        if os.path.isfile(class_list_path(scan_id)):
+            os.remove(class_list_path(scan_id))
+        close_log_writer(scan_id)
+        JOBS.unpin(scan_id)
 
 # -------------------------
 # API: start decompile job
 # -------------------------
-@app.post("/decompile")
-def decompile_from_url(payload: DecompileFromUrlReq):
-    scan_id = payload.scan_id or str(ObjectId())
-
+def enqueue_job(scan_id: str, apk_url: str | None, threads: int | None, extra: dict | None = None) -> dict:
     JOBS[scan_id] = {
         "status": "queued",
-        "apk_url": payload.apk_url,
+        "apk_url": apk_url,
+        "created_at": int(time.time()),
+        "enqueued_at": time.time(),
+        **(extra or {}),
     }
     init_job_logs(scan_id)
 
@@ -903,112 +2145,463 @@ def decompile_from_url(payload: DecompileFromUrlReq):
     os.makedirs(scan_dir(scan_id), exist_ok=True)
     write_meta(scan_id, {
         "status": "queued",
-        "apk_url": payload.apk_url,
-        "output_dir": scan_dir(scan_id)
+        "apk_url": apk_url,
+        "created_at": JOBS[scan_id]["created_at"],
+        "output_dir": scan_dir(scan_id),
+        **(extra or {}),
     })
     append_disk_log(scan_id, f"[{int(time.time())}] QUEUED")
 
-    EXEC.submit(worker, scan_id, payload.apk_url)
+    SCHED.submit(scan_id, worker, scan_id, apk_url, threads, (extra or {}).get("apk_sha256"))
 
-    return JSONResponse({
+    return {
         "status": "accepted",
         "scan_id": scan_id,
         "status_url": f"/status/{scan_id}",
         "logs_url": f"/logs/{scan_id}",
         "browse_url": f"/browse/{scan_id}",
+    }
+
+@app.post("/decompile")
+def decompile_from_url(payload: DecompileFromUrlReq):
+    if payload.baseline:
+        check_baseline(payload.baseline, payload.scan_id, payload.mode)
+    scan_id = payload.scan_id or str(ObjectId())
+    extra = {"mode": "lazy"} if payload.mode == "lazy" else {}
+    if payload.baseline:
+        extra["baseline"] = payload.baseline
+    if payload.parts:
+        extra["parts"] = payload.parts
+    return JSONResponse(enqueue_job(scan_id, payload.apk_url, payload.threads, extra))
+
+def resume_job(scan_id: str, meta: dict) -> dict:
+    # re-enqueue with the checkpoints of the earlier run; the worker skips what is still valid
+    extra = {"resumed_from": meta.get("status")}
+    for key in ("created_at", "checkpoints", "mode", "baseline", "incremental", "parts"):
+        if meta.get(key):
+            extra[key] = meta[key]
+    return enqueue_job(scan_id, meta.get("apk_url"), None, extra)
+
+def resume_interrupted_jobs() -> list[str]:
+    # at startup nothing is running yet, so any unfinished status was cut short
+    resumed = []
+    for scan_id in REGISTRY.unfinished():
+        meta = read_meta(scan_id)
+        if not meta or meta.get("status") in TERMINAL_STATUSES or scan_id in JOBS:
+            continue
+        if not meta.get("apk_url") and not os.path.isfile(os.path.join(scan_dir(scan_id), "app.apk")):
+            write_meta(scan_id, {**meta, "status": "error", "error": "interrupted before the APK was stored"})
+            continue
+        resume_job(scan_id, meta)
+        resumed.append(scan_id)
+    if resumed:
+        print(f"[resume] re-queued {len(resumed)} interrupted job(s): {', '.join(resumed)}", flush=True)
+    return resumed
+
+@app.post("/retry/{scan_id}")
+def retry(scan_id: str):
+    meta = read_meta(scan_id)
+    if meta is None:
+        raise HTTPException(404, "scan_id not found")
+    job = JOBS.get(scan_id)
+    if meta.get("status") != "error" or (job is not None and job.get("status") not in TERMINAL_STATUSES):
+        raise HTTPException(409, f"only failed scans can be retried (status={meta.get('status')})")
+    return JSONResponse(resume_job(scan_id, meta))
+
+# -------------------------
+# API: upload APK (streamed to disk, hashed on the fly)
+# -------------------------
+# Accepts multipart/form-data with a "file" field (what static/index.html
+# sends) or the raw APK as the request body.
+class ApkUploadSink:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.f = open(path, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise HTTPException(413, f"APK larger than {MAX_UPLOAD_MB} MB")
+        self.sha256.update(data)
+        self.f.write(data)
+
+    def close(self):
+        self.f.close()
+
+async def stream_multipart_file(request: Request, boundary: bytes, sink: ApkUploadSink, field: bytes = b"file"):
+    state = {"headers": {}, "header_field": b"", "header_value": b"", "writing": False, "found": False}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, params = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        state["writing"] = params.get(b"name") == field and not state["found"]
+
+    def on_part_data(data, start, end):
+        if state["writing"]:
+            sink.write(data[start:end])
+
+    def on_part_end():
+        if state["writing"]:
+            state["found"] = True
+        state["writing"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    async for chunk in request.stream():
+        await run_in_threadpool(parser.write, chunk)  # sink.write() runs in the callbacks
+    parser.finalize()
+
+    if not state["found"]:
+        raise HTTPException(400, "multipart field 'file' missing")
+
+@app.post("/decompile/upload")
+async def decompile_upload(
+    request: Request,
+    scan_id: str | None = None,
+    threads: int | None = Query(default=None, ge=1, le=256),
+    mode: str = Query(default="full", pattern="^(full|lazy)$"),
+    baseline: str | None = None,
+    parts: int | None = Query(default=None, ge=1, le=64),
+):
+    if baseline:
+        await run_in_threadpool(check_baseline, baseline, scan_id, mode)
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + 64 * 1024:
+        raise HTTPException(413, f"APK larger than {MAX_UPLOAD_MB} MB")
+
+    scan_id = scan_id or str(ObjectId())
+    try:
+        # claims the scan_id: an upload never replaces the APK of an existing scan
+        await run_in_threadpool(os.mkdir, scan_dir(scan_id))
+    except FileExistsError:
+        raise HTTPException(409, f"scan_id {scan_id} already exists")
+    upload_path = os.path.join(scan_dir(scan_id), "app.apk.upload")
+
+    # file I/O goes through the threadpool, the event loop only moves the chunks
+    sink = None
+    try:
+        sink = await run_in_threadpool(ApkUploadSink, upload_path, MAX_UPLOAD_BYTES)
+        ctype, params = parse_options_header(request.headers.get("content-type", ""))
+        if ctype == b"multipart/form-data":
+            if not params.get(b"boundary"):
+                raise HTTPException(400, "multipart boundary missing")
+            await stream_multipart_file(request, params[b"boundary"], sink)
+        else:
+            async for chunk in request.stream():
+                await run_in_threadpool(sink.write, chunk)
+        await run_in_threadpool(sink.close)
+
+        if sink.size == 0:
+            raise HTTPException(400, "empty upload")
+        if not await run_in_threadpool(zipfile.is_zipfile, upload_path):
+            raise HTTPException(400, "uploaded file is not an APK (zip)")
+    except BaseException:
+        if sink is not None:
+            sink.close()
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+        try:
+            os.rmdir(scan_dir(scan_id))  # only if the failed upload left it empty
+        except OSError:
+            pass
+        raise
+
+    await run_in_threadpool(os.replace, upload_path, os.path.join(scan_dir(scan_id), "app.apk"))
+    UPLOAD_BYTES.inc(sink.size)
+
+    resp = await run_in_threadpool(enqueue_job, scan_id, None, threads, {
+        "source": "upload",
+        "apk_sha256": sink.sha256.hexdigest(),
+        "apk_size_bytes": sink.size,
+        **({"mode": "lazy"} if mode == "lazy" else {}),
+        **({"baseline": baseline} if baseline else {}),
+        **({"parts": parts} if parts else {}),
+    })
+    return JSONResponse(resp)
+
+# -------------------------
+# API: service status (scheduler queue + slots)
+# -------------------------
+@app.get("/status")
+def service_status():
+    return JSONResponse({
+        "scheduler": SCHED.stats(),
+        "lazy_scheduler": LAZY_SCHED.stats(),
+        "jobs_by_status": jobs_by_status(),
+        "jobs_table": JOBS.stats(),
+        "event_streams": HUB.stats(),
+        "registry": REGISTRY.stats(),
+        "jvm_heap": HEAP.stats(),
+        "jadx_pool": JADX_POOL.stats() if JADX_POOL is not None else None,
     })
 
 # -------------------------
 # API: status (RAM -> DISK fallback)
 # -------------------------
 @app.get("/status/{scan_id}")
-def status(scan_id: str):
-    if scan_id in JOBS:
-        resp = dict(JOBS[scan_id])
-        if "logs" in resp and isinstance(resp["logs"], deque):
+def status(scan_id: str, logs: bool = True):
+    job = JOBS.get(scan_id)
+    if job is not None:
+        resp = dict(job)
+        if not logs:
+            resp.pop("logs", None)
+        elif "logs" in resp and isinstance(resp["logs"], deque):
             resp["logs"] = list(resp["logs"])
+        pos = SCHED.position(scan_id)
+        if pos is not None:
+            resp["queue_position"] = pos
+        w = LOG_WRITERS.get(scan_id)
+        if w is not None:
+            resp["log_writer"] = w.stats()
         return JSONResponse(resp)
 
+    # not (or no longer) in memory: same shape rebuilt from disk
     meta = read_meta(scan_id)
     if meta:
-        return JSONResponse(meta)
+        resp = dict(meta)
+        if logs and os.path.isfile(log_path(scan_id)):
+            resp["logs"], _ = read_log_tail(log_path(scan_id), MAX_LOG_LINES)
+        return JSONResponse(resp)
 
     raise HTTPException(404, "scan_id not found")
 
 # -------------------------
 # API: logs (DISK based so it works after restart)
 # -------------------------
+# Pass the returned next_offset back as since_offset to only get new lines.
 @app.get("/logs/{scan_id}")
-def get_logs(scan_id: str, tail: int = 400):
+def get_logs(scan_id: str, tail: int = 400, since_offset: int | None = None):
     lp = log_path(scan_id)
     if not os.path.isfile(lp):
         raise HTTPException(404, "log not found")
 
-    with open(lp, "r", encoding="utf-8", errors="replace") as f:
-        lines = f.read().splitlines()
+    more = False
+    if since_offset is None:
+        lines, next_offset = read_log_tail(lp, tail)
+    else:
+        lines, next_offset, more = read_log_since(lp, since_offset, LOG_READ_MAX_BYTES)
 
     meta = read_meta(scan_id) or {}
     return JSONResponse({
         "scan_id": scan_id,
         "status": meta.get("status"),
-        "logs": lines[-tail:]
+        "logs": lines,
+        "next_offset": next_offset,
+        "more": more,
     })
 
+# -------------------------
+# API: live log + status stream (Server-Sent Events)
+# -------------------------
+# event: status -> meta.json payload on every state change
+# event: log    -> {"lines": [...]} batched new log lines
+# event: lagged -> {"dropped": n} this client fell behind; re-sync via /logs
+TERMINAL_STATUSES = ("done", "error")
+
+def sse_event(kind: str, data) -> str:
+    return f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/events/{scan_id}")
+async def events(scan_id: str, request: Request):
+    meta = read_meta(scan_id)
+    if meta is None and scan_id not in JOBS:
+        raise HTTPException(404, "scan_id not found")
+
+    async def stream():
+        sub = HUB.subscribe(scan_id, asyncio.get_running_loop())
+        try:
+            snapshot = read_meta(scan_id) or {"scan_id": scan_id, "status": JOBS.get(scan_id, {}).get("status")}
+            yield sse_event("status", snapshot)
+            if snapshot.get("status") in TERMINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    await asyncio.wait_for(sub.event.wait(), timeout=EVENTS_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                items, dropped = sub.take()
+                if dropped:
+                    yield sse_event("lagged", {"dropped": dropped, "logs_url": f"/logs/{scan_id}"})
+
+                lines = []
+                finished = False
+                for kind, data in items:
+                    if kind == "log":
+                        lines.append(data)
+                        continue
+                    if lines:
+                        yield sse_event("log", {"lines": lines})
+                        lines = []
+                    yield sse_event(kind, data)
+                    finished = finished or (kind == "status" and data.get("status") in TERMINAL_STATUSES)
+                if lines:
+                    yield sse_event("log", {"lines": lines})
+                if finished:
+                    return
+        finally:
+            HUB.unsubscribe(scan_id, sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # -------------------------
 # API: browse scan output (filesystem based)
 # -------------------------
+def browse_item(e: dict) -> dict:
+    item = {
+        "name": e["name"],
+        "type": e["type"],
+        "size_bytes": e["size"] if e["type"] == "file" else None,
+        "mtime": e["mtime"],
+    }
+    if e.get("sha256"):
+        item["sha256"] = e["sha256"]
+    if e["type"] == "dir" and e.get("files") is not None:
+        item["tree_bytes"] = e["size"]
+        item["tree_files"] = e["files"]
+    return item
+
 @app.get("/browse/{scan_id}")
-def browse(scan_id: str, path: str = ""):
+def browse(
+    scan_id: str,
+    path: str = "",
+    sort: str = Query(default="name", pattern="^(name|size|mtime|type)$"),
+    order: str = Query(default="asc", pattern="^(asc|desc)$"),
+    glob: str | None = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    cursor: str | None = None,
+):
     sdir = scan_dir(scan_id)
     if not os.path.isdir(sdir):
         raise HTTPException(404, "scan_id directory not found")
 
     target = safe_join(sdir, path) if path else sdir
-    if not os.path.exists(target):
-        raise HTTPException(404, "Path not found")
-
-    if os.path.isfile(target):
-        return JSONResponse({
+    rel = os.path.relpath(target, sdir).replace(os.sep, "/") if path else ""
+    mdb = manifest_db_path(scan_id)
+    from_manifest = bool(rel) and rel.split("/", 1)[0] in MANIFEST_ROOTS and os.path.isfile(mdb)
+
+    lazy = from_manifest and is_lazy_scan(scan_id)
+    if from_manifest:
+        entry = manifest.stat(mdb, rel)
+        if entry is None:
+            raise HTTPException(404, "Path not found")
+        if lazy and entry["type"] == "file" and lazy_decompile(scan_id, rel):
+            st = os.stat(target)
+            entry = {**entry, "size": st.st_size, "mtime": int(st.st_mtime)}
+    else:
+        if not os.path.exists(target):
+            raise HTTPException(404, "Path not found")
+        entry = {"type": "file" if os.path.isfile(target) else "dir"}
+
+    if entry["type"] == "file":
+        resp = {
             "scan_id": scan_id,
             "path": path,
             "type": "file",
             "name": os.path.basename(target),
-            "size_bytes": os.path.getsize(target),
-        })
+            "size_bytes": entry["size"] if from_manifest else os.path.getsize(target),
+        }
+        if from_manifest:
+            resp["mtime"] = entry["mtime"]
+            resp["sha256"] = entry["sha256"]
+        return JSONResponse(resp)
 
-    items = []
-    for name in sorted(os.listdir(target)):
-        full = os.path.join(target, name)
-        items.append({
-            "name": name,
-            "type": "dir" if os.path.isdir(full) else "file",
-            "size_bytes": None if os.path.isdir(full) else os.path.getsize(full)
-        })
+    try:
+        if from_manifest:
+            listing = manifest.list_dir(mdb, rel, sort=sort, desc=order == "desc", glob=glob,
+                                        limit=limit, cursor=cursor)
+        else:
+            listing = manifest.list_live(target, rel, sort=sort, desc=order == "desc", glob=glob,
+                                         limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    items = [browse_item(e) for e in listing["items"]]
+    if lazy:
+        # sizes stay 0 in the manifest; say which classes are already decompiled
+        for e, item in zip(listing["items"], items):
+            if e["type"] == "file":
+                item["decompiled"] = os.path.isfile(os.path.join(sdir, e["path"]))
 
     return JSONResponse({
         "scan_id": scan_id,
         "path": path,
         "type": "dir",
-        "items": items
+        "source": "manifest" if from_manifest else "live",
+        "lazy": lazy,
+        "total": listing["total"],
+        "next_cursor": listing["next_cursor"],
+        "items": items,
     })
 
 # -------------------------
 # API: read file preview
 # -------------------------
-@app.get("/file/{scan_id}")
-def read_file(scan_id: str, path: str, max_kb: int = 256):
+# raw=true streams the file itself (Range / ETag / If-None-Match, chunked reads,
+# see fileserve.py); the default JSON preview is what the UI uses.
+@app.api_route("/file/{scan_id}", methods=["GET", "HEAD"])
+def read_file(request: Request, scan_id: str, path: str, max_kb: int = 256, raw: bool = False):
     sdir = scan_dir(scan_id)
     if not os.path.isdir(sdir):
         raise HTTPException(404, "scan_id directory not found")
 
     target = safe_join(sdir, path)
-    if not os.path.isfile(target):
+    rel = os.path.relpath(target, sdir).replace(os.sep, "/")
+    pack = scan_pack(scan_id)
+    member = pack.getinfo(rel) if pack is not None else None
+
+    # packed scans: size/CRC from the zip directory stand in for stat()
+    if member is not None:
+        size, mtime, validator = member.file_size, packstore.member_mtime(member), member.CRC
+        opener = lambda: pack.open(rel)
+    elif os.path.isfile(target) or lazy_decompile(scan_id, rel):
+        st = os.stat(target)
+        size, mtime, validator = st.st_size, st.st_mtime, st.st_mtime_ns
+        opener = lambda: open(target, "rb")
+    else:
         raise HTTPException(404, "File not found")
 
+    if raw:
+        return serve_file(request.headers, os.path.basename(target), size,
+                          make_etag(size, validator), mtime, opener)
+
+    # the preview depends on max_kb, so it is part of the validator
+    etag = make_etag(size, validator, f"-p{max_kb}")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
     max_bytes = max_kb * 1024
-    size = os.path.getsize(target)
 
-    with open(target, "rb") as f:
+    with opener() as f:
         data = f.read(min(size, max_bytes))
 
     return JSONResponse({
@@ -1017,22 +2610,200 @@ def read_file(scan_id: str, path: str, max_kb: int = 256):
         "size_bytes": size,
         "truncated": size > max_bytes,
         "content": data.decode("utf-8", errors="replace")
+    }, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+# -------------------------
+# API: export scan output (zip / tar.gz streamed while it is built)
+# -------------------------
+EXPORT_MEDIA_TYPES = {"zip": "application/zip", "tar.gz": "application/gzip"}
+
+def export_entries(scan_id: str, root: str):
+    sdir = scan_dir(scan_id)
+    prefixes = MANIFEST_ROOTS if root == "all" else (root,)
+    if root == "all":
+        yield from exporter.fs_entries(sdir, skip=(packstore.PACK_NAME,))
+    else:
+        yield from exporter.fs_entries(sdir, root)
+    pack = scan_pack(scan_id)
+    if pack is not None:
+        yield from exporter.pack_entries(pack, prefixes)
+
+@app.get("/export/{scan_id}")
+def export_scan(
+    scan_id: str,
+    root: str = Query(default="sources", pattern="^(sources|resources|all)$"),
+    fmt: str = Query(default="zip", alias="format", pattern=r"^(zip|tar\.gz)$"),
+    include: list[str] = Query(default=[]),
+    exclude: list[str] = Query(default=[]),
+):
+    meta = read_meta(scan_id)
+    if meta is None:
+        raise HTTPException(404, "scan_id not found")
+    if meta.get("status") != "done":
+        raise HTTPException(409, f"scan output not complete (status={meta.get('status')})")
+
+    entries = exporter.filter_entries(export_entries(scan_id, root), include, exclude)
+    write = exporter.write_zip if fmt == "zip" else exporter.write_tar_gz
+    filename = f"scan_{scan_id}_{root}.{fmt}"
+    return StreamingResponse(
+        exporter.stream_archive(write, entries),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# -------------------------
+# API: full-text search over sources (trigram index)
+# -------------------------
+@app.get("/search/{scan_id}")
+def search(
+    scan_id: str,
+    q: str = Query(..., min_length=1),
+    regex: bool = False,
+    ignore_case: bool = False,
+    path: str | None = None,
+    limit: int = Query(default=100, ge=1, le=5000),
+):
+    db = search_db_path(scan_id)
+    if not os.path.isfile(db):
+        meta = read_meta(scan_id)
+        if meta is None:
+            raise HTTPException(404, "scan_id not found")
+        raise HTTPException(409, f"search index not available (status={meta.get('status')})")
+
+    sdir = scan_dir(scan_id)
+    pack = scan_pack(scan_id)
+
+    def read_text(rel: str) -> str | None:
+        try:
+            if pack is not None and pack.getinfo(rel) is not None:
+                return pack.read(rel).decode("utf-8", errors="replace")
+            with open(safe_join(sdir, rel), "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except (OSError, zipfile.BadZipFile):
+            return None
+
+    try:
+        result = textindex.search(db, read_text, q, regex=regex, ignore_case=ignore_case,
+                                  limit=limit, path_glob=path)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return JSONResponse({"scan_id": scan_id, **result})
+
+# -------------------------
+# API: symbol index (classes / methods / fields)
+# -------------------------
+def require_symbols_db(scan_id: str) -> str:
+    db = symbols_db_path(scan_id)
+    if not os.path.isfile(db):
+        meta = read_meta(scan_id)
+        if meta is None:
+            raise HTTPException(404, "scan_id not found")
+        raise HTTPException(409, f"symbol index not available (status={meta.get('status')})")
+    return db
+
+@app.get("/symbols/{scan_id}")
+def symbols(
+    scan_id: str,
+    prefix: str = "",
+    by: str = Query(default="name", pattern="^(name|qualname)$"),
+    kind: str | None = None,
+    owner: str | None = None,
+    limit: int = Query(default=100, ge=1, le=5000),
+    offset: int = Query(default=0, ge=0),
+):
+    db = require_symbols_db(scan_id)
+    items = symindex.lookup(db, prefix, by=by, kind=kind, owner=owner, limit=limit, offset=offset)
+    return JSONResponse({
+        "scan_id": scan_id,
+        "prefix": prefix,
+        "by": by,
+        "count": len(items),
+        "next_offset": offset + len(items) if len(items) == limit else None,
+        "items": items,
     })
 
+@app.get("/symbols/{scan_id}/subtypes")
+def symbol_subtypes(
+    scan_id: str,
+    name: str = Query(..., min_length=1),
+    transitive: bool = False,
+    limit: int = Query(default=1000, ge=1, le=10000),
+):
+    db = require_symbols_db(scan_id)
+    items = symindex.subtypes(db, name, transitive=transitive, limit=limit)
+    return JSONResponse({"scan_id": scan_id, "name": name, "transitive": transitive, "count": len(items), "items": items})
+
 # -------------------------
-# API: list scans available on disk
+# API: list scans (from the registry, not a directory walk)
 # -------------------------
+# status=done,error  since/until = unix seconds on time_field  sha = hex prefix
+# scan_ids: ids of this page; all_ids=1 makes it every matching id, sorted by id
+# (the pre-paging listing, O(N) - for old clients only)
 @app.get("/scans")
-def list_scans():
-    if not os.path.isdir(PERSISTENT_ROOT):
-        return JSONResponse({"count": 0, "scan_ids": []})
+def list_scans(
+    status: str | None = None,
+    since: int | None = None,
+    until: int | None = None,
+    time_field: str = Query(default="created", pattern="^(created|updated|finished)$"),
+    sha: str | None = Query(default=None, pattern="^[0-9a-fA-F]{1,64}$"),
+    sort: str = Query(default="created", pattern="^(created|updated|scan_id)$"),
+    order: str = Query(default="desc", pattern="^(asc|desc)$"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = None,
+    all_ids: bool = False,
+):
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+    try:
+        result = REGISTRY.query(status=statuses, since=since, until=until, time_field=time_field, sha=sha,
+                                sort=sort, desc=order == "desc", limit=limit, cursor=cursor, all_ids=all_ids)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
-    scan_ids = []
-    for name in sorted(os.listdir(PERSISTENT_ROOT)):
-        if name.startswith("scan_id_") and os.path.isdir(os.path.join(PERSISTENT_ROOT, name)):
-            scan_ids.append(name.replace("scan_id_", ""))
+    return JSONResponse({
+        "count": len(result["items"]),
+        "total": result["total"],
+        "next_cursor": result["next_cursor"],
+        "scan_ids": result["scan_ids"] if all_ids else [it["scan_id"] for it in result["items"]],
+        "items": result["items"],
+        "root": PERSISTENT_ROOT,
+    })
 
-    return JSONResponse({"count": len(scan_ids), "scan_ids": scan_ids, "root": PERSISTENT_ROOT})
+# -------------------------
+# API: JADX resource profile (CPU / RSS / I/O time series)
+# -------------------------
+@app.get("/profile/{scan_id}")
+def get_profile(scan_id: str, series: bool = True):
+    sampler = PROFILERS.get(scan_id)
+    if sampler is not None:
+        data = sampler.result() if series else {"summary": sampler.summary()}
+        return JSONResponse({"scan_id": scan_id, "running": True, **data})
+
+    p = profile_path(scan_id)
+    if not os.path.isfile(p):
+        if read_meta(scan_id) is None:
+            raise HTTPException(404, "scan_id not found")
+        raise HTTPException(404, "no JADX profile for this scan (cache hit or not run yet)")
+    with open(p, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not series:
+        data.pop("series", None)
+    return JSONResponse({"running": False, **data})
+
+# -------------------------
+# API: Prometheus metrics
+# -------------------------
+@app.get("/metrics")
+def get_metrics():
+    return Response(METRICS.render(), media_type=metrics.CONTENT_TYPE)
+
+# -------------------------
+# API: result cache stats
+# -------------------------
+@app.get("/cache")
+def cache_stats():
+    if RESULT_CACHE is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **RESULT_CACHE.stats()})
 
 # -------------------------
 # DEBUG: check disk mount + writability
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# Maintenance commands for the scans under PERSISTENT_ROOT (same env as the API).
+#
+#   python manage.py pack --all --sample 200     pack finished scans into output.zip
+#   python manage.py pack 123 456
+#   python manage.py unpack 123                  back to plain sources/ + resources/
+#   python manage.py rebuild-registry            re-read every meta.json into the /scans registry
+import os
+import json
+import random
+import argparse
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))  # main mounts ./static
+import main
+import packstore
+
+
+def all_scan_ids() -> list[str]:
+    if not os.path.isdir(main.PERSISTENT_ROOT):
+        return []
+    return sorted(
+        name[len("scan_id_"):] for name in os.listdir(main.PERSISTENT_ROOT)
+        if name.startswith("scan_id_") and os.path.isdir(os.path.join(main.PERSISTENT_ROOT, name))
+    )
+
+
+def sample_paths(scan_id: str, n: int) -> list[str]:
+    sdir = main.scan_dir(scan_id)
+    paths = []
+    for rel in main.MANIFEST_ROOTS:
+        for root, _dirs, files in os.walk(os.path.join(sdir, rel)):
+            paths += [os.path.relpath(os.path.join(root, f), sdir).replace(os.sep, "/") for f in files]
+    random.shuffle(paths)
+    return paths[:n]
+
+
+def cmd_pack(args):
+    scan_ids = all_scan_ids() if args.all else args.scan_ids
+    totals = {"scans": 0, "disk_bytes_before": 0, "disk_bytes_after": 0, "inodes_before": 0, "inodes_after": 0}
+    lat_fs, lat_pack = [], []
+
+    for scan_id in scan_ids:
+        meta = main.read_meta(scan_id) or {}
+        if meta.get("status") != "done":
+            print(json.dumps({"scan_id": scan_id, "skipped": f"status={meta.get('status')}"}))
+            continue
+        if os.path.isfile(main.pack_path(scan_id)):
+            print(json.dumps({"scan_id": scan_id, "skipped": "already packed"}))
+            continue
+        if meta.get("mode") == "lazy":
+            print(json.dumps({"scan_id": scan_id, "skipped": "lazy scan (classes are still written on demand)"}))
+            continue
+
+        sdir = main.scan_dir(scan_id)
+        paths = sample_paths(scan_id, args.sample)
+        if args.dry_run:
+            usage = packstore.disk_usage([os.path.join(sdir, r) for r in main.MANIFEST_ROOTS])
+            print(json.dumps({"scan_id": scan_id, "dry_run": True, **usage}))
+            continue
+
+        def read_fs(rel):
+            with open(os.path.join(sdir, rel), "rb") as f:
+                return f.read()
+
+        fs = packstore.measure_reads(read_fs, paths)
+        info = main.pack_output(scan_id)
+        pack = main.scan_pack(scan_id)
+        packed = packstore.measure_reads(pack.read, paths)
+
+        # keep meta in sync so /status shows the pack stats
+        meta["pack"] = info
+        main.write_meta(scan_id, meta)
+
+        print(json.dumps({"scan_id": scan_id, **info, "read_fs": fs, "read_pack": packed}))
+        totals["scans"] += 1
+        for k in ("disk_bytes_before", "disk_bytes_after", "inodes_before", "inodes_after"):
+            totals[k] += info[k]
+        if fs.get("files"):
+            lat_fs.append(fs)
+            lat_pack.append(packed)
+
+    if totals["scans"]:
+        def avg(rows, key):
+            return round(sum(r[key] for r in rows) / len(rows), 3) if rows else None
+
+        totals["disk_saved_pct"] = round(100 * (1 - totals["disk_bytes_after"] / max(totals["disk_bytes_before"], 1)), 1)
+        totals["read_p50_ms"] = {"fs": avg(lat_fs, "p50_ms"), "pack": avg(lat_pack, "p50_ms")}
+        totals["read_p95_ms"] = {"fs": avg(lat_fs, "p95_ms"), "pack": avg(lat_pack, "p95_ms")}
+        print(json.dumps({"total": totals}))
+
+
+def cmd_unpack(args):
+    for scan_id in args.scan_ids:
+        if not os.path.isfile(main.pack_path(scan_id)):
+            print(json.dumps({"scan_id": scan_id, "skipped": "not packed"}))
+            continue
+        files = main.unpack_output(scan_id)
+        meta = main.read_meta(scan_id) or {}
+        meta.pop("pack", None)
+        main.write_meta(scan_id, meta)
+        print(json.dumps({"scan_id": scan_id, "unpacked_files": files}))
+
+
+def cmd_rebuild_registry(args):
+    print(json.dumps(main.rebuild_registry()))
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="jadx scan storage maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("pack", help="pack finished scans into a single output.zip each")
+    p.add_argument("scan_ids", nargs="*")
+    p.add_argument("--all", action="store_true", help="every scan under PERSISTENT_ROOT")
+    p.add_argument("--sample", type=int, default=100, help="files read before/after packing to compare latency")
+    p.add_argument("--dry-run", action="store_true", help="only report current disk usage")
+    p.set_defaults(fn=cmd_pack)
+
+    p = sub.add_parser("unpack", help="restore plain sources/ and resources/ from output.zip")
+    p.add_argument("scan_ids", nargs="+")
+    p.set_defaults(fn=cmd_unpack)
+
+    p = sub.add_parser("rebuild-registry", help="rebuild the scan registry from the meta.json files on disk")
+    p.set_defaults(fn=cmd_rebuild_registry)
+
+    args = parser.parse_args()
+    if args.cmd == "pack" and not (args.all or args.scan_ids):
+        parser.error("give scan ids or --all")
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    cli()
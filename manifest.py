@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import base64
+import sqlite3
+import fnmatch
+import hashlib
+
+# -------------------------
+# OUTPUT MANIFEST (precomputed listing of sources/ + resources/)
+# -------------------------
+# entries(path, parent, name, type, size, mtime, sha256, files)
+#   dirs carry the total size and file count of everything below them
+# Listing is keyset paginated: the cursor encodes the last (sort key, name).
+
+SORT_COLUMNS = {"name": "name", "size": "size", "mtime": "mtime", "type": "type"}
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _create(db_path: str) -> tuple[sqlite3.Connection, str]:
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    con = sqlite3.connect(tmp)
+    con.executescript("""
+        PRAGMA journal_mode=OFF;
+        PRAGMA synchronous=OFF;
+        CREATE TABLE entries (
+            path TEXT PRIMARY KEY, parent TEXT NOT NULL, name TEXT NOT NULL, type TEXT NOT NULL,
+            size INTEGER NOT NULL, mtime INTEGER NOT NULL, sha256 TEXT, files INTEGER NOT NULL
+        );
+        CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+    """)
+    return con, tmp
+
+
+def _finish(con: sqlite3.Connection, tmp: str, db_path: str, info: dict):
+    con.executescript("""
+        CREATE INDEX entries_parent_name ON entries (parent, name);
+        CREATE INDEX entries_parent_size ON entries (parent, size, name);
+        CREATE INDEX entries_parent_mtime ON entries (parent, mtime, name);
+        CREATE INDEX entries_parent_type ON entries (parent, type, name);
+    """)
+    con.executemany("INSERT INTO info (key, value) VALUES (?, ?)", ((k, str(v)) for k, v in info.items()))
+    con.commit()
+    con.close()
+    os.replace(tmp, db_path)
+
+
+def build_manifest(scan_root: str, rel_dirs: tuple[str, ...], db_path: str) -> dict:
+    t0 = time.time()
+    con, tmp = _create(db_path)
+
+    totals = {"files": 0, "dirs": 0, "bytes": 0}
+
+    def walk(rel: str) -> tuple[int, int]:
+        # returns (bytes, files) below rel
+        size = files = 0
+        rows = []
+        with os.scandir(os.path.join(scan_root, rel)) as it:
+            for e in it:
+                child = f"{rel}/{e.name}"
+                if e.is_dir(follow_symlinks=False):
+                    s, n = walk(child)
+                    rows.append((child, rel, e.name, "dir", s, int(e.stat().st_mtime), None, n))
+                    totals["dirs"] += 1
+                elif e.is_file(follow_symlinks=False):
+                    st = e.stat()
+                    s, n = st.st_size, 1
+                    rows.append((child, rel, e.name, "file", s, int(st.st_mtime), _sha256(e.path), 1))
+                    totals["files"] += 1
+                    totals["bytes"] += s
+                else:
+                    continue
+                size += s
+                files += n
+        con.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return size, files
+
+    for rel in rel_dirs:
+        full = os.path.join(scan_root, rel)
+        if os.path.isdir(full):
+            s, n = walk(rel)
+            con.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (rel, "", rel, "dir", s, int(os.path.getmtime(full)), None, n))
+            totals["dirs"] += 1
+
+    info = {**totals, "roots": ",".join(rel_dirs), "built_at": int(time.time()), "build_sec": round(time.time() - t0, 2)}
+    _finish(con, tmp, db_path, info)
+    return info
+
+
+def build_class_manifest(classes: list[tuple[str, str]], db_path: str, root: str = "sources") -> dict:
+    # lazy scans: a listing of the .java files JADX *would* write, before any of
+    # them exists. classes = [(path below root, class name)]; file sizes are 0
+    # until a class is decompiled, classes(path, name) maps files back to classes.
+    t0 = time.time()
+    now = int(t0)
+    con, tmp = _create(db_path)
+    con.execute("CREATE TABLE classes (path TEXT PRIMARY KEY, name TEXT NOT NULL)")
+
+    dirs: dict[str, int] = {root: 0}
+    rows, class_rows = [], []
+    for rel, name in classes:
+        path = f"{root}/{rel}"
+        parent, _, fname = path.rpartition("/")
+        rows.append((path, parent, fname, "file", 0, now, None, 1))
+        class_rows.append((path, name))
+        while parent:
+            dirs[parent] = dirs.get(parent, 0) + 1
+            parent = parent.rpartition("/")[0]
+    for d, n in dirs.items():
+        parent, _, dname = d.rpartition("/")
+        rows.append((d, parent, dname, "dir", 0, now, None, n))
+    con.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    con.executemany("INSERT INTO classes VALUES (?, ?)", class_rows)
+
+    info = {"files": len(class_rows), "dirs": len(dirs), "bytes": 0, "roots": root, "lazy": 1,
+            "built_at": now, "build_sec": round(time.time() - t0, 2)}
+    _finish(con, tmp, db_path, info)
+    return info
+
+
+def class_for_path(db_path: str, path: str) -> str | None:
+    con = _connect_ro(db_path)
+    try:
+        row = con.execute("SELECT name FROM classes WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None  # not a lazy manifest
+    finally:
+        con.close()
+
+
+# -------------------------
+# CURSORS
+# -------------------------
+def encode_cursor(key, name: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key, name]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        key, name = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return key, name
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+ENTRY_COLUMNS = ("path", "name", "type", "size", "mtime", "sha256", "files")
+
+
+def _connect_ro(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def stat(db_path: str, path: str) -> dict | None:
+    con = _connect_ro(db_path)
+    try:
+        row = con.execute(f"SELECT {', '.join(ENTRY_COLUMNS)} FROM entries WHERE path = ?", (path,)).fetchone()
+        return dict(zip(ENTRY_COLUMNS, row)) if row else None
+    finally:
+        con.close()
+
+
+def manifest_info(db_path: str) -> dict:
+    con = _connect_ro(db_path)
+    try:
+        return dict(con.execute("SELECT key, value FROM info").fetchall())
+    finally:
+        con.close()
+
+
+def list_dir(db_path: str, parent: str, sort: str = "name", desc: bool = False, glob: str | None = None,
+             limit: int = 1000, cursor: str | None = None) -> dict:
+    col = SORT_COLUMNS[sort]
+    op, direction = ("<", "DESC") if desc else (">", "ASC")
+    where, args = ["parent = ?"], [parent]
+    if glob:
+        where.append("name GLOB ?")
+        args.append(glob)
+    con = _connect_ro(db_path)
+    try:
+        total = con.execute(f"SELECT COUNT(*) FROM entries WHERE {' AND '.join(where)}", args).fetchone()[0]
+        if cursor:
+            key, name = decode_cursor(cursor)
+            if col == "name":
+                where.append(f"name {op} ?")
+                args.append(name)
+            else:
+                where.append(f"({col} {op} ? OR ({col} = ? AND name {op} ?))")
+                args += [key, key, name]
+        rows = con.execute(
+            f"SELECT {', '.join(ENTRY_COLUMNS)} FROM entries WHERE {' AND '.join(where)} "
+            f"ORDER BY {col} {direction}, name {direction} LIMIT ?",
+            args + [limit + 1],
+        ).fetchall()
+    finally:
+        con.close()
+
+    items = [dict(zip(ENTRY_COLUMNS, r)) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last[col], last["name"])
+    return {"total": total, "items": items, "next_cursor": next_cursor}
+
+
+def list_live(full_dir: str, rel: str, sort: str = "name", desc: bool = False, glob: str | None = None,
+              limit: int = 1000, cursor: str | None = None) -> dict:
+    # same contract as list_dir(), straight from the filesystem (scans still running)
+    items = []
+    with os.scandir(full_dir) as it:
+        for e in it:
+            if glob and not fnmatch.fnmatchcase(e.name, glob):
+                continue
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            is_dir = e.is_dir()
+            items.append({
+                "path": f"{rel}/{e.name}" if rel else e.name,
+                "name": e.name,
+                "type": "dir" if is_dir else "file",
+                "size": None if is_dir else st.st_size,
+                "mtime": int(st.st_mtime),
+                "sha256": None,
+                "files": None,
+            })
+
+    col = SORT_COLUMNS[sort]
+
+    def key(it):
+        v = it[col]
+        return (v if v is not None else -1, it["name"]) if col != "name" else (it["name"],)
+
+    items.sort(key=key, reverse=desc)
+    total = len(items)
+    if cursor:
+        ck, cname = decode_cursor(cursor)
+        bound = (ck if ck is not None else -1, cname) if col != "name" else (cname,)
+        items = [it for it in items if (key(it) < bound if desc else key(it) > bound)]
+
+    page = items[:limit]
+    next_cursor = None
+    if len(items) > limit:
+        next_cursor = encode_cursor(page[-1][col], page[-1]["name"])
+    return {"total": total, "items": page, "next_cursor": next_cursor}
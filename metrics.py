@@ -0,0 +1,183 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# -------------------------
+# PROMETHEUS TEXT METRICS (no client library needed)
+# -------------------------
+# Counters, histograms and callback gauges rendered in the text exposition
+# format (version 0.0.4) that Prometheus scrapes from GET /metrics.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds, from a cached APK (~10 ms) up to a multi-hour JADX run
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = tuple(2 ** i * 1024 * 1024 for i in range(0, 13))  # 1 MiB .. 4 GiB
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.lock = threading.Lock()
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self.series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        with self.lock:
+            s = self.series.get(labels)
+            if s is None:
+                s = self.series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def render(self) -> list[str]:
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.series.items())
+        out = []
+        for labels, s in items:
+            for i, b in enumerate(self.buckets):
+                le = 'le="%s"' % _num(b)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {s[i]}")
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {s[-1]}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(s[-2])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {s[-1]}")
+        return out
+
+
+class Gauge:
+    # value(s) read at scrape time: fn() -> number, or {label value(s): number}
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, fn, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.labelnames = labelnames
+
+    def render(self) -> list[str]:
+        v = self.fn()
+        if not isinstance(v, dict):
+            return [f"{self.name} {_num(v)}"]
+        out = []
+        for k, val in sorted(v.items()):
+            k = k if isinstance(k, tuple) else (k,)
+            out.append(f"{self.name}{_labels(self.labelnames, k)} {_num(val)}")
+        return out
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        m = Counter(name, help_text, labelnames)
+        self.metrics.append(m)
+        return m
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        m = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(m)
+        return m
+
+    def gauge(self, name: str, help_text: str, fn, labelnames: tuple = ()) -> Gauge:
+        m = Gauge(name, help_text, fn, labelnames)
+        self.metrics.append(m)
+        return m
+
+    def render(self) -> str:
+        lines = []
+        for m in self.metrics:
+            try:
+                body = m.render()
+            except Exception:
+                continue  # a failing gauge callback must not break the scrape
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines += body
+        return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# HTTP LATENCY (pure ASGI, so streaming responses pass through)
+# -------------------------
+class RequestMetricsMiddleware:
+    # labels: method, route template (/file/{scan_id}), status code
+    def __init__(self, app, histogram: Histogram, skip_prefixes: tuple = ()):
+        self.app = app
+        self.histogram = histogram
+        self.skip_prefixes = skip_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - t0, scope["method"], route, str(status[0]))
@@ -0,0 +1,183 @@
+import os
+import time
+import shutil
+import zipfile
+import threading
+from collections import OrderedDict
+
+# -------------------------
+# PACKED SCAN OUTPUT (one zip per scan instead of one inode per file)
+# -------------------------
+# <scan_dir>/output.zip holds sources/ and resources/ under the same relative
+# paths. The zip central directory is the random-access index: it is parsed
+# once when an archive is opened, after which any member is found by name and
+# read with a single seek, without unpacking anything else.
+
+PACK_NAME = "output.zip"
+# already compressed formats are stored as-is, deflating them only costs CPU
+STORED_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".webp", ".gif", ".mp3", ".ogg", ".mp4", ".wav",
+    ".so", ".zip", ".jar", ".apk", ".arsc", ".ttf", ".otf",
+)
+MAX_OPEN_PACKS = int(os.getenv("MAX_OPEN_PACKS", "32"))
+
+
+def disk_usage(paths) -> dict:
+    # allocated bytes (st_blocks, not st_size) and inode count below paths
+    blocks = inodes = 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        st = os.lstat(path)
+        blocks += st.st_blocks
+        inodes += 1
+        if not os.path.isdir(path):
+            continue
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                st = os.lstat(os.path.join(root, name))
+                blocks += st.st_blocks
+                inodes += 1
+    return {"bytes": blocks * 512, "inodes": inodes}
+
+
+def pack_tree(scan_root: str, rel_dirs: tuple[str, ...], pack_path: str, level: int = 6,
+              remove: bool = True) -> dict:
+    t0 = time.time()
+    dirs_full = [os.path.join(scan_root, rel) for rel in rel_dirs]
+    before = disk_usage(dirs_full)
+
+    tmp = pack_path + ".tmp"
+    files = raw_bytes = 0
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level,
+                         allowZip64=True, strict_timestamps=False) as zf:
+        for base in dirs_full:
+            if not os.path.isdir(base):
+                continue
+            for root, dirs, names in os.walk(base):
+                dirs.sort()
+                # directory entries too, so empty dirs survive an unpack
+                zf.write(root, os.path.relpath(root, scan_root).replace(os.sep, "/"))
+                for name in sorted(names):
+                    full = os.path.join(root, name)
+                    arc = os.path.relpath(full, scan_root).replace(os.sep, "/")
+                    ctype = zipfile.ZIP_STORED if name.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                    zf.write(full, arc, compress_type=ctype)
+                    files += 1
+                    raw_bytes += os.path.getsize(full)
+
+    # cheap sanity check before deleting the originals
+    with zipfile.ZipFile(tmp) as zf:
+        members = [i for i in zf.infolist() if not i.is_dir()]
+        if len(members) != files or sum(i.file_size for i in members) != raw_bytes:
+            os.remove(tmp)
+            raise RuntimeError(f"packed archive does not match {scan_root}")
+
+    os.replace(tmp, pack_path)
+    forget(pack_path)
+    if remove:
+        for base in dirs_full:
+            shutil.rmtree(base, ignore_errors=True)
+
+    after = disk_usage([pack_path])
+    return {
+        "files": files,
+        "raw_bytes": raw_bytes,
+        "pack_bytes": os.path.getsize(pack_path),
+        "disk_bytes_before": before["bytes"],
+        "disk_bytes_after": after["bytes"] if remove else before["bytes"] + after["bytes"],
+        "inodes_before": before["inodes"],
+        "inodes_after": after["inodes"] if remove else before["inodes"] + after["inodes"],
+        "pack_sec": round(time.time() - t0, 2),
+    }
+
+
+def unpack_tree(pack_path: str, scan_root: str, remove: bool = True) -> int:
+    forget(pack_path)
+    with zipfile.ZipFile(pack_path) as zf:
+        zf.extractall(scan_root)
+        count = sum(1 for i in zf.infolist() if not i.is_dir())
+    if remove:
+        os.remove(pack_path)
+    return count
+
+
+def member_mtime(info: zipfile.ZipInfo) -> float:
+    return time.mktime(info.date_time + (0, 0, -1))
+
+
+# -------------------------
+# READERS (kept open, keyed by inode + mtime so a repack is picked up)
+# -------------------------
+class PackReader:
+    def __init__(self, path: str, key: tuple):
+        self.path = path
+        self.key = key
+        self.zf = zipfile.ZipFile(path)
+
+    def getinfo(self, rel: str) -> zipfile.ZipInfo | None:
+        try:
+            info = self.zf.getinfo(rel)
+        except KeyError:
+            return None
+        return None if info.is_dir() else info
+
+    def open(self, rel: str):
+        # file-like and seekable; ZipFile serialises the underlying reads
+        return self.zf.open(rel)
+
+    def read(self, rel: str, max_bytes: int | None = None) -> bytes:
+        with self.zf.open(rel) as f:
+            return f.read() if max_bytes is None else f.read(max_bytes)
+
+
+_READERS: OrderedDict[str, PackReader] = OrderedDict()
+_READERS_LOCK = threading.Lock()
+
+
+def open_pack(path: str) -> PackReader | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (st.st_ino, st.st_mtime_ns)
+    with _READERS_LOCK:
+        r = _READERS.get(path)
+        if r is not None and r.key == key:
+            _READERS.move_to_end(path)
+            return r
+
+    r = PackReader(path, key)
+    with _READERS_LOCK:
+        _READERS[path] = r
+        _READERS.move_to_end(path)
+        # evicted readers are not closed here: a request may still be reading,
+        # the archive is closed once the last reference goes away
+        while len(_READERS) > MAX_OPEN_PACKS:
+            _READERS.popitem(last=False)
+    return r
+
+
+def forget(path: str):
+    with _READERS_LOCK:
+        _READERS.pop(path, None)
+
+
+def measure_reads(read, paths: list[str]) -> dict:
+    # per-file latency of read(path) -> bytes
+    times = []
+    total = 0
+    for p in paths:
+        t0 = time.perf_counter()
+        total += len(read(p))
+        times.append(time.perf_counter() - t0)
+    if not times:
+        return {"files": 0}
+    times.sort()
+    return {
+        "files": len(times),
+        "p50_ms": round(times[len(times) // 2] * 1000, 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 3),
+        "max_ms": round(times[-1] * 1000, 3),
+        "mb_per_sec": round(total / 1024 / 1024 / max(sum(times), 1e-9), 2),
+    }
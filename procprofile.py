@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+
+# -------------------------
+# /proc SAMPLER FOR A PROCESS TREE (the jadx launcher script + its JVM)
+# -------------------------
+# Every `interval` seconds the whole tree under `pid` (or under each of
+# several pids: the JVMs of a fan-out run) is read from /proc:
+#   cpu_pct   CPU use since the previous sample (100 = one full core)
+#   rss_mb    summed resident set size
+#   read_mb / write_mb   cumulative storage I/O (/proc/<pid>/io)
+#   threads   summed thread count
+# Samples are stored column-wise (one list per metric). Past max_samples the
+# series is halved and the interval doubled, so long runs stay small.
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+SERIES = ("t", "cpu_pct", "rss_mb", "read_mb", "write_mb", "threads")
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _stat(pid: int) -> dict | None:
+    raw = _read(f"/proc/{pid}/stat")
+    if raw is None:
+        return None
+    # comm may contain spaces / parens: split after the last ")"
+    fields = raw[raw.rfind(")") + 2:].split()
+    return {
+        "ppid": int(fields[1]),
+        "ticks": int(fields[11]) + int(fields[12]) + int(fields[13]) + int(fields[14]),  # utime stime cutime cstime
+        "threads": int(fields[17]),
+        "rss_bytes": int(fields[21]) * PAGE_SIZE,
+    }
+
+
+def _io(pid: int) -> tuple[int, int]:
+    raw = _read(f"/proc/{pid}/io")
+    if raw is None:
+        return 0, 0
+    vals = dict(line.split(": ", 1) for line in raw.splitlines() if ": " in line)
+    return int(vals.get("read_bytes", 0)), int(vals.get("write_bytes", 0))
+
+
+def process_tree(*root_pids: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        st = _stat(int(name))
+        if st is not None:
+            children.setdefault(st["ppid"], []).append(int(name))
+    out, todo = [], list(root_pids)
+    while todo:
+        pid = todo.pop()
+        out.append(pid)
+        todo += children.get(pid, [])
+    return out
+
+
+def tree_rss_bytes(root_pid: int) -> int:
+    total = 0
+    for pid in process_tree(root_pid):
+        st = _stat(pid)
+        if st is not None:
+            total += st["rss_bytes"]
+    return total
+
+
+def _tree_totals(*root_pids: int) -> tuple[int, int, int]:
+    ticks = rd = wr = 0
+    for pid in process_tree(*root_pids):
+        st = _stat(pid)
+        if st is None:
+            continue
+        ticks += st["ticks"]
+        r, w = _io(pid)
+        rd += r
+        wr += w
+    return ticks, rd, wr
+
+
+class ProcSampler:
+    def __init__(self, pid: int | list[int], interval: float = 1.0, max_samples: int = 3600):
+        self.pid = pid
+        self.roots = [pid] if isinstance(pid, int) else list(pid)
+        self.interval = interval
+        self.max_samples = max_samples
+        self.series: dict[str, list] = {k: [] for k in SERIES}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.started_at = time.time()
+        self.ended_at: float | None = None
+        self.pids_seen: set[int] = set()
+        self._last_ticks = 0
+        self._last_t = time.monotonic()
+        self._io_peak = (0, 0)
+        self._base_ticks = 0
+        self._base_io = (0, 0)
+        self.stride = 1  # doubles each time the series is halved
+        self.peaks = {"cpu_pct": 0.0, "rss_mb": 0.0, "threads": 0}  # exact, unaffected by halving
+
+    def start(self):
+        # a long-lived process (warm JADX worker) already has CPU time and I/O
+        # from earlier jobs: count from here
+        ticks, rd, wr = _tree_totals(*self.roots)
+        self._base_ticks = self._last_ticks = ticks
+        self._base_io = (rd, wr)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=5)
+        self.ended_at = time.time()
+
+    def _sample(self):
+        ticks = rss = threads = rd = wr = 0
+        alive = False
+        for pid in process_tree(*self.roots):
+            st = _stat(pid)
+            if st is None:
+                continue
+            alive = True
+            self.pids_seen.add(pid)
+            ticks += st["ticks"]
+            rss += st["rss_bytes"]
+            threads += st["threads"]
+            r, w = _io(pid)
+            rd += r
+            wr += w
+        if not alive:
+            return
+
+        now = time.monotonic()
+        dt = max(now - self._last_t, 1e-6)
+        # exited children fold into the parent's cutime, so the sum never goes backwards
+        cpu_pct = max(ticks - self._last_ticks, 0) / CLK_TCK / dt * 100
+        self._last_ticks, self._last_t = max(ticks, self._last_ticks), now
+        rd, wr = max(rd - self._base_io[0], 0), max(wr - self._base_io[1], 0)
+        self._io_peak = (max(self._io_peak[0], rd), max(self._io_peak[1], wr))
+
+        with self.lock:
+            s = self.series
+            s["t"].append(round(time.time() - self.started_at, 2))
+            s["cpu_pct"].append(round(cpu_pct, 1))
+            s["rss_mb"].append(round(rss / 1024 / 1024, 1))
+            s["read_mb"].append(round(self._io_peak[0] / 1024 / 1024, 2))
+            s["write_mb"].append(round(self._io_peak[1] / 1024 / 1024, 2))
+            s["threads"].append(threads)
+            for k in self.peaks:
+                self.peaks[k] = max(self.peaks[k], s[k][-1])
+            if len(s["t"]) > self.max_samples:
+                for k in SERIES:
+                    s[k] = s[k][::2]
+                self.stride *= 2
+
+    def _run(self):
+        while True:
+            self._sample()
+            if self.stop_event.wait(self.interval * self.stride):
+                return
+
+    def summary(self) -> dict:
+        with self.lock:
+            s = {k: list(v) for k, v in self.series.items()}
+        n = len(s["t"])
+        end = self.ended_at or time.time()
+        return {
+            "pid": self.pid,
+            "samples": n,
+            "interval_sec": self.interval * self.stride,
+            "duration_sec": round(end - self.started_at, 2),
+            "processes": len(self.pids_seen),
+            "cpu_sec": round((self._last_ticks - self._base_ticks) / CLK_TCK, 2),
+            "peak_cpu_pct": self.peaks["cpu_pct"],
+            "avg_cpu_pct": round(sum(s["cpu_pct"]) / n, 1) if n else 0,
+            "peak_rss_mb": self.peaks["rss_mb"],
+            "peak_threads": self.peaks["threads"],
+            "read_mb": s["read_mb"][-1] if n else 0,
+            "write_mb": s["write_mb"][-1] if n else 0,
+        }
+
+    def result(self) -> dict:
+        with self.lock:
+            series = {k: list(v) for k, v in self.series.items()}
+        return {"summary": self.summary(), "series": series}
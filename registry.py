@@ -0,0 +1,176 @@
+import time
+import sqlite3
+import threading
+
+from manifest import encode_cursor, decode_cursor
+
+# -------------------------
+# SCAN REGISTRY (one row per scan, kept in step with meta.json)
+# -------------------------
+# meta.json stays the source of truth; the registry is a SQLite copy of the
+# fields worth filtering on, so /scans never has to open every scan dir.
+# It can always be rebuilt from disk (python manage.py rebuild-registry).
+
+SORT_COLUMNS = {"created": "created_at", "updated": "updated_at", "scan_id": "scan_id"}
+TIME_COLUMNS = {"created": "created_at", "updated": "updated_at", "finished": "finished_at"}
+COLUMNS = ("scan_id", "status", "apk_sha256", "apk_url", "apk_bytes", "output_bytes", "output_files",
+           "cache_hit", "error", "created_at", "updated_at", "finished_at")
+FINISHED_STATUSES = ("done", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    apk_sha256 TEXT,
+    apk_url TEXT,
+    apk_bytes INTEGER,
+    output_bytes INTEGER,
+    output_files INTEGER,
+    cache_hit INTEGER,
+    error TEXT,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    finished_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS scans_status_created ON scans (status, created_at, scan_id);
+CREATE INDEX IF NOT EXISTS scans_status_updated ON scans (status, updated_at, scan_id);
+CREATE INDEX IF NOT EXISTS scans_created ON scans (created_at, scan_id);
+CREATE INDEX IF NOT EXISTS scans_updated ON scans (updated_at, scan_id);
+CREATE INDEX IF NOT EXISTS scans_finished ON scans (finished_at);
+CREATE INDEX IF NOT EXISTS scans_sha ON scans (apk_sha256);
+"""
+
+# fields a later meta.json write may omit keep their previous value
+UPSERT = f"""
+INSERT INTO scans ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})
+ON CONFLICT (scan_id) DO UPDATE SET
+    status = excluded.status,
+    apk_sha256 = COALESCE(excluded.apk_sha256, scans.apk_sha256),
+    apk_url = COALESCE(excluded.apk_url, scans.apk_url),
+    apk_bytes = COALESCE(excluded.apk_bytes, scans.apk_bytes),
+    output_bytes = COALESCE(excluded.output_bytes, scans.output_bytes),
+    output_files = COALESCE(excluded.output_files, scans.output_files),
+    cache_hit = excluded.cache_hit,
+    error = excluded.error,
+    created_at = MIN(scans.created_at, excluded.created_at),
+    updated_at = excluded.updated_at,
+    finished_at = CASE WHEN excluded.finished_at IS NULL THEN NULL
+                       ELSE COALESCE(scans.finished_at, excluded.finished_at) END
+"""
+
+
+def _row(scan_id: str, meta: dict) -> tuple:
+    updated = int(meta.get("updated_at") or time.time())
+    status = meta.get("status") or "unknown"
+    cache_hit = meta.get("cache_hit")
+    return (
+        scan_id,
+        status,
+        meta.get("apk_sha256"),
+        meta.get("apk_url"),
+        meta.get("apk_bytes"),
+        meta.get("output_bytes"),
+        meta.get("output_files"),
+        None if cache_hit is None else int(bool(cache_hit)),
+        meta.get("error"),
+        int(meta.get("created_at") or updated),
+        updated,
+        updated if status in FINISHED_STATUSES else None,
+    )
+
+
+class ScanRegistry:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(db_path, check_same_thread=False)
+        self.con.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + SCHEMA)
+
+    def upsert(self, scan_id: str, meta: dict):
+        with self.lock, self.con:
+            self.con.execute(UPSERT, _row(scan_id, meta))
+
+    def count(self) -> int:
+        with self.lock:
+            return self.con.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+
+    def unfinished(self) -> list[str]:
+        with self.lock:
+            rows = self.con.execute(
+                f"SELECT scan_id FROM scans WHERE status NOT IN ({', '.join('?' * len(FINISHED_STATUSES))}) "
+                f"ORDER BY created_at, scan_id", FINISHED_STATUSES,
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def rebuild(self, metas) -> dict:
+        # metas: iterable of (scan_id, meta dict) read from disk
+        t0 = time.time()
+        rows = [_row(scan_id, meta) for scan_id, meta in metas]
+        with self.lock, self.con:
+            self.con.execute("DELETE FROM scans")
+            self.con.executemany(UPSERT, rows)
+        return {"scans": len(rows), "rebuild_sec": round(time.time() - t0, 2)}
+
+    def query(self, status: list[str] | None = None, since: int | None = None, until: int | None = None,
+              time_field: str = "created", sha: str | None = None, sort: str = "created", desc: bool = True,
+              limit: int = 100, cursor: str | None = None, all_ids: bool = False) -> dict:
+        # all_ids: also every matching scan_id, unpaged and by scan_id (the old /scans list)
+        col = SORT_COLUMNS[sort]
+        tcol = TIME_COLUMNS[time_field]
+        op, direction = ("<", "DESC") if desc else (">", "ASC")
+
+        where, args = [], []
+        if status:
+            where.append(f"status IN ({', '.join('?' * len(status))})")
+            args += status
+        if since is not None:
+            where.append(f"{tcol} >= ?")
+            args.append(since)
+        if until is not None:
+            where.append(f"{tcol} < ?")
+            args.append(until)
+        if sha:
+            # hex prefix; GLOB keeps it on the index
+            where.append("apk_sha256 GLOB ?")
+            args.append(sha.lower() + "*")
+
+        def clause(w):
+            return f"WHERE {' AND '.join(w)}" if w else ""
+
+        with self.lock:
+            total = self.con.execute(f"SELECT COUNT(*) FROM scans {clause(where)}", args).fetchone()[0]
+            ids = None
+            if all_ids:
+                ids = [r[0] for r in self.con.execute(f"SELECT scan_id FROM scans {clause(where)} ORDER BY scan_id", args)]
+            if cursor:
+                key, last_id = decode_cursor(cursor)
+                if col == "scan_id":
+                    where.append(f"scan_id {op} ?")
+                    args.append(last_id)
+                else:
+                    where.append(f"({col} {op} ? OR ({col} = ? AND scan_id {op} ?))")
+                    args += [key, key, last_id]
+            rows = self.con.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM scans {clause(where)} "
+                f"ORDER BY {col} {direction}, scan_id {direction} LIMIT ?",
+                args + [limit + 1],
+            ).fetchall()
+
+        items = []
+        for r in rows[:limit]:
+            item = dict(zip(COLUMNS, r))
+            if item["cache_hit"] is not None:
+                item["cache_hit"] = bool(item["cache_hit"])
+            items.append(item)
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(items[-1][col], items[-1]["scan_id"])
+        result = {"total": total, "items": items, "next_cursor": next_cursor}
+        if ids is not None:
+            result["scan_ids"] = ids
+        return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            by_status = dict(self.con.execute("SELECT status, COUNT(*) FROM scans GROUP BY status").fetchall())
+        return {"db_path": self.db_path, "scans": sum(by_status.values()), "by_status": by_status}
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+# -------------------------
+# CONTENT-ADDRESSED RESULT CACHE
+# -------------------------
+# Layout: <root>/<sha256>/{sources,resources,index,output.zip,entry.json}
+# Entries are hardlink farms of a finished scan, so restoring one into a new
+# scan dir is a metadata-only operation on the same filesystem.
+
+CACHE_PARTS = ("sources", "resources", "index", "output.zip")  # output.zip: packed scans
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def link_tree(src: str, dst: str) -> int:
+    # hardlink every file of src into dst (copy when crossing filesystems)
+    total = 0
+    for root, _dirs, files in os.walk(src):
+        rel = os.path.relpath(root, src)
+        target = dst if rel == "." else os.path.join(dst, rel)
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            s = os.path.join(root, name)
+            d = os.path.join(target, name)
+            try:
+                os.link(s, d)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copy2(s, d)
+            total += os.path.getsize(d)
+    return total
+
+
+def link_part(src: str, dst: str) -> int:
+    # a cache part is either a directory tree or a single file
+    if os.path.isdir(src):
+        return link_tree(src, dst)
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copy2(src, dst)
+    return os.path.getsize(dst)
+
+
+class ResultCache:
+    def __init__(self, root: str, max_bytes: int, max_age_sec: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+
+    def entry_dir(self, sha: str) -> str:
+        return os.path.join(self.root, sha)
+
+    def _entry_path(self, sha: str) -> str:
+        return os.path.join(self.entry_dir(sha), "entry.json")
+
+    def _read_entry(self, sha: str) -> dict | None:
+        try:
+            with open(self._entry_path(sha), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, sha: str, entry: dict):
+        tmp = self._entry_path(sha) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._entry_path(sha))
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return self.max_age_sec > 0 and now - entry.get("created_at", 0) > self.max_age_sec
+
+    def lookup(self, sha: str) -> dict | None:
+        # a found entry is only counted as a hit once restore() has linked it
+        entry = self._read_entry(sha)
+        if entry is None or self._expired(entry, time.time()):
+            with self.lock:
+                self.misses += 1
+            return None
+        return entry
+
+    def restore(self, sha: str, dest_dir: str) -> bool:
+        # link a cached result into dest_dir; False if the entry vanished meanwhile
+        with self.lock:
+            entry = self._read_entry(sha)
+            if entry is None:
+                self.misses += 1
+                return False
+            try:
+                for part in CACHE_PARTS:
+                    src = os.path.join(self.entry_dir(sha), part)
+                    if os.path.exists(src):
+                        link_part(src, os.path.join(dest_dir, part))
+            except OSError:
+                # no half-linked output: JADX would write into the cache's inodes
+                for part in CACHE_PARTS:
+                    dst = os.path.join(dest_dir, part)
+                    if os.path.isdir(dst):
+                        shutil.rmtree(dst, ignore_errors=True)
+                    elif os.path.lexists(dst):
+                        os.remove(dst)
+                self.misses += 1
+                return False
+            self.hits += 1
+            entry["last_used_at"] = int(time.time())
+            entry["hit_count"] = entry.get("hit_count", 0) + 1
+            self._write_entry(sha, entry)
+        return True
+
+    def store(self, sha: str, src_dir: str, origin_scan_id: str) -> dict | None:
+        if self._read_entry(sha) is not None:
+            return None
+
+        tmp = os.path.join(self.root, f".{sha}.tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        size = 0
+        for part in CACHE_PARTS:
+            src = os.path.join(src_dir, part)
+            if os.path.exists(src):
+                size += link_part(src, os.path.join(tmp, part))
+
+        now = int(time.time())
+        entry = {
+            "apk_sha256": sha,
+            "origin_scan_id": origin_scan_id,
+            "size_bytes": size,
+            "created_at": now,
+            "last_used_at": now,
+            "hit_count": 0,
+        }
+        with open(os.path.join(tmp, "entry.json"), "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+
+        with self.lock:
+            try:
+                os.rename(tmp, self.entry_dir(sha))
+            except OSError:
+                # another job stored the same APK first
+                shutil.rmtree(tmp, ignore_errors=True)
+                return None
+            self.stores += 1
+
+        self.evict()
+        return entry
+
+    def entries(self) -> list[dict]:
+        out = []
+        for name in os.listdir(self.root):
+            if name.startswith("."):
+                continue
+            entry = self._read_entry(name)
+            if entry is not None:
+                out.append(entry)
+        return out
+
+    def evict(self) -> int:
+        removed = 0
+        with self.lock:
+            now = time.time()
+            entries = sorted(self.entries(), key=lambda e: e.get("last_used_at", 0))
+            total = sum(e.get("size_bytes", 0) for e in entries)
+            for e in entries:
+                if not self._expired(e, now) and (self.max_bytes <= 0 or total <= self.max_bytes):
+                    continue
+                shutil.rmtree(self.entry_dir(e["apk_sha256"]), ignore_errors=True)
+                total -= e.get("size_bytes", 0)
+                removed += 1
+            self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            "root": self.root,
+            "entries": len(entries),
+            "size_bytes": sum(e.get("size_bytes", 0) for e in entries),
+            "max_bytes": self.max_bytes,
+            "max_age_sec": self.max_age_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
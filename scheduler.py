@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+# -------------------------
+# MEMORY PROBES (/proc/meminfo, Linux only)
+# -------------------------
+def read_meminfo() -> dict:
+    info = {}
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if parts:
+                    info[key] = int(parts[0])  # kB
+    except OSError:
+        pass
+    return info
+
+
+def mem_available_mb() -> int | None:
+    kb = read_meminfo().get("MemAvailable")
+    return None if kb is None else kb // 1024
+
+
+def mem_total_mb() -> int | None:
+    kb = read_meminfo().get("MemTotal")
+    return None if kb is None else kb // 1024
+
+
+# -------------------------
+# JOB SCHEDULER
+# -------------------------
+# Jobs run on a thread pool (download etc. are cheap), but the memory hungry
+# part is wrapped in `slot()`, which admits jobs FIFO only when a slot is free,
+# the job's estimated memory fits in the remaining budget and the machine
+# actually has that much RAM available right now. With `wait`, a caller that is
+# not admitted in time gets SlotUnavailable instead of queueing on.
+class SlotUnavailable(RuntimeError):
+    pass
+
+
+class JobScheduler:
+    def __init__(self, slots: int, mem_budget_mb: int, workers: int, poll_sec: float = 2.0):
+        self.slots = max(1, slots)
+        self.mem_budget_mb = mem_budget_mb
+        self.poll_sec = poll_sec
+        self.executor = ThreadPoolExecutor(max_workers=max(workers, self.slots), thread_name_prefix="job")
+        self.cond = threading.Condition()
+        self.pending: set[str] = set()
+        self.waiting: deque[dict] = deque()
+        self.running: dict[str, dict] = {}
+        self.admitted_total = 0
+        self.rejected_total = 0
+
+    def submit(self, scan_id: str, fn, *args, **kwargs):
+        with self.cond:
+            self.pending.add(scan_id)
+
+        def run():
+            with self.cond:
+                self.pending.discard(scan_id)
+            return fn(*args, **kwargs)
+
+        return self.executor.submit(run)
+
+    def _reserved_mb(self) -> int:
+        return sum(r["est_mb"] for r in self.running.values())
+
+    def _can_admit(self, ticket: dict) -> bool:
+        if not self.waiting or self.waiting[0] is not ticket:
+            return False
+        if len(self.running) >= self.slots:
+            return False
+        if not self.running:
+            # never deadlock on a job bigger than the budget: let it run alone
+            return True
+        if self._reserved_mb() + ticket["est_mb"] > self.mem_budget_mb:
+            return False
+        avail = mem_available_mb()
+        return avail is None or ticket["est_mb"] <= avail
+
+    @contextmanager
+    def slot(self, scan_id: str, est_mb: int, wait: float | None = None):
+        ticket = {"scan_id": scan_id, "est_mb": est_mb, "enqueued_at": time.time()}
+        deadline = None if wait is None else time.monotonic() + wait
+        with self.cond:
+            self.waiting.append(ticket)
+            try:
+                while not self._can_admit(ticket):
+                    # re-check periodically, MemAvailable changes without notify
+                    timeout = self.poll_sec
+                    if deadline is not None:
+                        timeout = min(timeout, deadline - time.monotonic())
+                        if timeout <= 0:
+                            self.rejected_total += 1
+                            raise SlotUnavailable(f"no slot free within {wait:g}s")
+                    self.cond.wait(timeout=timeout)
+            finally:
+                self.waiting.remove(ticket)
+                self.cond.notify_all()
+            ticket["admitted_at"] = time.time()
+            self.running[scan_id] = ticket
+            self.admitted_total += 1
+        try:
+            yield ticket
+        finally:
+            with self.cond:
+                self.running.pop(scan_id, None)
+                self.cond.notify_all()
+
+    def running_count(self) -> int:
+        with self.cond:
+            return len(self.running)
+
+    def position(self, scan_id: str) -> int | None:
+        with self.cond:
+            for i, t in enumerate(self.waiting):
+                if t["scan_id"] == scan_id:
+                    return i + 1
+        return None
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self.cond:
+            return {
+                "slots": self.slots,
+                "slots_used": len(self.running),
+                "mem_budget_mb": self.mem_budget_mb,
+                "mem_reserved_mb": self._reserved_mb(),
+                "mem_available_mb": mem_available_mb(),
+                "queue_depth": len(self.pending) + len(self.waiting),
+                "pending_start": len(self.pending),
+                "waiting_for_slot": [
+                    {"scan_id": t["scan_id"], "est_mb": t["est_mb"], "waiting_sec": round(now - t["enqueued_at"], 1)}
+                    for t in self.waiting
+                ],
+                "running": [
+                    {"scan_id": t["scan_id"], "est_mb": t["est_mb"], "running_sec": round(now - t["admitted_at"], 1)}
+                    for t in self.running.values()
+                ],
+                "admitted_total": self.admitted_total,
+                "rejected_total": self.rejected_total,
+            }
+
+
+def default_mem_budget_mb() -> int:
+    total = mem_total_mb()
+    return int(total * 0.8) if total else 4096
+
+
+def default_slots() -> int:
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
@@ -0,0 +1,349 @@
+import os
+import re
+import time
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# -------------------------
+# JAVA SYMBOL INDEX (packages, classes, supertypes, methods, fields)
+# -------------------------
+# JADX output is regular (one declaration per line, balanced braces), so a
+# line based scanner that tracks brace depth is enough; no full Java parser.
+#
+# symbols(kind, name, qualname, owner, file, line, detail)
+#   kind: package | class | interface | enum | annotation | record | method | constructor | field
+# supertypes(class_qualname, relation, super_name, super_qualname)
+
+MODIFIERS = r"(?:(?:public|protected|private|static|final|abstract|native|synchronized|transient|volatile|strictfp|default|sealed|non-sealed)\s+|/\*\s*synthetic\s*\*/\s+|@\w+(?:\([^)]*\))?\s+)*"
+TYPE_RE = re.compile(
+    r"^\s*" + MODIFIERS +
+    r"(class|interface|enum|@interface|record)\s+(\w+)\s*(?:<.*?>)?\s*(?:\(.*?\))?"
+    r"(?:\s+extends\s+(.+?))?(?:\s+implements\s+(.+?))?\s*\{"
+)
+METHOD_RE = re.compile(
+    r"^\s*(" + MODIFIERS + r")(?:<[^()]*>\s+)?([\w.$\[\]<>?, ]+?)\s+(\w+)\s*\((.*?)\)\s*(?:throws\s+[\w.$, ]+)?\s*[{;]"
+)
+CTOR_RE = re.compile(r"^\s*(" + MODIFIERS + r")(\w+)\s*\((.*?)\)\s*(?:throws\s+[\w.$, ]+)?\s*\{")
+FIELD_RE = re.compile(r"^\s*(" + MODIFIERS + r")([\w.$\[\]<>?, ]+?)\s+(\w+)\s*(?:=.*)?;\s*$")
+PACKAGE_RE = re.compile(r"^package\s+([\w.]+)\s*;")
+IMPORT_RE = re.compile(r"^import\s+([\w.]+)\s*;")
+
+NOT_TYPES = {"return", "new", "throw", "else", "case", "goto", "break", "continue", "assert", "yield"}
+STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+KIND_NAMES = {"@interface": "annotation"}
+JAVA_LANG = {
+    "Object", "Runnable", "Comparable", "Iterable", "Cloneable", "AutoCloseable", "Enum", "Record",
+    "Thread", "Throwable", "Exception", "RuntimeException", "Error", "CharSequence", "Number",
+    "Appendable", "Readable", "ClassLoader", "ThreadLocal", "InheritableThreadLocal",
+}
+
+
+def _split_types(s: str | None) -> list[str]:
+    # "A<B, C>, D" -> ["A", "D"] (generic arguments dropped)
+    if not s:
+        return []
+    out, depth, cur = [], 0, []
+    for ch in s:
+        if ch == "<":
+            depth += 1
+        elif ch == ">":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            out.append("".join(cur).strip())
+            cur = []
+        elif depth == 0:
+            cur.append(ch)
+    if cur:
+        out.append("".join(cur).strip())
+    return [t for t in out if t]
+
+
+def nested_name(name: str) -> str:
+    # "com.foo.Bar.Inner" -> "com.foo.Bar$Inner": segments after the first
+    # capitalised one are nested classes (the $ form javac and JADX use)
+    parts = name.split(".")
+    for i, p in enumerate(parts):
+        if p[:1].isupper():
+            return ".".join(parts[:i + 1]) + "".join("$" + q for q in parts[i + 1:])
+    return name
+
+
+def _strip_code(line: str, in_comment: bool) -> tuple[str, bool]:
+    # drop string literals and comments so braces can be counted
+    line = STRING_RE.sub('""', line)
+    out = []
+    i = 0
+    while i < len(line):
+        if in_comment:
+            j = line.find("*/", i)
+            if j == -1:
+                return "".join(out), True
+            i = j + 2
+            in_comment = False
+        elif line.startswith("//", i):
+            break
+        elif line.startswith("/*", i):
+            in_comment = True
+            i += 2
+        else:
+            out.append(line[i])
+            i += 1
+    return "".join(out), in_comment
+
+
+def parse_java(path: str, rel: str) -> tuple[list[tuple], list[tuple]]:
+    symbols: list[tuple] = []
+    supers: list[tuple] = []
+    package = ""
+    imports: dict[str, str] = {}
+    stack: list[tuple[str, str, int]] = []  # (qualname, simple name, body depth)
+    depth = 0
+    in_comment = False
+
+    def resolve(name: str) -> str:
+        # first segment through enclosing classes, imports, java.lang and the
+        # package; the rest of a dotted name are nested classes ("Bar.Inner")
+        first, _, rest = name.split("<", 1)[0].strip().partition(".")
+        nested = "".join("$" + p for p in rest.split(".")) if rest else ""
+        enclosing = next((q for q, n, _d in reversed(stack) if n == first), None)
+        if enclosing is not None:
+            return enclosing + nested
+        if first in imports:
+            return imports[first] + nested
+        if not first[:1].isupper():
+            return nested_name(f"{first}.{rest}" if rest else first)  # already package-qualified
+        if first in JAVA_LANG:
+            return f"java.lang.{first}{nested}"
+        return f"{package}.{first}{nested}" if package else first + nested
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line_no, raw in enumerate(f, 1):
+            code, in_comment = _strip_code(raw, in_comment)
+            stripped = code.strip()
+            if not stripped:
+                continue
+
+            if depth == 0:
+                m = PACKAGE_RE.match(stripped)
+                if m:
+                    package = m.group(1)
+                    symbols.append(("package", package.rsplit(".", 1)[-1], package, "", rel, line_no, ""))
+                    continue
+                m = IMPORT_RE.match(stripped)
+                if m:
+                    imports[m.group(1).rsplit(".", 1)[-1]] = m.group(1)
+                    continue
+
+            owner = stack[-1] if stack and stack[-1][2] == depth else None
+
+            m = TYPE_RE.match(code)
+            if m and (depth == 0 or owner is not None):
+                kind = KIND_NAMES.get(m.group(1), m.group(1))
+                name = m.group(2)
+                if owner is not None:
+                    qual = f"{owner[0]}${name}"
+                    imports.setdefault(name, qual)
+                else:
+                    qual = f"{package}.{name}" if package else name
+                symbols.append((kind, name, qual, owner[0] if owner else package, rel, line_no, stripped.rstrip("{").strip()))
+                rel_ext = "implements" if kind == "class" or kind == "enum" or kind == "record" else "extends"
+                for t in _split_types(m.group(3)):
+                    supers.append((qual, "extends", t.split("<", 1)[0].rsplit(".", 1)[-1], resolve(t)))
+                for t in _split_types(m.group(4)):
+                    supers.append((qual, rel_ext, t.split("<", 1)[0].rsplit(".", 1)[-1], resolve(t)))
+                stack.append((qual, name, depth + 1))
+            elif owner is not None:
+                m = CTOR_RE.match(code)
+                if m and m.group(2) == owner[1]:
+                    symbols.append(("constructor", m.group(2), f"{owner[0]}.<init>", owner[0], rel, line_no,
+                                    f"{m.group(2)}({m.group(3).strip()})"))
+                else:
+                    m = METHOD_RE.match(code)
+                    if m and m.group(2).strip() not in NOT_TYPES:
+                        symbols.append(("method", m.group(3), f"{owner[0]}.{m.group(3)}", owner[0], rel, line_no,
+                                        f"{m.group(2).strip()} {m.group(3)}({m.group(4).strip()})"))
+                    else:
+                        m = FIELD_RE.match(code)
+                        if m and m.group(2).strip() not in NOT_TYPES:
+                            symbols.append(("field", m.group(3), f"{owner[0]}.{m.group(3)}", owner[0], rel, line_no,
+                                            f"{m.group(2).strip()} {m.group(3)}"))
+
+            depth += code.count("{") - code.count("}")
+            while stack and depth < stack[-1][2]:
+                stack.pop()
+
+    return symbols, supers
+
+
+def _parse_batch(scan_root: str, rels: list[str]) -> tuple[list[tuple], list[tuple], int]:
+    symbols, supers, failed = [], [], 0
+    for rel in rels:
+        try:
+            s, p = parse_java(os.path.join(scan_root, rel), rel)
+        except (OSError, UnicodeError):
+            failed += 1
+            continue
+        symbols += s
+        supers += p
+    return symbols, supers, failed
+
+
+def make_pool(procs: int) -> ProcessPoolExecutor:
+    # spawn: never fork the multi-threaded server process
+    return ProcessPoolExecutor(max_workers=procs, mp_context=multiprocessing.get_context("spawn"))
+
+
+def build_symbol_index(scan_root: str, rel_dir: str, db_path: str, procs: int | None = None,
+                       batch_size: int = 200, pool: ProcessPoolExecutor | None = None) -> dict:
+    # pool: the caller's (shared) make_pool(); procs should then be its size
+    t0 = time.time()
+    rels = []
+    for root, dirs, files in os.walk(os.path.join(scan_root, rel_dir)):
+        dirs.sort()
+        rels += [os.path.relpath(os.path.join(root, n), scan_root) for n in sorted(files) if n.endswith(".java")]
+
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    con = sqlite3.connect(tmp)
+    con.executescript("""
+        PRAGMA journal_mode=OFF;
+        PRAGMA synchronous=OFF;
+        CREATE TABLE symbols (kind TEXT, name TEXT, qualname TEXT, owner TEXT, file TEXT, line INTEGER, detail TEXT);
+        CREATE TABLE supertypes (class_qualname TEXT, relation TEXT, super_name TEXT, super_qualname TEXT);
+        CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+    """)
+
+    counts = {"files": len(rels), "symbols": 0, "supertypes": 0, "failed": 0}
+    seen_packages = set()
+
+    def store(symbols, supers, failed):
+        rows = []
+        for s in symbols:
+            if s[0] == "package":
+                if s[2] in seen_packages:
+                    continue
+                seen_packages.add(s[2])
+            rows.append(s)
+        con.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        con.executemany("INSERT INTO supertypes VALUES (?, ?, ?, ?)", supers)
+        counts["symbols"] += len(rows)
+        counts["supertypes"] += len(supers)
+        counts["failed"] += failed
+
+    batches = [rels[i:i + batch_size] for i in range(0, len(rels), batch_size)]
+    procs = max(1, min(procs or os.cpu_count() or 1, len(batches)))
+    if procs == 1:
+        for b in batches:
+            store(*_parse_batch(scan_root, b))
+    elif pool is not None:
+        for result in pool.map(_parse_batch, [scan_root] * len(batches), batches):
+            store(*result)
+    else:
+        with make_pool(procs) as ex:
+            for result in ex.map(_parse_batch, [scan_root] * len(batches), batches):
+                store(*result)
+
+    con.executescript("""
+        CREATE INDEX symbols_name ON symbols (name);
+        CREATE INDEX symbols_qualname ON symbols (qualname);
+        CREATE INDEX symbols_kind_name ON symbols (kind, name);
+        CREATE INDEX supertypes_super_name ON supertypes (super_name);
+        CREATE INDEX supertypes_super_qualname ON supertypes (super_qualname);
+        CREATE INDEX supertypes_class ON supertypes (class_qualname);
+    """)
+    info = {**counts, "procs": procs, "built_at": int(time.time()), "build_sec": round(time.time() - t0, 2)}
+    con.executemany("INSERT INTO info (key, value) VALUES (?, ?)", ((k, str(v)) for k, v in info.items()))
+    con.commit()
+    con.close()
+    os.replace(tmp, db_path)
+    return info
+
+
+# -------------------------
+# QUERIES
+# -------------------------
+SYMBOL_COLUMNS = ("kind", "name", "qualname", "owner", "file", "line", "detail")
+
+
+def _connect_ro(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def _prefix_upper(prefix: str) -> str:
+    # smallest string greater than every string starting with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def lookup(db_path: str, prefix: str, by: str = "name", kind: str | None = None,
+           owner: str | None = None, limit: int = 100, offset: int = 0) -> list[dict]:
+    if by not in ("name", "qualname"):
+        raise ValueError("by must be 'name' or 'qualname'")
+    where, args = [], []
+    if prefix:
+        where.append(f"{by} >= ? AND {by} < ?")
+        args += [prefix, _prefix_upper(prefix)]
+    if kind:
+        where.append("kind = ?")
+        args.append(kind)
+    if owner:
+        where.append("owner = ?")
+        args.append(owner)
+    sql = f"SELECT {', '.join(SYMBOL_COLUMNS)} FROM symbols"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {by}, file, line LIMIT ? OFFSET ?"
+    con = _connect_ro(db_path)
+    try:
+        return [dict(zip(SYMBOL_COLUMNS, r)) for r in con.execute(sql, args + [limit, offset])]
+    finally:
+        con.close()
+
+
+def subtypes(db_path: str, name: str, transitive: bool = False, limit: int = 1000) -> list[dict]:
+    # classes extending/implementing `name`: simple ("Inner"), fully qualified
+    # ("com.foo.Bar.Inner" or "com.foo.Bar$Inner") or nested without package ("Bar.Inner")
+    con = _connect_ro(db_path)
+    try:
+        out, seen = [], set()
+        frontier = [nested_name(name)]
+        while frontier and len(out) < limit:
+            nxt = []
+            for target in frontier:
+                if "." in target:
+                    rows = con.execute("SELECT class_qualname, relation, super_qualname FROM supertypes "
+                                       "WHERE super_qualname = ?", (target,))
+                else:
+                    rows = con.execute("SELECT class_qualname, relation, super_qualname FROM supertypes "
+                                       "WHERE super_name = ?", (target.rsplit("$", 1)[-1],))
+                    if "$" in target:
+                        rows = [r for r in rows if r[2] == target or r[2].endswith("." + target)]
+                for cls, relation, super_q in rows:
+                    if cls in seen:
+                        continue
+                    seen.add(cls)
+                    row = con.execute("SELECT file, line, kind FROM symbols WHERE qualname = ? AND kind NOT IN "
+                                      "('method', 'field', 'constructor', 'package') LIMIT 1", (cls,)).fetchone()
+                    out.append({
+                        "qualname": cls,
+                        "relation": relation,
+                        "super": super_q,
+                        "kind": row[2] if row else None,
+                        "file": row[0] if row else None,
+                        "line": row[1] if row else None,
+                    })
+                    nxt.append(cls)
+            frontier = nxt if transitive else []
+        return out[:limit]
+    finally:
+        con.close()
+
+
+def index_info(db_path: str) -> dict:
+    con = _connect_ro(db_path)
+    try:
+        return dict(con.execute("SELECT key, value FROM info").fetchall())
+    finally:
+        con.close()
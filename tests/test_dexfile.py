@@ -0,0 +1,192 @@
+# python -m unittest discover tests
+# Dex files are built by hand below: header, string/type/proto/method ids, class
+# defs, then string data, code items and class data. Every method is
+#   const-string v0, "<string>"; invoke-virtual {v0}, <super>->base()V; return-void
+import os
+import sys
+import struct
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dexfile  # noqa: E402
+
+
+def uleb128(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b, n = n & 0x7F, n >> 7
+        out.append(b | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+def make_dex(classes: list[tuple[str, str, list[tuple[str, str]]]], extra_strings=()) -> bytes:
+    # classes: [(descriptor, super descriptor, [(method name, const string)])]
+    strings = set(extra_strings) | {"V", "()V", "base"}
+    for desc, sup, methods in classes:
+        strings |= {desc, sup}
+        for name, const in methods:
+            strings |= {name, const}
+    strings = sorted(strings)
+    sidx = {s: i for i, s in enumerate(strings)}
+    types = sorted({"V"} | {c[0] for c in classes} | {c[1] for c in classes})
+    tidx = {t: i for i, t in enumerate(types)}
+    methods = sorted({(desc, name) for desc, _, ms in classes for name, _ in ms} | {(sup, "base") for _, sup, _ in classes},
+                     key=lambda m: (tidx[m[0]], sidx[m[1]]))
+    midx = {m: i for i, m in enumerate(methods)}
+
+    string_ids_off = 0x70
+    type_ids_off = string_ids_off + 4 * len(strings)
+    proto_ids_off = type_ids_off + 4 * len(types)
+    method_ids_off = proto_ids_off + 12
+    class_defs_off = method_ids_off + 8 * len(methods)
+    data_off = class_defs_off + 32 * len(classes)
+
+    data = bytearray()
+    string_offs = []
+    for s in strings:
+        string_offs.append(data_off + len(data))
+        data += uleb128(len(s)) + s.encode() + b"\0"
+    class_data_offs = []
+    for desc, sup, ms in classes:
+        codes = []
+        for name, const in ms:
+            data += b"\0" * (-len(data) % 4)
+            insns = struct.pack("<HH", 0x001A, sidx[const]) + struct.pack("<HHH", 0x106E, midx[(sup, "base")], 0)
+            insns += struct.pack("<H", 0x000E)
+            codes.append((midx[(desc, name)], data_off + len(data)))
+            data += struct.pack("<HHHHII", 1, 1, 1, 0, 0, len(insns) // 2) + insns
+        class_data_offs.append(data_off + len(data))
+        data += uleb128(0) + uleb128(0) + uleb128(0) + uleb128(len(codes))
+        prev = 0
+        for method, code_off in sorted(codes):
+            data += uleb128(method - prev) + uleb128(1) + uleb128(code_off)
+            prev = method
+
+    body = b"".join(struct.pack("<I", o) for o in string_offs)
+    body += b"".join(struct.pack("<I", sidx[t]) for t in types)
+    body += struct.pack("<III", sidx["()V"], tidx["V"], 0)
+    body += b"".join(struct.pack("<HHI", tidx[c], 0, sidx[n]) for c, n in methods)
+    for (desc, sup, _), cd_off in zip(classes, class_data_offs):
+        body += struct.pack("<8I", tidx[desc], 1, tidx[sup], 0, dexfile.NO_INDEX, 0, cd_off, 0)
+    header = dexfile.HEADER.pack(
+        b"dex\n035\0", 0, b"\0" * 20, 0x70 + len(body) + len(data), 0x70, 0x12345678, 0, 0, 0,
+        len(strings), string_ids_off, len(types), type_ids_off, 1, proto_ids_off, 0, 0,
+        len(methods), method_ids_off, len(classes), class_defs_off, len(data), data_off)
+    return header + body + bytes(data)
+
+
+OBJECT = "Ljava/lang/Object;"
+BAR = ("Lcom/foo/Bar;", OBJECT, [("run", "hello")])
+BAR_INNER = ("Lcom/foo/Bar$Inner;", OBJECT, [("go", "inner"), ("stop", "x")])
+BAZ = ("Lcom/foo/Baz;", "Lcom/foo/Bar;", [("a", "1"), ("b", "2"), ("c", "3")])
+
+
+class LebTest(unittest.TestCase):
+    def test_uleb128(self):
+        for raw, value in ((b"\x00", 0), (b"\x01", 1), (b"\x7f", 127), (b"\x80\x7f", 16256),
+                           (b"\xe5\x8e\x26", 624485), (b"\xff\xff\xff\xff\x0f", 0xFFFFFFFF)):
+            self.assertEqual(dexfile.read_uleb128(b"\x99" + raw + b"\x99", 1), (value, 1 + len(raw)), raw)
+
+    def test_sleb128(self):
+        for raw, value in ((b"\x00", 0), (b"\x01", 1), (b"\x7f", -1), (b"\x3f", 63), (b"\x40", -64),
+                           (b"\xc0\x00", 64), (b"\x80\x7f", -128), (b"\xc0\xbb\x78", -123456)):
+            self.assertEqual(dexfile.read_sleb128(raw, 0), (value, len(raw)), raw)
+
+
+class DexFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def apk(self, *dexes: bytes) -> str:
+        path = os.path.join(self.tmp, f"app{len(os.listdir(self.tmp))}.apk")
+        with zipfile.ZipFile(path, "w") as z:
+            for i, dex in enumerate(dexes):
+                z.writestr("classes.dex" if i == 0 else f"classes{i + 1}.dex", dex)
+            z.writestr("AndroidManifest.xml", b"<manifest/>")
+        return path
+
+    def hashes(self, dex: bytes) -> dict[str, str]:
+        d = dexfile.DexFile(dex)
+        hasher = dexfile.DexHasher(d)
+        return dict(hasher.class_hash(i) for i in range(d.class_defs_size))
+
+    def test_not_a_dex(self):
+        with self.assertRaises(dexfile.DexError):
+            dexfile.DexFile(b"PK\x03\x04" + b"\0" * 200)
+        with self.assertRaises(dexfile.DexError):
+            dexfile.DexFile(make_dex([BAR])[:0x80])
+
+    def test_class_defs(self):
+        d = dexfile.DexFile(make_dex([BAR, BAZ]))
+        self.assertEqual(d.version, "035")
+        defs = [(desc, sup) for desc, _flags, sup, _source, _off in d.class_defs()]
+        self.assertEqual(defs, [("Lcom/foo/Bar;", OBJECT), ("Lcom/foo/Baz;", "Lcom/foo/Bar;")])
+
+    def test_names(self):
+        self.assertEqual(dexfile.descriptor_to_name("Lcom/foo/Bar$Inner;"), "com.foo.Bar$Inner")
+        self.assertEqual(dexfile.descriptor_to_name("I"), "I")
+        self.assertEqual(dexfile.outer_name("com.foo.Bar$Inner$1"), "com.foo.Bar")
+        self.assertIsNone(dexfile.outer_name("com.foo.Bar"))
+        self.assertIsNone(dexfile.outer_name("com.foo.$Proxy"))
+        self.assertEqual(dexfile.source_path("com.foo.Bar"), "com/foo/Bar.java")
+        self.assertEqual(dexfile.source_path("Bar"), "defpackage/Bar.java")
+
+    def test_apk_classes_across_dexes(self):
+        apk = self.apk(make_dex([BAR, BAR_INNER]), make_dex([BAZ, (BAR[0], OBJECT, [])]))
+        classes = dexfile.apk_classes(apk)
+        self.assertEqual([(c["name"], c["dex"]) for c in classes],
+                         [("com.foo.Bar", "classes.dex"), ("com.foo.Baz", "classes2.dex")])
+        self.assertEqual(classes[1]["superclass"], "com.foo.Bar")
+
+    def test_code_units(self):
+        d = dexfile.DexFile(make_dex([BAR, BAR_INNER, BAZ]))
+        units = {desc: dexfile.code_units(d, off) for desc, _f, _s, _src, off in d.class_defs()}
+        self.assertEqual(units, {BAR[0]: 6, BAR_INNER[0]: 12, BAZ[0]: 18})
+        self.assertEqual(dexfile.code_units(d, 0), 0)
+
+    def test_hash_ignores_table_indices(self):
+        # extra strings and classes shift every index the code refers to
+        base = self.hashes(make_dex([BAR, BAZ]))
+        shifted = self.hashes(make_dex([("La/First;", OBJECT, [("m", "0")]), BAR, BAZ],
+                                       extra_strings=("0000", "Lcom/a;", "aaa")))
+        self.assertEqual(shifted["com.foo.Bar"], base["com.foo.Bar"])
+        self.assertEqual(shifted["com.foo.Baz"], base["com.foo.Baz"])
+
+    def test_hash_follows_code(self):
+        base = self.hashes(make_dex([BAR, BAZ]))
+        const = self.hashes(make_dex([(BAR[0], OBJECT, [("run", "goodbye")]), BAZ]))
+        renamed = self.hashes(make_dex([(BAR[0], OBJECT, [("walk", "hello")]), BAZ]))
+        supertype = self.hashes(make_dex([BAR, (BAZ[0], OBJECT, BAZ[2])]))
+        self.assertNotEqual(const["com.foo.Bar"], base["com.foo.Bar"])
+        self.assertNotEqual(renamed["com.foo.Bar"], base["com.foo.Bar"])
+        self.assertEqual(const["com.foo.Baz"], base["com.foo.Baz"])
+        # Baz's calls go to its superclass, so the invoke target changes too
+        self.assertNotEqual(supertype["com.foo.Baz"], base["com.foo.Baz"])
+        self.assertEqual(supertype["com.foo.Bar"], base["com.foo.Bar"])
+
+    def test_apk_hashes_cover_nested_classes(self):
+        base = dexfile.apk_class_hashes(self.apk(make_dex([BAR, BAR_INNER, BAZ])))
+        self.assertEqual(sorted(base), ["com.foo.Bar", "com.foo.Baz"])
+        self.assertEqual(base["com.foo.Bar"]["path"], "com/foo/Bar.java")
+        changed = dexfile.apk_class_hashes(self.apk(make_dex([BAR, (BAR_INNER[0], OBJECT, [("go", "outer")]), BAZ])))
+        self.assertNotEqual(changed["com.foo.Bar"]["hash"], base["com.foo.Bar"]["hash"])
+        self.assertEqual(changed["com.foo.Baz"]["hash"], base["com.foo.Baz"]["hash"])
+
+    def test_split_classes(self):
+        apk = self.apk(make_dex([BAR, BAR_INNER, BAZ, ("La/Empty;", OBJECT, [])]))
+        # weights: Bar 7 + Bar$Inner 13 = 20, Baz 19, Empty 1
+        self.assertEqual(dexfile.split_classes(apk, 2), [["com.foo.Bar"], ["a.Empty", "com.foo.Baz"]])
+        self.assertEqual(dexfile.split_classes(apk, 1), [["a.Empty", "com.foo.Bar", "com.foo.Baz"]])
+        self.assertEqual(len(dexfile.split_classes(apk, 10)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
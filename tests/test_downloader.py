@@ -0,0 +1,151 @@
+# python -m unittest discover tests
+# Local HTTP server with Range support; the handler's class attributes choose
+# how it misbehaves.
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import http.server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import ApkDownloader, DownloadError, make_session  # noqa: E402
+
+DATA = os.urandom(300 * 1024 + 123)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    ranges = True       # honour Range
+    validator = True    # send an ETag
+    empty_206 = False   # answer ranged GETs (other than the probe) with no body
+    drop_after = None   # close ranged responses after this many bytes, once per range start
+    dropped: set = set()
+    requests: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        rng = self.headers.get("Range")
+        Handler.requests.append(rng)
+        if not self.ranges or rng is None:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(DATA)))
+            self.end_headers()
+            self.wfile.write(DATA)
+            return
+        start, _, end = rng[len("bytes="):].partition("-")
+        start, end = int(start), min(int(end), len(DATA) - 1)
+        body = DATA[start:end + 1]
+        if self.empty_206 and rng != "bytes=0-0":
+            body = b""
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        if self.validator:
+            self.send_header("ETag", '"v1"')
+        if self.drop_after is not None and rng != "bytes=0-0" and start not in Handler.dropped:
+            Handler.dropped.add(start)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:self.drop_after])
+            self.close_connection = True
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ApkDownloaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/app.apk"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        for name, value in (("ranges", True), ("validator", True), ("empty_206", False), ("drop_after", None)):
+            setattr(Handler, name, value)
+        Handler.dropped = set()
+        Handler.requests = []
+        self.tmp = tempfile.mkdtemp()
+        self.dest = os.path.join(self.tmp, "app.apk")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def downloader(self, **kw):
+        kw.setdefault("segments", 4)
+        kw.setdefault("min_segment_bytes", 64 * 1024)
+        kw.setdefault("retries", 2)
+        return ApkDownloader(make_session(), **kw)
+
+    def read_dest(self) -> bytes:
+        with open(self.dest, "rb") as f:
+            return f.read()
+
+    def test_parallel_segments(self):
+        info = self.downloader().download(self.url, self.dest)
+        self.assertEqual(self.read_dest(), DATA)
+        self.assertEqual(info["segments"], 4)
+        self.assertTrue(info["ranged"])
+        self.assertFalse(os.path.exists(self.dest + ".part.json"))
+
+    def test_no_range_support(self):
+        Handler.ranges = False
+        info = self.downloader().download(self.url, self.dest)
+        self.assertEqual(self.read_dest(), DATA)
+        self.assertFalse(info["ranged"])
+
+    def test_retry_after_dropped_connection(self):
+        Handler.drop_after = 1000
+        info = self.downloader().download(self.url, self.dest)
+        self.assertEqual(self.read_dest(), DATA)
+        self.assertEqual(info["fetched_bytes"], len(DATA))
+
+    def test_resume_partial_file(self):
+        # the state a killed process leaves behind: first segment half done
+        d = self.downloader()
+        half = 32 * 1024
+        with open(self.dest + ".part", "wb") as f:
+            f.write(DATA[:half])
+            f.truncate(len(DATA))
+        step = -(-len(DATA) // 4)
+        segments = [[s, min(s + step, len(DATA)) - 1, 0] for s in range(0, len(DATA), step)]
+        segments[0][2] = half
+        d._save_state(self.dest, {"url": self.url, "final_url": self.url, "total": len(DATA),
+                                  "validator": '"v1"', "segments": segments})
+        info = d.download(self.url, self.dest)
+        self.assertEqual(self.read_dest(), DATA)
+        self.assertEqual(info["resumed_bytes"], half)
+        self.assertIn(f"bytes={half}-{step - 1}", Handler.requests)
+
+    def test_no_validator_restarts(self):
+        Handler.validator = False
+        d = self.downloader()
+        with open(self.dest + ".part", "wb") as f:
+            f.write(b"\0" * len(DATA))
+        segments = [[0, len(DATA) - 1, 1000]]
+        d._save_state(self.dest, {"url": self.url, "final_url": self.url, "total": len(DATA),
+                                  "validator": None, "segments": segments})
+        info = d.download(self.url, self.dest)
+        self.assertEqual(self.read_dest(), DATA)
+        self.assertEqual(info["resumed_bytes"], 0)
+
+    def test_empty_206_gives_up(self):
+        Handler.empty_206 = True
+        with self.assertRaises(DownloadError):
+            self.downloader(segments=1, retries=1).download(self.url, self.dest)
+        with open(self.dest + ".part.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["segments"][0][2], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
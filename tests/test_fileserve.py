@@ -0,0 +1,45 @@
+# python -m unittest discover tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fileserve import parse_range  # noqa: E402
+
+SIZE = 1000
+
+
+class ParseRangeTest(unittest.TestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range("bytes=0-0", SIZE), (0, 0))
+        self.assertEqual(parse_range("bytes=0-499", SIZE), (0, 499))
+        self.assertEqual(parse_range("bytes=500-", SIZE), (500, 999))
+        self.assertEqual(parse_range("bytes= 10-20 ", SIZE), (10, 20))
+
+    def test_end_clamped_to_size(self):
+        self.assertEqual(parse_range("bytes=900-5000", SIZE), (900, 999))
+        self.assertEqual(parse_range("bytes=999-999", SIZE), (999, 999))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range("bytes=-1", SIZE), (999, 999))
+        self.assertEqual(parse_range("bytes=-100", SIZE), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", SIZE), (0, 999))
+
+    def test_unsatisfiable(self):
+        self.assertIs(parse_range("bytes=1000-", SIZE), False)
+        self.assertIs(parse_range("bytes=1000-2000", SIZE), False)
+        self.assertIs(parse_range("bytes=20-10", SIZE), False)
+        self.assertIs(parse_range("bytes=-0", SIZE), False)
+        self.assertIs(parse_range("bytes=0-", 0), False)
+
+    def test_ignored_headers_serve_everything(self):
+        # no header, other units, multiple ranges and garbage all mean a plain 200
+        for header in (None, "", "items=0-10", "bytes=0-10,20-30", "bytes=-10, 50-",
+                       "bytes=abc-def", "bytes=5-x", "bytes=-", "bytes=", "bytes=--5",
+                       "bytes=+5-10", "bytes=1_0-20", "bytes=0- 5"):
+            self.assertIsNone(parse_range(header, SIZE), header)
+
+
+if __name__ == "__main__":
+    unittest.main()
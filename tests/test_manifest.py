@@ -0,0 +1,130 @@
+# python -m unittest discover tests
+# Keyset paging must visit every entry exactly once, in order, for every sort
+# column and direction - ties on the sort key are broken by name.
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import manifest  # noqa: E402
+
+# name -> (size, mtime); duplicate sizes and mtimes exercise the tie-breaker
+FILES = {
+    "A.java": (300, 1_600_000_300),
+    "B.java": (100, 1_600_000_100),
+    "C.java": (100, 1_600_000_100),
+    "D.xml": (200, 1_600_000_200),
+    "E.java": (100, 1_600_000_300),
+    "F.txt": (0, 1_600_000_000),
+    "a.java": (200, 1_600_000_100),
+}
+DIRS = ("pkg", "zzz")
+
+
+class ManifestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.root = os.path.join(cls.tmp, "sources")
+        for d in DIRS:
+            os.makedirs(os.path.join(cls.root, d))
+            with open(os.path.join(cls.root, d, "X.java"), "wb") as f:
+                f.write(b"x" * 50)
+        for name, (size, mtime) in FILES.items():
+            path = os.path.join(cls.root, name)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+            os.utime(path, (mtime, mtime))
+        cls.db = os.path.join(cls.tmp, "index", "manifest.db")
+        cls.info = manifest.build_manifest(cls.tmp, ("sources",), cls.db)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def pages(self, lister, limit: int, **kw) -> list[str]:
+        names, cursor = [], None
+        for _ in range(100):
+            page = lister(limit=limit, cursor=cursor, **kw)
+            self.assertLessEqual(len(page["items"]), limit)
+            names += [it["name"] for it in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return names
+        self.fail("paging did not terminate")
+
+    def expected(self, sort: str, desc: bool, live: bool = False) -> list[str]:
+        def key(name):
+            if sort == "name":
+                return (name,)
+            if name in DIRS:
+                # the manifest sums sizes below a dir, the live listing has none
+                size, mtime, typ = (-1 if live else 50), None, "dir"
+            else:
+                (size, mtime), typ = FILES[name], "file"
+            value = {"size": size, "mtime": mtime, "type": typ}[sort]
+            if value is None:
+                value = int(os.path.getmtime(os.path.join(self.root, name)))
+            return (value, name)
+        return sorted(list(FILES) + list(DIRS), key=key, reverse=desc)
+
+    def test_cursor_round_trip(self):
+        for key, name in ((None, "a"), (0, "b"), (1_600_000_000, "Bar$1.java"), ("dir", "ünïcode")):
+            self.assertEqual(manifest.decode_cursor(manifest.encode_cursor(key, name)), (key, name))
+        self.assertNotIn("=", manifest.encode_cursor(1, "x"))
+
+    def test_invalid_cursor(self):
+        for cursor in ("!!!", "bm90IGpzb24", manifest.encode_cursor(1, "x")[:-3], "WzFd"):
+            with self.assertRaises(ValueError, msg=cursor):
+                manifest.decode_cursor(cursor)
+        with self.assertRaises(ValueError):
+            manifest.list_dir(self.db, "sources", cursor="!!!")
+
+    def test_info(self):
+        self.assertEqual(self.info["files"], len(FILES) + len(DIRS))
+        self.assertEqual(self.info["bytes"], sum(s for s, _ in FILES.values()) + 50 * len(DIRS))
+        self.assertEqual(manifest.stat(self.db, "sources/pkg")["size"], 50)
+
+    def test_list_dir_pages(self):
+        lister = lambda **kw: manifest.list_dir(self.db, "sources", **kw)  # noqa: E731
+        for sort in manifest.SORT_COLUMNS:
+            for desc in (False, True):
+                want = self.expected(sort, desc)
+                for limit in (1, 2, 3, 100):
+                    self.assertEqual(self.pages(lister, limit, sort=sort, desc=desc), want, (sort, desc, limit))
+
+    def test_list_live_pages(self):
+        lister = lambda **kw: manifest.list_live(self.root, "sources", **kw)  # noqa: E731
+        for sort in manifest.SORT_COLUMNS:
+            for desc in (False, True):
+                want = self.expected(sort, desc, live=True)
+                for limit in (1, 2, 3, 100):
+                    self.assertEqual(self.pages(lister, limit, sort=sort, desc=desc), want, (sort, desc, limit))
+
+    def test_glob(self):
+        page = manifest.list_dir(self.db, "sources", glob="*.java", limit=2)
+        self.assertEqual(page["total"], 5)
+        self.assertEqual([it["name"] for it in page["items"]], ["A.java", "B.java"])
+        live = manifest.list_live(self.root, "sources", glob="*.java", limit=2)
+        self.assertEqual(live["total"], 5)
+        self.assertEqual([it["name"] for it in live["items"]], ["A.java", "B.java"])
+
+    def test_class_manifest(self):
+        db = os.path.join(self.tmp, "index", "classes.db")
+        info = manifest.build_class_manifest([("com/foo/Bar.java", "com.foo.Bar"),
+                                              ("com/foo/Baz.java", "com.foo.Baz"),
+                                              ("defpackage/A.java", "A")], db)
+        self.assertEqual((info["files"], info["dirs"]), (3, 4))
+        self.assertEqual(manifest.class_for_path(db, "sources/com/foo/Baz.java"), "com.foo.Baz")
+        self.assertIsNone(manifest.class_for_path(db, "sources/com/foo/Nope.java"))
+        self.assertIsNone(manifest.class_for_path(self.db, "sources/A.java"))
+        self.assertEqual(manifest.stat(db, "sources/com")["files"], 2)
+        self.assertEqual(self.pages(lambda **kw: manifest.list_dir(db, "sources/com/foo", **kw), 1),
+                         ["Bar.java", "Baz.java"])
+
+
+if __name__ == "__main__":
+    unittest.main()
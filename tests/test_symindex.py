@@ -0,0 +1,106 @@
+# python -m unittest discover tests
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import symindex  # noqa: E402
+
+SOURCES = {
+    "com/foo/Bar.java": """package com.foo;
+
+public class Bar {
+    public static class Inner {
+    }
+
+    class Sibling extends Inner {
+    }
+
+    class Deep extends Bar.Inner {
+    }
+}
+""",
+    "com/foo/Baz.java": """package com.foo;
+
+public class Baz extends Bar.Inner {
+}
+""",
+    "com/foo/Qux.java": """package com.foo;
+
+public class Qux extends Baz {
+}
+""",
+    "com/other/Entryish.java": """package com.other;
+
+import java.util.Map;
+import com.foo.Bar;
+
+public abstract class Entryish implements Map.Entry<String, String>, Comparable<Entryish> {
+    class ViaImport extends Bar.Inner {
+    }
+
+    class Qualified extends com.foo.Bar.Inner {
+    }
+}
+""",
+}
+
+
+class SymbolIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        for rel, text in SOURCES.items():
+            path = os.path.join(cls.tmp, "sources", rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        cls.db = os.path.join(cls.tmp, "index", "symbols.db")
+        symindex.build_symbol_index(cls.tmp, "sources", cls.db, procs=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def supers(self, rel: str) -> dict:
+        _symbols, supers = symindex.parse_java(os.path.join(self.tmp, "sources", rel), rel)
+        return {cls: super_q for cls, _relation, _name, super_q in supers}
+
+    def subtypes(self, name: str, transitive: bool = False) -> list[str]:
+        return sorted(s["qualname"] for s in symindex.subtypes(self.db, name, transitive=transitive))
+
+    def test_nested_name(self):
+        self.assertEqual(symindex.nested_name("com.foo.Bar.Inner"), "com.foo.Bar$Inner")
+        self.assertEqual(symindex.nested_name("com.foo.Bar$Inner"), "com.foo.Bar$Inner")
+        self.assertEqual(symindex.nested_name("Bar.Inner"), "Bar$Inner")
+        self.assertEqual(symindex.nested_name("Inner"), "Inner")
+
+    def test_resolve_nested_supertypes(self):
+        self.assertEqual(self.supers("com/foo/Baz.java"), {"com.foo.Baz": "com.foo.Bar$Inner"})
+        bar = self.supers("com/foo/Bar.java")
+        self.assertEqual(bar["com.foo.Bar$Sibling"], "com.foo.Bar$Inner")
+        self.assertEqual(bar["com.foo.Bar$Deep"], "com.foo.Bar$Inner")
+        other = self.supers("com/other/Entryish.java")
+        self.assertEqual(other["com.other.Entryish"], "java.lang.Comparable")
+        self.assertEqual(other["com.other.Entryish$ViaImport"], "com.foo.Bar$Inner")
+        self.assertEqual(other["com.other.Entryish$Qualified"], "com.foo.Bar$Inner")
+        _symbols, supers = symindex.parse_java(os.path.join(self.tmp, "sources", "com/other/Entryish.java"), "x")
+        self.assertIn(("com.other.Entryish", "implements", "Entry", "java.util.Map$Entry"), supers)
+
+    def test_subtypes_nested_and_transitive(self):
+        direct = ["com.foo.Bar$Deep", "com.foo.Bar$Sibling", "com.foo.Baz",
+                  "com.other.Entryish$Qualified", "com.other.Entryish$ViaImport"]
+        for name in ("com.foo.Bar$Inner", "com.foo.Bar.Inner", "Bar.Inner", "Inner"):
+            self.assertEqual(self.subtypes(name), direct, name)
+            self.assertEqual(self.subtypes(name, transitive=True), sorted(direct + ["com.foo.Qux"]), name)
+
+    def test_subtypes_other_outer_not_matched(self):
+        self.assertEqual(self.subtypes("Other.Inner"), [])
+        self.assertEqual(self.subtypes("com.bar.Bar.Inner"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+import os
+import re
+import time
+import sqlite3
+import fnmatch
+from array import array
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# -------------------------
+# TRIGRAM INDEX OVER DECOMPILED SOURCES
+# -------------------------
+# SQLite file with:
+#   files(id, path, size)        path is relative to the scan dir ("sources/...")
+#   postings(tri, n, ids)        ids = uint32 array of file ids containing trigram `tri`
+#   info(key, value)
+# Trigrams are taken from the lower-cased text, so one index serves both case
+# sensitive and insensitive queries; candidates are always verified against
+# the real file contents.
+#
+# Postings are flushed in batches to bound memory, so a trigram may have
+# several rows; readers concatenate them.
+
+INDEX_EXTENSIONS = (".java", ".kt", ".smali", ".xml", ".json", ".txt", ".properties")
+FLUSH_POSTINGS = 5_000_000
+MAX_INDEXED_FILE_BYTES = 4 * 1024 * 1024
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def build_index(scan_root: str, rel_dir: str, db_path: str) -> dict:
+    t0 = time.time()
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    con = sqlite3.connect(tmp)
+    con.executescript("""
+        PRAGMA journal_mode=OFF;
+        PRAGMA synchronous=OFF;
+        CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL);
+        CREATE TABLE postings (tri TEXT NOT NULL, n INTEGER NOT NULL, ids BLOB NOT NULL);
+        CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+    """)
+
+    pending: dict[str, array] = {}
+    pending_count = 0
+    file_count = 0
+    total_bytes = 0
+
+    def flush():
+        con.executemany(
+            "INSERT INTO postings (tri, n, ids) VALUES (?, ?, ?)",
+            ((tri, len(ids), ids.tobytes()) for tri, ids in pending.items()),
+        )
+        pending.clear()
+
+    base = os.path.join(scan_root, rel_dir)
+    for root, dirs, files in os.walk(base):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(INDEX_EXTENSIONS):
+                continue
+            full = os.path.join(root, name)
+            size = os.path.getsize(full)
+            if size > MAX_INDEXED_FILE_BYTES:
+                continue
+            with open(full, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+
+            fid = file_count
+            file_count += 1
+            total_bytes += size
+            con.execute("INSERT INTO files (id, path, size) VALUES (?, ?, ?)",
+                        (fid, os.path.relpath(full, scan_root), size))
+
+            tris = _trigrams(text.lower())
+            for tri in tris:
+                ids = pending.get(tri)
+                if ids is None:
+                    pending[tri] = ids = array("I")
+                ids.append(fid)
+            pending_count += len(tris)
+            if pending_count >= FLUSH_POSTINGS:
+                flush()
+                pending_count = 0
+
+    flush()
+    con.execute("CREATE INDEX postings_tri ON postings (tri)")
+    info = {
+        "built_at": int(time.time()),
+        "files": file_count,
+        "bytes": total_bytes,
+        "build_sec": round(time.time() - t0, 2),
+    }
+    con.executemany("INSERT INTO info (key, value) VALUES (?, ?)", ((k, str(v)) for k, v in info.items()))
+    con.commit()
+    con.close()
+    os.replace(tmp, db_path)  # new inode: never rewrites a file shared via hardlinks
+    return info
+
+
+# -------------------------
+# QUERY PLANNING
+# -------------------------
+def _regex_literals(pattern: str) -> list[str]:
+    # literal runs that every match must contain (conservative: [] = unknown)
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+
+    runs: list[str] = []
+
+    def walk(items):
+        cur = []
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                cur.append(chr(av))
+                continue
+            if op is sre_parse.SUBPATTERN:
+                # group contents are still a required sequence
+                sub = av[-1]
+                if cur:
+                    runs.append("".join(cur))
+                    cur = []
+                walk(sub)
+                continue
+            if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                if cur:
+                    runs.append("".join(cur))
+                    cur = []
+                walk(av[2])
+                continue
+            if op is sre_parse.AT:
+                continue  # anchors consume nothing
+            if cur:
+                runs.append("".join(cur))
+                cur = []
+        if cur:
+            runs.append("".join(cur))
+
+    walk(parsed)
+    return [r for r in runs if len(r) >= 3]
+
+
+def _load_postings(con: sqlite3.Connection, tri: str) -> set[int]:
+    out: set[int] = set()
+    for (blob,) in con.execute("SELECT ids FROM postings WHERE tri = ?", (tri,)):
+        a = array("I")
+        a.frombytes(blob)
+        out.update(a)
+    return out
+
+
+def _candidates(con: sqlite3.Connection, literals: list[str], max_trigrams: int = 12) -> list[int] | None:
+    tris = set()
+    for lit in literals:
+        tris |= _trigrams(lit.lower())
+    if not tris:
+        return None  # nothing to narrow with: full scan
+
+    counts = {}
+    for tri in tris:
+        row = con.execute("SELECT COALESCE(SUM(n), 0) FROM postings WHERE tri = ?", (tri,)).fetchone()
+        if not row[0]:
+            return []
+        counts[tri] = row[0]
+
+    cand: set[int] | None = None
+    for tri in sorted(tris, key=counts.get)[:max_trigrams]:
+        ids = _load_postings(con, tri)
+        cand = ids if cand is None else cand & ids
+        if len(cand) <= 8:
+            break
+    return sorted(cand or ())
+
+
+def search(db_path: str, read_text, query: str, regex: bool = False, ignore_case: bool = False,
+           limit: int = 100, path_glob: str | None = None, snippet_chars: int = 200) -> dict:
+    t0 = time.time()
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        pattern = re.compile(query if regex else re.escape(query), flags)
+    except re.error as e:
+        raise ValueError(f"invalid regex: {e}")
+
+    literals = _regex_literals(query) if regex else [query]
+
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cand = _candidates(con, literals)
+        if cand is None:
+            rows = con.execute("SELECT id, path FROM files ORDER BY id").fetchall()
+        else:
+            rows = []
+            for i in range(0, len(cand), 500):
+                chunk = cand[i:i + 500]
+                rows += con.execute(
+                    f"SELECT id, path FROM files WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id", chunk
+                ).fetchall()
+    finally:
+        con.close()
+
+    results = []
+    scanned = 0
+    truncated = False
+    for _fid, path in rows:
+        if path_glob and not fnmatch.fnmatch(path, path_glob):
+            continue
+        text = read_text(path)
+        if text is None:
+            continue
+        scanned += 1
+        line_no = 1
+        last = 0
+        for m in pattern.finditer(text):
+            line_no += text.count("\n", last, m.start())
+            last = m.start()
+            line_start = text.rfind("\n", 0, m.start()) + 1
+            line_end = text.find("\n", m.start())
+            if line_end == -1:
+                line_end = len(text)
+            results.append({
+                "path": path,
+                "line": line_no,
+                "column": m.start() - line_start + 1,
+                "snippet": text[line_start:line_end].strip()[:snippet_chars],
+            })
+            if len(results) >= limit:
+                truncated = True
+                break
+        if truncated:
+            break
+
+    return {
+        "query": query,
+        "regex": regex,
+        "index_used": cand is not None,
+        "candidate_files": len(rows),
+        "scanned_files": scanned,
+        "truncated": truncated,
+        "took_ms": round((time.time() - t0) * 1000, 2),
+        "results": results,
+    }
+
+
+def index_info(db_path: str) -> dict:
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return dict(con.execute("SELECT key, value FROM info").fetchall())
+    finally:
+        con.close()